@@ -0,0 +1,55 @@
+"""Allocation of private and VLAN addresses from the configured cluster subnets."""
+
+from ipaddress import IPv4Address, IPv4Network
+
+MAX_ADDRESS = int(IPv4Address("255.255.255.255"))
+
+
+class SubnetExhausted(LookupError):
+    """Raised when a subnet has no address left to hand out."""
+
+
+class SubnetAllocator:
+    """
+    Hands out the addresses of one subnet in order, from `start` up to the last host address of `subnet`, or without
+    an upper bound if no subnet is configured.
+
+    Addresses hosts already have are reserved up front and skipped. The allocator only moves forward and forgets
+    reservations once it has passed them, so handing out every address of a subnet takes linear time overall.
+    """
+
+    def __init__(self, start: str, subnet: str | None = None):
+        self.start = start
+        self.subnet = subnet
+        self._next = int(IPv4Address(start))
+        if subnet is None:
+            self._last = MAX_ADDRESS
+        else:
+            network = IPv4Network(subnet, strict=False)
+            if IPv4Address(start) not in network:
+                raise ValueError(f"Start address {start} is outside of subnet {subnet}")
+            # /31 and /32 networks have no network and broadcast addresses to leave out.
+            self._last = int(network.broadcast_address) - (1 if network.prefixlen < 31 else 0)
+        self._reserved: set[int] = set()
+
+    def reserve(self, ip: str) -> None:
+        """Keep `ip` from being handed out, e.g. because a host already has it."""
+        address = int(IPv4Address(ip))
+        if self._next <= address <= self._last:
+            self._reserved.add(address)
+
+    def allocate(self) -> str:
+        """The next free address, which is taken from then on."""
+        while self._next in self._reserved:
+            self._reserved.discard(self._next)
+            self._next += 1
+        if self._next > self._last:
+            raise SubnetExhausted(f"No addresses left in subnet {self.subnet} starting at {self.start}")
+        address = self._next
+        self._next += 1
+        return str(IPv4Address(address))
+
+    @property
+    def remaining(self) -> int:
+        """How many addresses can still be handed out."""
+        return max(self._last - self._next + 1, 0) - len(self._reserved)
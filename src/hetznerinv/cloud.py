@@ -0,0 +1,54 @@
+from hcloud import Client
+from hcloud.servers import BoundServer
+
+from hetznerinv.cassette import Cassette
+from hetznerinv.config import CloudClientConfig
+from hetznerinv.hetzner.util.timeouts import Deadline
+
+CLOUD_PAGE_SIZE = 50
+
+
+def cloud_client(token: str, settings: CloudClientConfig | None = None, cassette: Cassette | None = None) -> Client:
+    """Create a Hetzner Cloud client with the configured timeouts, recording or replaying through 'cassette'."""
+    if settings is None:
+        settings = CloudClientConfig()
+    client = Client(token=token, timeout=(settings.connect_timeout, settings.read_timeout))
+    if cassette is not None:
+        cassette.attach_cloud(client)
+    return client
+
+
+def _request_timeout(client: Client, deadline: Deadline) -> float | tuple | None:
+    """The client's own timeout, capped to the remaining deadline."""
+    timeout = client._client._timeout  # hcloud has no public accessor
+    if isinstance(timeout, tuple):
+        return tuple(deadline.cap(t) for t in timeout)
+    return deadline.cap(timeout)
+
+
+def get_all_server_data(client: Client, deadline: Deadline | None = None) -> list[dict]:
+    """
+    List all Cloud servers page by page like `client.servers.get_all()`, but
+    check the deadline before every page and cap each request to it. Returns
+    the servers as sent by the API.
+    """
+    if deadline is None:
+        deadline = Deadline()
+    servers = []
+    page = 1
+    while page:
+        deadline.check("Listing Hetzner Cloud servers")
+        response = client.request(
+            "GET",
+            "/servers",
+            params={"page": page, "per_page": CLOUD_PAGE_SIZE},
+            timeout=_request_timeout(client, deadline),
+        )
+        servers.extend(response["servers"])
+        page = response.get("meta", {}).get("pagination", {}).get("next_page")
+    return servers
+
+
+def get_all_servers(client: Client, deadline: Deadline | None = None) -> list[BoundServer]:
+    """Like `get_all_server_data()`, but as bound hcloud servers."""
+    return [BoundServer(client.servers, data) for data in get_all_server_data(client, deadline)]
@@ -4,9 +4,19 @@ from typing import Annotated
 import typer
 import yaml
 
+from hetznerinv.cassette import Cassette
+from hetznerinv.cloud import cloud_client, get_all_server_data
 from hetznerinv.config import Config, HetznerInventoryConfig, config
 from hetznerinv.generate_inventory import gen_cloud, gen_robot, ssh_config
+from hetznerinv.hetzner import DeadlineExceeded
 from hetznerinv.hetzner.robot import Robot
+from hetznerinv.hetzner.snapshot import FleetSnapshot
+from hetznerinv.hetzner.util.timeouts import Deadline
+from hetznerinv.leases import LeaseStore
+from hetznerinv.store import FleetStore
+
+# What `generate` needs from Robot, kept in a --save-snapshot file
+SNAPSHOT_RESOURCES = ("servers", "vswitches")
 
 cmd_generate_app = typer.Typer(
     help="Generate Hetzner inventory files and optionally an SSH configuration.",
@@ -14,7 +24,9 @@ cmd_generate_app = typer.Typer(
 )
 
 
-def _init_robot(conf: Config, env: str) -> Robot | None:
+def _init_robot(
+    conf: Config, env: str, deadline: Deadline | None = None, cassette: Cassette | None = None
+) -> Robot | None:
     """Init Robot client with creds validation"""
     robot_user, robot_password = conf.hetzner_credentials.get_robot_credentials(env)
 
@@ -33,7 +45,10 @@ def _init_robot(conf: Config, env: str) -> Robot | None:
         )
         return None
 
-    return Robot(robot_user, robot_password)
+    kwargs = conf.robot_client.robot_kwargs(deadline)
+    if cassette is not None:
+        kwargs["transport"] = cassette.robot_transport(kwargs["transport"])
+    return Robot(robot_user, robot_password, **kwargs)
 
 
 def _get_cloud_token(conf: Config, env: str) -> str:
@@ -75,6 +90,68 @@ def _load_inv(path: Path, inv_type: str) -> dict:
         return {}
 
 
+def _open_snapshot(path: Path, env: str, *, robot: bool, cloud: bool) -> FleetStore:
+    """Open a snapshot file for offline generation, checking it has the Robot and/or Cloud servers of env"""
+    resources = [*SNAPSHOT_RESOURCES] if robot else []
+    if cloud:
+        resources.append("cloud_servers")
+    store = FleetStore(path)
+    missing = [resource for resource in resources if store.fetched_at(env, resource) is None]
+    if missing:
+        store.close()
+        typer.secho(
+            f"Error: Snapshot {path} has no {', '.join(missing)} for environment '{env}'. "
+            "Create it with --save-snapshot first.",
+            fg=typer.colors.RED,
+            err=True,
+        )
+        raise typer.Exit(code=1)
+    return store
+
+
+def _open_leases(ctx: typer.Context, env: str, enabled: bool) -> LeaseStore | None:
+    """Open the lease file of env next to its Robot inventory, closed with the command"""
+    if not enabled:
+        return None
+    leases = LeaseStore(Path(f"inventory/{env}/leases.sqlite3"))
+    ctx.call_on_close(leases.close)
+    return leases
+
+
+def _robot_snapshot(
+    robot_client: Robot | None, store: FleetStore | None, env: str, *, offline: bool
+) -> FleetSnapshot | None:
+    """Load Robot servers and vSwitches from the snapshot file, or fetch them and save them to it"""
+    if offline:
+        return store.snapshot(env)
+    if robot_client is None:
+        return None
+    snapshot = robot_client.snapshot(include=SNAPSHOT_RESOURCES)
+    if store is not None:
+        store.save_snapshot(env, snapshot, SNAPSHOT_RESOURCES)
+    return snapshot
+
+
+def _cloud_server_data(
+    token: str,
+    conf: Config,
+    store: FleetStore | None,
+    env: str,
+    *,
+    offline: bool,
+    deadline: Deadline,
+    cassette: Cassette | None,
+) -> list[dict] | None:
+    """Load Cloud servers from the snapshot file, or fetch them and save them to it when saving one"""
+    if offline:
+        return store.load(env, "cloud_servers")
+    if store is None:
+        return None
+    server_data = get_all_server_data(cloud_client(token, conf.cloud_client, cassette), deadline)
+    store.save(env, "cloud_servers", server_data)
+    return server_data
+
+
 def _gen_robot_inv(
     robot_client: Robot | None,
     conf: HetznerInventoryConfig,
@@ -83,12 +160,28 @@ def _gen_robot_inv(
     process_all: bool,
     requested: bool,
     verbose: bool,
+    *,
+    snapshot: FleetSnapshot | None = None,
+    leases: LeaseStore | None = None,
+    reclaim_leases: bool = False,
 ) -> None:
     """Generate Robot inventory if applicable"""
-    if robot_client:
+    if snapshot is not None:
         typer.echo("Generating Robot inventory...")
-        gen_robot(robot_client, conf, hosts, env, process_all_hosts=process_all, verbose=verbose)
+        gen_robot(
+            robot_client,
+            conf,
+            hosts,
+            env,
+            process_all_hosts=process_all,
+            verbose=verbose,
+            snapshot=snapshot,
+            leases=leases,
+            reclaim_leases=reclaim_leases,
+        )
         typer.secho("Robot inventory generation complete.", fg=typer.colors.GREEN)
+        if verbose and robot_client:
+            _print_transfer_stats(robot_client)
     elif requested:
         # This case is when --gen-robot is specified for an env without credentials.
         # _init_robot already prints a warning. This adds context.
@@ -98,16 +191,48 @@ def _gen_robot_inv(
         )
 
 
+def _print_transfer_stats(robot_client: Robot) -> None:
+    """Show how many response bytes Robot sent per endpoint, compressed and decoded"""
+    for endpoint, stats in sorted(robot_client.transfer_stats().items()):
+        typer.echo(
+            f"  {endpoint}: {stats['requests']} requests, {stats['wire_bytes']} bytes on the wire, "
+            f"{stats['decoded_bytes']} bytes decoded"
+        )
+
+
 def _gen_cloud_inv(
     hosts: dict,
     token: str,
-    conf: HetznerInventoryConfig,
+    conf: Config,
     env: str,
     process_all: bool,
+    *,
+    deadline: Deadline,
+    cassette: Cassette | None,
+    server_data: list[dict] | None = None,
+    offline: bool = False,
 ) -> None:
     """Generate Cloud inventory"""
     typer.echo("Generating Cloud inventory...")
-    gen_cloud(hosts, token, conf, env, process_all_hosts=process_all)
+    hetzner_conf = conf.hetzner_for_env(env)
+    if offline and (hetzner_conf.update_server_names_in_cloud or hetzner_conf.update_server_labels_in_cloud):
+        typer.secho(
+            "Warning: Generating from a snapshot, Cloud server names and labels are not updated.",
+            fg=typer.colors.YELLOW,
+            err=True,
+        )
+    gen_cloud(
+        hosts,
+        token,
+        hetzner_conf,
+        env,
+        process_all_hosts=process_all,
+        client_settings=conf.cloud_client,
+        deadline=deadline,
+        cassette=cassette,
+        server_data=server_data,
+        offline=offline,
+    )
     typer.secho("Cloud inventory generation complete.", fg=typer.colors.GREEN)
 
 
@@ -177,6 +302,76 @@ def generate_main(
             help="Process all hosts and disregard ignore_hosts_ips and ignore_hosts_ids from config.",
         ),
     ] = False,
+    deadline_seconds: Annotated[
+        float | None,
+        typer.Option(
+            "--deadline",
+            help="Abort with an error if the whole run takes longer than this many seconds.",
+            min=0,
+        ),
+    ] = None,
+    record: Annotated[
+        Path | None,
+        typer.Option(
+            "--record",
+            help="Record all Robot and Cloud API responses to this cassette file. Credentials are not recorded.",
+            dir_okay=False,
+            resolve_path=True,
+        ),
+    ] = None,
+    replay: Annotated[
+        Path | None,
+        typer.Option(
+            "--replay",
+            help="Answer Robot and Cloud API requests from this cassette file instead of the network.",
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            readable=True,
+            resolve_path=True,
+        ),
+    ] = None,
+    replay_latency: Annotated[
+        float | None,
+        typer.Option("--replay-latency", help="Simulated latency in seconds for every replayed request.", min=0),
+    ] = None,
+    save_snapshot: Annotated[
+        Path | None,
+        typer.Option(
+            "--save-snapshot",
+            help="Save the fetched Robot and Cloud servers to this snapshot file for later --from-snapshot runs.",
+            dir_okay=False,
+            resolve_path=True,
+        ),
+    ] = None,
+    from_snapshot: Annotated[
+        Path | None,
+        typer.Option(
+            "--from-snapshot",
+            help="Generate from a snapshot file instead of the APIs, without credentials or network access.",
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            readable=True,
+            resolve_path=True,
+        ),
+    ] = None,
+    use_leases: Annotated[
+        bool,
+        typer.Option(
+            "--leases",
+            help="Keep the addresses given to Robot servers in inventory/ENV/leases.sqlite3 and only allocate "
+            "addresses for new servers.",
+        ),
+    ] = False,
+    reclaim_leases: Annotated[
+        bool,
+        typer.Option(
+            "--reclaim-leases",
+            help="Release the leases of servers Robot no longer lists, so their addresses can be handed out again. "
+            "Implies --leases.",
+        ),
+    ] = False,
 ):
     """
     Generates inventory files for Hetzner Robot and Cloud servers.
@@ -187,26 +382,75 @@ def generate_main(
 
     conf = config(path=str(config_path) if config_path else None)
     hetzner_conf = conf.hetzner_for_env(env)
+    deadline = Deadline(deadline_seconds)
+    offline = from_snapshot is not None
+    if offline and (save_snapshot or record or replay):
+        raise typer.BadParameter("--from-snapshot can't be used with --save-snapshot, --record or --replay")
+    try:
+        cassette = Cassette.from_options(record, replay, replay_latency)
+    except ValueError as e:
+        raise typer.BadParameter(str(e)) from e
+    if cassette is not None:
+        ctx.call_on_close(cassette.save)
+
+    # Determine generation scope
+    specific_gen = generate_robot or generate_cloud or generate_ssh
+    gen_all = not specific_gen
 
-    robot_client = _init_robot(conf, env)
-    token = _get_cloud_token(conf, env)
+    store = None
+    if offline:
+        store = _open_snapshot(from_snapshot, env, robot=gen_all or generate_robot, cloud=gen_all or generate_cloud)
+        robot_client = None
+        token = conf.hetzner_credentials.get_hcloud_token(env) or ""
+    else:
+        robot_client = _init_robot(conf, env, deadline, cassette)
+        token = _get_cloud_token(conf, env)
+        if save_snapshot is not None:
+            store = FleetStore(save_snapshot)
+    if store is not None:
+        ctx.call_on_close(store.close)
 
-    typer.echo(f"Generating inventory for environment: {env}")
+    typer.echo(f"Generating inventory for environment: {env}" + (f" from snapshot {from_snapshot}" if offline else ""))
 
     # Load existing inventory files
     hosts_r = _load_inv(Path(f"inventory/{env}/hosts.yaml"), "Robot")
     hosts_c = _load_inv(Path(f"inventory/{env}/cloud.yaml"), "Cloud")
 
-    # Determine generation scope
-    specific_gen = generate_robot or generate_cloud or generate_ssh
-    gen_all = not specific_gen
-
     # Generate inventories
-    if gen_all or generate_robot:
-        _gen_robot_inv(robot_client, hetzner_conf, hosts_r, env, process_all_hosts, generate_robot, verbose)
+    try:
+        if gen_all or generate_robot:
+            snapshot = _robot_snapshot(robot_client, store, env, offline=offline)
+            _gen_robot_inv(
+                robot_client,
+                hetzner_conf,
+                hosts_r,
+                env,
+                process_all_hosts,
+                generate_robot,
+                verbose,
+                snapshot=snapshot,
+                leases=_open_leases(ctx, env, use_leases or reclaim_leases),
+                reclaim_leases=reclaim_leases,
+            )
 
-    if gen_all or generate_cloud:
-        _gen_cloud_inv(hosts_c, token, hetzner_conf, env, process_all_hosts)
+        if gen_all or generate_cloud:
+            server_data = _cloud_server_data(
+                token, conf, store, env, offline=offline, deadline=deadline, cassette=cassette
+            )
+            _gen_cloud_inv(
+                hosts_c,
+                token,
+                conf,
+                env,
+                process_all_hosts,
+                deadline=deadline,
+                cassette=cassette,
+                server_data=server_data,
+                offline=offline,
+            )
+    except DeadlineExceeded as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1) from e
 
     # Generate SSH config
     if gen_all or generate_ssh:
@@ -2,16 +2,34 @@ from pathlib import Path
 from typing import Annotated
 
 import typer
-from hcloud import Client
 from rich import print
 from rich.table import Table
 
+from hetznerinv.cassette import Cassette
+from hetznerinv.cloud import cloud_client, get_all_servers
 from hetznerinv.config import Config, HetznerInventoryConfig, config
 from hetznerinv.generate_inventory import get_robot_servers_with_env
+from hetznerinv.hetzner import DeadlineExceeded
+from hetznerinv.hetzner.registry import RobotRegistry
 from hetznerinv.hetzner.robot import Robot
+from hetznerinv.hetzner.util.timeouts import Deadline
+from hetznerinv.hetzner.vswitch import VswitchIndex
+from hetznerinv.store import FleetStore
 
 
-def _init_robot(conf: Config, env: str) -> Robot | None:
+def _robot_registry(conf: Config, deadline: Deadline | None = None, cassette: Cassette | None = None) -> RobotRegistry:
+    """Registry creating one Robot client per Robot account, shared by the environments using it"""
+
+    def create(robot_user: str, robot_password: str) -> Robot:
+        kwargs = conf.robot_client.robot_kwargs(deadline)
+        if cassette is not None:
+            kwargs["transport"] = cassette.robot_transport(kwargs["transport"])
+        return Robot(robot_user, robot_password, **kwargs)
+
+    return RobotRegistry(create)
+
+
+def _init_robot(conf: Config, env: str, robots: RobotRegistry) -> Robot | None:
     """Init Robot client with creds validation"""
     robot_user, robot_password = conf.hetzner_credentials.get_robot_credentials(env)
 
@@ -23,7 +41,7 @@ def _init_robot(conf: Config, env: str) -> Robot | None:
         )
         return None
 
-    return Robot(robot_user, robot_password)
+    return robots.get(robot_user, robot_password)
 
 
 def _get_cloud_token(conf: Config, env: str) -> str | None:
@@ -63,7 +81,7 @@ def _get_robot_server_details(
     server,
     server_env: str,
     hetzner_config: HetznerInventoryConfig,
-    vswitch_map: dict,
+    vswitches: VswitchIndex,
 ) -> dict:
     """Extract detailed information from a Robot server"""
     dc = server.datacenter.lower().replace("-", "")
@@ -71,7 +89,8 @@ def _get_robot_server_details(
     zone = server.datacenter[0:4].lower()
     
     # Get VLAN info
-    vlan_id = vswitch_map.get(server.ip, {}).get("vlan", "N/A")
+    vswitch = vswitches.vswitch_of(server.ip)
+    vlan_id = vswitch.vlan if vswitch is not None else "N/A"
     
     # Try to determine private IP (this is approximate without full inventory generation)
     priv_ip = "N/A"
@@ -135,6 +154,53 @@ def _get_cloud_server_details(
     }
 
 
+def _collect_servers(
+    conf: Config,
+    env: str,
+    deadline: Deadline,
+    cassette: Cassette | None = None,
+    store: FleetStore | None = None,
+    *,
+    robots: RobotRegistry,
+) -> list[dict]:
+    """Collect Robot and Cloud server details for one environment, reusing fresh data from `store` or `robots`"""
+    hetzner_conf = conf.hetzner_for_env(env)
+    all_servers = []
+
+    # Collect Robot servers
+    robot_client = _init_robot(conf, env, robots)
+    if robot_client:
+        if store is not None:
+            store.refresh_robot(env, robot_client, ("servers", "vswitches"))
+            snapshot = store.snapshot(env, robot_client)
+        else:
+            snapshot = robots.snapshot(robot_client, ("servers", "vswitches"))
+
+        all_servers_with_env = get_robot_servers_with_env(
+            robot_client, hetzner_conf, process_all_hosts=True, snapshot=snapshot
+        )
+
+        for _server_number, (server, server_env) in all_servers_with_env.items():
+            if server_env == env:
+                details = _get_robot_server_details(server, server_env, hetzner_conf, snapshot.vswitch_index)
+                all_servers.append(details)
+
+    # Collect Cloud servers
+    token = _get_cloud_token(conf, env)
+    if token:
+        client = cloud_client(token, conf.cloud_client, cassette)
+        if store is not None:
+            store.refresh_cloud(env, client, deadline)
+            hcloud_servers = store.cloud_servers(env, client)
+        else:
+            hcloud_servers = get_all_servers(client, deadline)
+
+        for server in hcloud_servers:
+            details = _get_cloud_server_details(server, env, hetzner_conf)
+            all_servers.append(details)
+    return all_servers
+
+
 cmd_list_app = typer.Typer(
     help="List servers from Hetzner Robot and Cloud.",
     add_completion=False,
@@ -164,6 +230,44 @@ def list_main(
             help="Environment to list servers for. If not specified, lists all configured environments.",
         ),
     ] = None,
+    *,
+    deadline_seconds: Annotated[
+        float | None,
+        typer.Option(
+            "--deadline",
+            help="Stop listing further environments once this many seconds have passed.",
+            min=0,
+        ),
+    ] = None,
+    record: Annotated[
+        Path | None,
+        typer.Option(
+            "--record",
+            help="Record all Robot and Cloud API responses to this cassette file. Credentials are not recorded.",
+            dir_okay=False,
+            resolve_path=True,
+        ),
+    ] = None,
+    replay: Annotated[
+        Path | None,
+        typer.Option(
+            "--replay",
+            help="Answer Robot and Cloud API requests from this cassette file instead of the network.",
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            readable=True,
+            resolve_path=True,
+        ),
+    ] = None,
+    replay_latency: Annotated[
+        float | None,
+        typer.Option("--replay-latency", help="Simulated latency in seconds for every replayed request.", min=0),
+    ] = None,
+    refresh: Annotated[
+        bool,
+        typer.Option("--refresh", help="Fetch everything again instead of using fresh data from the store."),
+    ] = False,
 ):
     """
     Lists servers from Hetzner Robot and Cloud with comprehensive details.
@@ -173,6 +277,16 @@ def list_main(
         return
 
     conf = config(path=str(config_path) if config_path else None)
+    try:
+        cassette = Cassette.from_options(record, replay, replay_latency)
+    except ValueError as e:
+        raise typer.BadParameter(str(e)) from e
+    if cassette is not None:
+        ctx.call_on_close(cassette.save)
+    store = None
+    if conf.store.path:
+        store = FleetStore(conf.store.path, max_age=0 if refresh else conf.store.max_age)
+        ctx.call_on_close(store.close)
     
     # Determine which environments to list
     if env:
@@ -182,40 +296,17 @@ def list_main(
         if not environments:
             typer.secho("No environments configured.", fg=typer.colors.YELLOW)
             return
-    
-    for current_env in environments:
-        hetzner_conf = conf.hetzner_for_env(current_env)
-        all_servers = []
-        
-        # Collect Robot servers
-        robot_client = _init_robot(conf, current_env)
-        if robot_client:
-            # Get vswitch mapping
-            vswitches = robot_client.vswitch.list()
-            vswitch_map = {}
-            for vswitch in vswitches.values():
-                for s in vswitch.server:
-                    vswitch_map[s["server_ip"]] = {"vlan": vswitch.vlan, "id": vswitch.id}
-            
-            all_servers_with_env = get_robot_servers_with_env(
-                robot_client, hetzner_conf, process_all_hosts=True
-            )
-            
-            for _server_number, (server, server_env) in all_servers_with_env.items():
-                if server_env == current_env:
-                    details = _get_robot_server_details(server, server_env, hetzner_conf, vswitch_map)
-                    all_servers.append(details)
-        
-        # Collect Cloud servers
-        token = _get_cloud_token(conf, current_env)
-        if token:
-            client = Client(token=token)
-            hcloud_servers = client.servers.get_all()
-            
-            for server in hcloud_servers:
-                details = _get_cloud_server_details(server, current_env, hetzner_conf)
-                all_servers.append(details)
-        
+
+    deadline = Deadline(deadline_seconds)
+    robots = _robot_registry(conf, deadline, cassette)
+    for index, current_env in enumerate(environments):
+        try:
+            all_servers = _collect_servers(conf, current_env, deadline, cassette, store, robots=robots)
+        except DeadlineExceeded as e:
+            skipped = ", ".join(environments[index:])
+            typer.secho(f"Warning: {e}. Skipped environments: {skipped}", fg=typer.colors.YELLOW, err=True)
+            break
+
         # Display combined table if we have any servers
         if all_servers:
             table = Table(
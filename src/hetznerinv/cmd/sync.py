@@ -3,11 +3,14 @@ from typing import Annotated, Any
 
 import typer
 import yaml
-from hcloud import Client
 from rich.live import Live
 from rich.table import Table
 
+from hetznerinv.cassette import Cassette
+from hetznerinv.cloud import cloud_client, get_all_servers
 from hetznerinv.config import Config, config
+from hetznerinv.hetzner import DeadlineExceeded
+from hetznerinv.hetzner.util.timeouts import Deadline
 
 
 def _get_cloud_token(conf: Config, env: str) -> str:
@@ -100,6 +103,19 @@ def _sync_server(server: Any, host_data: dict, update_names: bool, update_labels
     }
 
 
+def _skipped_row(server: Any, status: str) -> dict:
+    """Row data for a server that was left untouched."""
+    labels_str = ", ".join([f"{k}={v}" for k, v in server.labels.items()])
+    return {
+        "name_before": server.name,
+        "name_after": server.name,
+        "labels_before_str": labels_str,
+        "labels_after_str": labels_str,
+        "changes_str": "None",
+        "status": status,
+    }
+
+
 cmd_sync_app = typer.Typer(
     help="Sync inventory data (names, labels) to Hetzner Cloud.",
     add_completion=False,
@@ -150,6 +166,39 @@ def sync_main(
             help="Perform a dry run without making any changes to Hetzner Cloud.",
         ),
     ] = False,
+    deadline_seconds: Annotated[
+        float | None,
+        typer.Option(
+            "--deadline",
+            help="Skip the remaining servers once this many seconds have passed.",
+            min=0,
+        ),
+    ] = None,
+    record: Annotated[
+        Path | None,
+        typer.Option(
+            "--record",
+            help="Record all Robot and Cloud API responses to this cassette file. Credentials are not recorded.",
+            dir_okay=False,
+            resolve_path=True,
+        ),
+    ] = None,
+    replay: Annotated[
+        Path | None,
+        typer.Option(
+            "--replay",
+            help="Answer Robot and Cloud API requests from this cassette file instead of the network.",
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            readable=True,
+            resolve_path=True,
+        ),
+    ] = None,
+    replay_latency: Annotated[
+        float | None,
+        typer.Option("--replay-latency", help="Simulated latency in seconds for every replayed request.", min=0),
+    ] = None,
 ):
     """
     Syncs inventory data like server names and labels to Hetzner Cloud.
@@ -165,15 +214,26 @@ def sync_main(
         raise typer.Exit(code=1)
 
     conf = config(path=str(config_path) if config_path else None)
+    try:
+        cassette = Cassette.from_options(record, replay, replay_latency)
+    except ValueError as e:
+        raise typer.BadParameter(str(e)) from e
+    if cassette is not None:
+        ctx.call_on_close(cassette.save)
     token = _get_cloud_token(conf, env)
-    client = Client(token=token)
+    client = cloud_client(token, conf.cloud_client, cassette)
+    deadline = Deadline(deadline_seconds)
 
     typer.echo(f"Syncing inventory for environment: {env}")
 
     cloud_inventory_path = Path(f"inventory/{env}/cloud.yaml")
     hosts = _load_inv(cloud_inventory_path, "Cloud")
 
-    servers_by_id = {s.id: s for s in client.servers.get_all()}
+    try:
+        servers_by_id = {s.id: s for s in get_all_servers(client, deadline)}
+    except DeadlineExceeded as e:
+        typer.secho(f"Error: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1) from e
 
     table = Table(
         highlight=True,
@@ -206,7 +266,10 @@ def sync_main(
             )
             continue
 
-        row_data = _sync_server(server, host_data, update_names, update_labels, dry_run)
+        if deadline.expired:
+            row_data = _skipped_row(server, "[yellow]Skipped (deadline)[/yellow]")
+        else:
+            row_data = _sync_server(server, host_data, update_names, update_labels, dry_run)
 
         table.add_row(
             str(server_id),
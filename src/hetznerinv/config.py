@@ -7,6 +7,12 @@ from ant31box.config import BaseConfig, GConfig, GenericConfig, LoggingConfigSch
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from hetznerinv.hetzner.transport import ROBOT_URL, HTTPTransport
+from hetznerinv.hetzner.util.cache import DEFAULT_TTLS, ResponseCache
+from hetznerinv.hetzner.util.ratelimit import RateLimiter
+from hetznerinv.hetzner.util.retry import RetryPolicy
+from hetznerinv.hetzner.util.timeouts import Deadline, Timeout
+
 LOGGING_CONFIG: dict[str, Any] = LG
 LOGGING_CONFIG["loggers"].update({"root": {"handlers": ["default"], "level": "DEBUG", "propagate": True}})
 
@@ -85,6 +91,107 @@ class HetznerCredentials(BaseConfig):
         return self.hcloud_token if self.hcloud_token else None
 
 
+class RateLimitConfig(BaseConfig):
+    """A request budget for one Robot webservice endpoint."""
+
+    requests: int = Field(..., ge=1, description="Number of requests allowed per interval.")
+    interval: float = Field(default=3600.0, gt=0, description="Length of the interval in seconds.")
+
+
+class RobotClientConfig(BaseConfig):
+    """Tuning of the Hetzner Robot webservice client."""
+
+    base_url: str = Field(
+        default=ROBOT_URL, description="Base URL of the Robot webservice, e.g. a local stand-in for load tests."
+    )
+    pool_size: int = Field(
+        default=4, ge=1, description="Maximum number of concurrent keep-alive connections to the Robot webservice."
+    )
+    pool_idle_timeout: float = Field(
+        default=15.0, gt=0, description="Seconds after which an idle pooled connection is closed."
+    )
+    connect_timeout: float | None = Field(
+        default=10.0, gt=0, description="Seconds allowed for connecting to Robot, including the TLS handshake."
+    )
+    read_timeout: float | None = Field(
+        default=60.0, gt=0, description="Seconds allowed for a single read from a Robot connection."
+    )
+    total_timeout: float | None = Field(
+        default=120.0, gt=0, description="Seconds allowed for a whole Robot request, including the response body."
+    )
+
+    retry_attempts: int = Field(
+        default=4, ge=1, description="Attempts per request, including the first one, before a failure is reported."
+    )
+    retry_backoff: float = Field(
+        default=0.5, ge=0, description="Base delay in seconds before a retry, doubled on every further attempt."
+    )
+    retry_max_backoff: float = Field(default=8.0, ge=0, description="Upper bound in seconds for a single retry delay.")
+    retry_max_elapsed: float | None = Field(
+        default=60.0, gt=0, description="No more retries once this many seconds have passed since the first attempt."
+    )
+
+    rate_limits: dict[str, RateLimitConfig] = Field(
+        default_factory=dict,
+        description=(
+            "Request budgets per endpoint, keyed by endpoint ('/reset') or method and endpoint ('POST /reset'). "
+            "Limits reported by Robot in rate limit errors are adopted automatically."
+        ),
+    )
+    rate_limit_max_wait: float | None = Field(
+        default=60.0, ge=0, description="Fail instead of waiting longer than this many seconds for request budget."
+    )
+
+    cache_ttl: float | None = Field(
+        default=60.0, ge=0, description="Seconds GET responses are reused within one run, 0 or null disables caching."
+    )
+    cache_ttls: dict[str, float] = Field(
+        default_factory=lambda: dict(DEFAULT_TTLS),
+        description="TTLs in seconds per endpoint (e.g. '/server'), overriding cache_ttl. 0 disables caching.",
+    )
+    cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024, ge=0, description="Memory limit for cached responses, least recently used go first."
+    )
+
+    def robot_kwargs(self, deadline: Deadline | None = None) -> dict[str, Any]:
+        """Keyword arguments for constructing a `Robot` client from this configuration."""
+        return {
+            "transport": HTTPTransport(
+                self.base_url, pool_size=self.pool_size, pool_idle_timeout=self.pool_idle_timeout
+            ),
+            "timeout": Timeout(self.connect_timeout, self.read_timeout, self.total_timeout),
+            "deadline": deadline,
+            "retry": RetryPolicy(
+                max_attempts=self.retry_attempts,
+                backoff=self.retry_backoff,
+                max_backoff=self.retry_max_backoff,
+                max_elapsed=self.retry_max_elapsed,
+            ),
+            "rate_limiter": RateLimiter(
+                {key: (limit.requests, limit.interval) for key, limit in self.rate_limits.items()},
+                max_wait=self.rate_limit_max_wait,
+            ),
+            "cache": ResponseCache(self.cache_ttl, self.cache_ttls, self.cache_max_bytes) if self.cache_ttl else None,
+        }
+
+
+class CloudClientConfig(BaseConfig):
+    """Tuning of the Hetzner Cloud API client."""
+
+    connect_timeout: float | None = Field(default=10.0, gt=0, description="Seconds allowed for connecting.")
+    read_timeout: float | None = Field(default=60.0, gt=0, description="Seconds allowed for a single read.")
+
+
+class StoreConfig(BaseConfig):
+    """Local store of fetched Robot and Cloud state."""
+
+    path: str | None = Field(
+        default=None,
+        description="SQLite file keeping fetched Robot and Cloud state between runs, disabled if unset.",
+    )
+    max_age: float = Field(default=300.0, ge=0, description="Seconds stored data is used before it is fetched again.")
+
+
 class SubnetDetail(BaseConfig):
     """Defines the structure for an entry in cluster_subnets."""
 
@@ -236,6 +343,13 @@ class HetznerConfigSchema(BaseSettings):
     hetzner: HetznerInventoryConfig = Field(
         default_factory=HetznerInventoryConfig, description="Hetzner specific inventory generation settings."
     )
+    robot_client: RobotClientConfig = Field(
+        default_factory=RobotClientConfig, description="Hetzner Robot webservice client settings."
+    )
+    cloud_client: CloudClientConfig = Field(
+        default_factory=CloudClientConfig, description="Hetzner Cloud API client settings."
+    )
+    store: StoreConfig = Field(default_factory=StoreConfig, description="Local store of fetched Robot and Cloud state.")
 
 
 class Config(GenericConfig[HetznerConfigSchema]):
@@ -250,6 +364,18 @@ class Config(GenericConfig[HetznerConfigSchema]):
     def hetzner(self) -> HetznerInventoryConfig:
         return self.conf.hetzner
 
+    @property
+    def robot_client(self) -> RobotClientConfig:
+        return self.conf.robot_client
+
+    @property
+    def cloud_client(self) -> CloudClientConfig:
+        return self.conf.cloud_client
+
+    @property
+    def store(self) -> StoreConfig:
+        return self.conf.store
+
     def hetzner_for_env(self, env: str) -> HetznerInventoryConfig:
         """
         Returns a new config object with environment-specific overrides applied.
@@ -1,14 +1,19 @@
 import re
-from ipaddress import IPv4Address
 
 import yaml
-from hcloud import Client
+from hcloud.servers import BoundServer
 from rich import print
 from rich.live import Live
 from rich.table import Table
 
-from hetznerinv.config import HetznerInventoryConfig
+from hetznerinv.allocator import SubnetAllocator
+from hetznerinv.cassette import Cassette
+from hetznerinv.cloud import cloud_client, get_all_server_data
+from hetznerinv.config import CloudClientConfig, HetznerInventoryConfig
 from hetznerinv.hetzner.robot import Robot
+from hetznerinv.hetzner.snapshot import FleetSnapshot
+from hetznerinv.hetzner.util.timeouts import Deadline
+from hetznerinv.leases import LeaseStore
 
 
 def hosts_by_id(hosts: list) -> dict:
@@ -26,20 +31,21 @@ def _get_ssh_user(server_id: str | int, hetzner_config: HetznerInventoryConfig)
     return hetzner_config.ssh_user
 
 
-def get_robot_servers_with_env(robot: Robot, hetzner_config: HetznerInventoryConfig, process_all_hosts: bool) -> dict:
-    """Get all servers with their assigned environment."""
+def get_robot_servers_with_env(
+    robot: Robot | None,
+    hetzner_config: HetznerInventoryConfig,
+    process_all_hosts: bool,
+    *,
+    snapshot: FleetSnapshot | None = None,
+) -> dict:
+    """Get all servers with their assigned environment, from `snapshot` or a snapshot of servers and vSwitches."""
     servers_with_env = {}
-
-    # Build a map of server IP to vswitch ID for environment assignment
-    vswitches = robot.vswitch.list()
-    server_ip_to_vswitch_id = {}
-    for vswitch in vswitches.values():
-        for s in vswitch.server:
-            server_ip_to_vswitch_id[s["server_ip"]] = vswitch.id
+    if snapshot is None:
+        snapshot = robot.snapshot(include=("servers", "vswitches"))
 
     assignment_rules = hetzner_config.robot_env_assignment
 
-    for server in robot.servers:
+    for server in snapshot.servers:
         if server.ip is None:
             continue
 
@@ -54,9 +60,9 @@ def get_robot_servers_with_env(robot: Robot, hetzner_config: HetznerInventoryCon
         server_env = assignment_rules.default
 
         # by vswitch
-        vswitch_id = server_ip_to_vswitch_id.get(server.ip)
-        if vswitch_id and str(vswitch_id) in assignment_rules.by_vswitch:
-            server_env = assignment_rules.by_vswitch[str(vswitch_id)]
+        vswitch = snapshot.vswitch_of(server.ip)
+        if vswitch is not None and str(vswitch.id) in assignment_rules.by_vswitch:
+            server_env = assignment_rules.by_vswitch[str(vswitch.id)]
 
         # by server name regex
         if server.name:
@@ -99,55 +105,69 @@ def _get_product_info(server, hetzner_config: HetznerInventoryConfig) -> tuple[s
     return product, options
 
 
+def _subnet_allocators(
+    hetzner_config: HetznerInventoryConfig, hosts_init: dict, force: bool, leases: LeaseStore | None = None
+) -> dict:
+    """One allocator per cluster subnet, with the leased addresses and those kept from `hosts_init` reserved"""
+    allocators = {
+        key: SubnetAllocator(subnet.start, subnet.subnet) for key, subnet in hetzner_config.cluster_subnets.items()
+    }
+    if force:
+        return allocators
+    if leases is not None:
+        for lease in leases.leases():
+            if lease.subnet in allocators:
+                allocators[lease.subnet].reserve(lease.ip)
+    vlan_allocator = allocators.get(hetzner_config.vlan_id)
+    for host in hosts_init.values():
+        dc_allocator = allocators.get(host.get("server_info", {}).get("dc"))
+        for allocator in (vlan_allocator, dc_allocator):
+            if allocator is None:
+                continue
+            for key in ("ip", "ip_vlan"):
+                if host.get(key):
+                    allocator.reserve(host[key])
+    return allocators
+
+
+def _leased_address(
+    subnet: str, server_id: int, kept: str | None, *, allocators: dict, leases: LeaseStore | None, force: bool
+) -> str:
+    """The address of a server in `subnet`: its lease, else the `kept` one, else a new one, which is then leased"""
+    lease = None if leases is None or force else leases.get(subnet, server_id)
+    if lease is not None:
+        return lease.ip
+    ip = kept or allocators[subnet].allocate()
+    if leases is not None:
+        leases.acquire(subnet, server_id, ip)
+    return ip
+
+
 def _get_ip_addresses(
     server,
     name: str,
     dc: str,
-    vlan_id: int,
+    vlan_id: str,
     hetzner_config: HetznerInventoryConfig,
     hosts_init: dict,
-    privips: dict,
-    vlanips: dict,
+    allocators: dict,
     force: bool,
+    *,
+    leases: LeaseStore | None = None,
 ) -> tuple[str, str]:
     """Determine private and VLAN IP addresses for server"""
-    last_ipvlan = hetzner_config.cluster_subnets[vlan_id].start
-    dc_configured = dc in hetzner_config.cluster_subnets
-
+    preserved = {} if force else hosts_init.get(name, {})
+    kwargs = {"allocators": allocators, "leases": leases, "force": force}
+    vlan_ip = _leased_address(vlan_id, server.number, preserved.get("ip_vlan"), **kwargs)
     if (
-        dc_configured
+        dc in allocators
         and hetzner_config.cluster_subnets[dc].privlink
         and name not in hetzner_config.no_privlink_hostnames
     ):
-        priv_ip = hetzner_config.cluster_subnets[dc].start
+        priv_ip = _leased_address(dc, server.number, preserved.get("ip"), **kwargs)
     else:
-        priv_ip = last_ipvlan
-
-    if name in hosts_init and not force:
-        if "ip" in hosts_init[name] and hosts_init[name]["ip"]:
-            priv_ip = hosts_init[name]["ip"]
-        if "ip_vlan" in hosts_init[name] and hosts_init[name]["ip_vlan"]:
-            last_ipvlan = hosts_init[name]["ip_vlan"]
-
-    privips[priv_ip] = True
-    vlanips[last_ipvlan] = True
-
-    # Update subnet starts
-    if dc_configured:
-        last_privip = hetzner_config.cluster_subnets[dc].start
-        hetzner_config.cluster_subnets[dc].start = str(IPv4Address(last_privip) + 1)
-        while hetzner_config.cluster_subnets[dc].start in privips:
-            hetzner_config.cluster_subnets[dc].start = str(
-                IPv4Address(hetzner_config.cluster_subnets[dc].start) + 1
-            )
-
-    hetzner_config.cluster_subnets[vlan_id].start = str(IPv4Address(last_ipvlan) + 1)
-
-    while hetzner_config.cluster_subnets[vlan_id].start in vlanips:
-        current_ip = hetzner_config.cluster_subnets[vlan_id].start
-        hetzner_config.cluster_subnets[vlan_id].start = str(IPv4Address(current_ip) + 1)
-
-    return priv_ip, last_ipvlan
+        priv_ip = preserved.get("ip") or vlan_ip
+    return priv_ip, vlan_ip
 
 
 def _create_host_entry(
@@ -197,24 +217,30 @@ def _create_host_entry(
 
 
 def list_all_hosts(
-    robot: Robot,
+    robot: Robot | None,
     hetzner_config: HetznerInventoryConfig,
     hosts_init=None,
     force=False,
     process_all_hosts: bool = False,
     env: str = "production",
     verbose: bool = False,
+    *,
+    snapshot: FleetSnapshot | None = None,
+    leases: LeaseStore | None = None,
 ):
+    """
+    List the Robot servers of `env` as inventory hosts. With `leases`, servers keep the addresses leased to them and
+    only new servers are given addresses, which are leased to them from then on.
+    """
     if hosts_init is None:
         hosts_init = {}
 
     vlan_id = hetzner_config.vlan_id
     hosts = {}
     hids = hosts_by_id(list(hosts_init.values()))
-    privips = {}
-    vlanips = {}
+    allocators = _subnet_allocators(hetzner_config, hosts_init, force, leases)
 
-    all_servers_with_env = get_robot_servers_with_env(robot, hetzner_config, process_all_hosts)
+    all_servers_with_env = get_robot_servers_with_env(robot, hetzner_config, process_all_hosts, snapshot=snapshot)
 
     if verbose:
         verbose_table = Table(
@@ -267,7 +293,7 @@ def list_all_hosts(
         product, options = _get_product_info(server, hetzner_config)
         name = _get_server_name(server, hids, product, options)
         priv_ip, vlan_ip = _get_ip_addresses(
-            server, name, dc, vlan_id, hetzner_config, hosts_init, privips, vlanips, force
+            server, name, dc, vlan_id, hetzner_config, hosts_init, allocators, force, leases=leases
         )
 
         host = _create_host_entry(server, name, priv_ip, vlan_ip, product, options, hetzner_config)
@@ -367,18 +393,37 @@ Host {hostname_alias}
 
 
 def gen_robot(
-    robot: Robot,
+    robot: Robot | None,
     hetzner_config: HetznerInventoryConfig,
     hosts_inv=None,
     env="production",
     process_all_hosts: bool = False,
     verbose: bool = False,
+    *,
+    snapshot: FleetSnapshot | None = None,
+    leases: LeaseStore | None = None,
+    reclaim_leases: bool = False,
 ):
     if hosts_inv is None:
         hosts_inv = {}
+    if snapshot is None:
+        snapshot = robot.snapshot(include=("servers", "vswitches"))
     hosts = list_all_hosts(
-        robot, hetzner_config, hosts_inv, process_all_hosts=process_all_hosts, env=env, verbose=verbose
+        robot,
+        hetzner_config,
+        hosts_inv,
+        process_all_hosts=process_all_hosts,
+        env=env,
+        verbose=verbose,
+        snapshot=snapshot,
+        leases=leases,
     )
+    if leases is not None and reclaim_leases:
+        # Servers of other environments, ignored or skipped ones keep their leases; only servers Robot no longer
+        # lists lose them.
+        released = leases.reclaim(server.number for server in snapshot.servers)
+        for lease in released:
+            print(f"Released lease of {lease.ip} in {lease.subnet} held by server {lease.server_id}")
     inventory = ansible_hosts(hosts, "hetzner_robot")
     with open(f"inventory/{env}/hosts.yaml", "w") as f:
         f.write(yaml.dump(inventory))
@@ -541,9 +586,23 @@ def gen_cloud(
     env="production",
     force=False,
     process_all_hosts: bool = False,
+    *,
+    client_settings: CloudClientConfig | None = None,
+    deadline: Deadline | None = None,
+    cassette: Cassette | None = None,
+    server_data: list[dict] | None = None,
+    offline: bool = False,
 ):
-    client = Client(token=token)
-    hcloud_servers = client.servers.get_all()
+    """
+    Generate the Cloud inventory of `env`. The servers are listed through the API unless their `server_data` is
+    given, e.g. from a saved snapshot; when `offline`, they are not renamed or relabeled either.
+    """
+    if deadline is None:
+        deadline = Deadline()
+    client = cloud_client(token, client_settings, cassette)
+    if server_data is None:
+        server_data = get_all_server_data(client, deadline)
+    hcloud_servers = [BoundServer(client.servers, data) for data in server_data]
     hosts = {}
     hids = hosts_by_id(list(hosts_init.values()))
 
@@ -581,9 +640,16 @@ def gen_cloud(
         priv_ip = server.private_net[0].ip if server.private_net else None
         ipv4 = server.public_net.ipv4.ip
 
+        # Servers are renamed and relabeled in place: once the deadline is gone, stop before
+        # touching the next one and don't write a partial inventory.
+        if deadline.expired:
+            live.stop()
+            deadline.check("Updating Hetzner Cloud servers")
+
         # Prepare and update labels
         final_labels = _prep_cloud_labels(server, group, name, k8s_groups, hetzner_config)
-        _update_cloud_server(server, name, final_labels, hetzner_config)
+        if not offline:
+            _update_cloud_server(server, name, final_labels, hetzner_config)
 
         # Create host entry
         host = _create_cloud_host_entry(
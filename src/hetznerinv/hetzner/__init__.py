@@ -16,3 +16,15 @@ class ConnectError(Exception):
 
 class WebRobotError(RobotError):
     pass
+
+
+class RequestTimeout(RobotError):
+    pass
+
+
+class DeadlineExceeded(RequestTimeout):
+    pass
+
+
+class RateLimitExceeded(RobotError):
+    pass
@@ -0,0 +1,633 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+from . import ConnectError, ManualReboot, RequestTimeout, RobotError
+from .failover import Failover
+from .robot import basic_auth, check_response, encode_phpargs, parse_response, rate_limit_error
+from .server import _server_logger, _ServerLogger
+from .transport import ROBOT_URL, AsyncHTTPTransport
+from .util import addr
+from .util.codec import ACCEPT_ENCODING, TransferStats, decode_body
+from .util.pool import PoolTimeout
+from .util.ratelimit import RateLimiter, endpoint_of
+from .util.retry import RetryPolicy
+from .util.singleflight import AsyncSingleFlight
+from .util.timeouts import Deadline, Timeout
+from .vswitch import Vswitch
+
+__all__ = [
+    "AsyncFailoverManager",
+    "AsyncIpAddress",
+    "AsyncIpManager",
+    "AsyncReset",
+    "AsyncReverseDNS",
+    "AsyncReverseDNSManager",
+    "AsyncRobot",
+    "AsyncRobotConnection",
+    "AsyncServer",
+    "AsyncServerManager",
+    "AsyncSubnet",
+    "AsyncSubnetManager",
+    "AsyncVswitchManager",
+]
+
+
+class AsyncRobotConnection:
+    def __init__(
+        self,
+        user,
+        passwd,
+        *,
+        transport=None,
+        pool_size=4,
+        pool_idle_timeout=15.0,
+        timeout=None,
+        deadline=None,
+        retry=None,
+        rate_limiter=None,
+        cache=None,
+    ):
+        self.user = user
+        self.passwd = passwd
+        self.timeout = timeout if timeout is not None else Timeout()
+        if transport is None:
+            transport = AsyncHTTPTransport(
+                ROBOT_URL,
+                pool_size=pool_size,
+                pool_idle_timeout=pool_idle_timeout,
+                connect_timeout=self.timeout.connect,
+            )
+        self.transport = transport
+        self.deadline = deadline if deadline is not None else Deadline()
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.transfer_stats = TransferStats()
+        self.cache = cache
+        self.inflight = AsyncSingleFlight()
+        self.logger = logging.getLogger(f"Robot of {user}")
+
+    async def _send(self, method, path, data, headers):
+        self.deadline.check(f"{method} {path}")
+        timeout = Timeout(self.timeout.connect, self.timeout.read, self.deadline.cap(self.timeout.total))
+        try:
+            response = await self.transport.send(method.upper(), path, data, headers, timeout)
+        except (TimeoutError, PoolTimeout) as err:
+            self.deadline.check(f"{method} {path}")
+            raise RequestTimeout(f"{method} {path} timed out") from err
+        body = decode_body(response.body, response.getheader("Content-Encoding"))
+        self.transfer_stats.record(endpoint_of(path), len(response.body), len(body))
+        return response.status, body
+
+    async def _request(self, method, path, data, headers, idempotent=None):
+        """
+        Like _send(), retrying transient failures and respecting the rate
+        limiter, see RobotConnection._request().
+        """
+        retry = self.retry if self.retry.allows(method, idempotent) else RetryPolicy.never()
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            wait = self.rate_limiter.reserve(method, path, max_wait=self.deadline.remaining())
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                status, body = await self._send(method, path, data, headers)
+            except Exception as err:
+                delay = retry.next_delay(attempt, started, self.deadline) if retry.retryable_error(err) else None
+                if delay is None:
+                    raise
+                self.logger.debug("%s %s failed with %r, retrying in %.2f seconds.", method, path, err, delay)
+            else:
+                limit = rate_limit_error(status, body)
+                if limit is not None:
+                    limited = self.rate_limiter.exhausted(method, path, limit.get("max_request"), limit.get("interval"))
+                    if attempt >= self.retry.max_attempts:
+                        return status, body
+                    if limited:
+                        self.logger.debug("%s %s hit the rate limit, waiting for the budget to refill.", method, path)
+                        attempt += 1
+                        continue
+                    # Without a budget to wait for, back off like after other failures.
+                    delay = self.retry.next_delay(attempt, started, self.deadline)
+                    if delay is None:
+                        return status, body
+                    self.logger.debug("%s %s hit the rate limit, retrying in %.2f seconds.", method, path, delay)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                delay = retry.next_delay(attempt, started, self.deadline) if retry.retryable_status(status) else None
+                if delay is None:
+                    return status, body
+                self.logger.debug("%s %s returned status %d, retrying in %.2f seconds.", method, path, status, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _cached_request(self, method, path, data, headers, idempotent=None):
+        """
+        See RobotConnection._cached_request().
+        """
+        if method.upper() != "GET":
+            try:
+                return await self._request(method, path, data, headers, idempotent)
+            finally:
+                self.inflight.forget(path)
+                if self.cache is not None:
+                    self.cache.invalidate(path)
+        if self.cache is not None:
+            body = self.cache.get(path)
+            if body is not None:
+                self.logger.debug("Answering GET %s from the response cache.", path)
+                return 200, body
+        return await self.inflight.do(path, self._get, path, headers, idempotent)
+
+    async def _get(self, path, headers, idempotent):
+        # A change sent while this request is in flight invalidates the
+        # endpoint, and the response may predate it.
+        generation = self.cache.generation(path) if self.cache is not None else None
+        status, body = await self._request("GET", path, None, headers, idempotent)
+        if self.cache is not None and 200 <= status < 300:
+            self.cache.put(path, body, generation)
+        return status, body
+
+    async def request(self, method, path, data=None, allow_empty=False, idempotent=None):
+        if data is not None:
+            data = urlencode(encode_phpargs(data))
+
+        headers = {"Authorization": basic_auth(self.user, self.passwd), "Accept-Encoding": ACCEPT_ENCODING}
+
+        if data is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        self.logger.debug("Sending %s request to Robot at %s with data %r.", method, path, data)
+
+        status, body = await self._cached_request(method, path, data, headers, idempotent)
+        data = parse_response(status, body, allow_empty)
+        self.logger.debug("Got response from Robot with status %d and data %r.", status, data)
+        return check_response(status, data)
+
+    async def get(self, path):
+        return await self.request("GET", path)
+
+    async def post(self, path, data, idempotent=False):
+        return await self.request("POST", path, data, idempotent=idempotent)
+
+    async def put(self, path, data, idempotent=False):
+        return await self.request("PUT", path, data, idempotent=idempotent)
+
+    async def delete(self, path, data=None):
+        return await self.request("DELETE", path, data, allow_empty=True)
+
+    async def close(self):
+        await self.transport.close()
+
+
+async def _get_list(conn, path):
+    """
+    GET a collection, treating 404 as empty like the blocking managers do.
+    """
+    try:
+        return await conn.get(path)
+    except RobotError as err:
+        if err.status == 404:
+            return []
+        raise
+
+
+class AsyncReverseDNS:
+    def __init__(self, conn, ip=None, result=None):
+        self.conn = conn
+        self.ip = ip
+        self.ptr = None
+        if result is not None:
+            self._load(result)
+
+    def _load(self, result):
+        data = result["rdns"]
+        self.ip = data["ip"]
+        self.ptr = data["ptr"]
+
+    async def update_info(self, result=None):
+        if result is None:
+            try:
+                result = await self.conn.get(f"/rdns/{self.ip}")
+            except RobotError as err:
+                if err.status != 404:
+                    raise
+                self.ptr = None
+                return
+        self._load(result)
+
+    async def set(self, value):
+        await self.conn.post(f"/rdns/{self.ip}", {"ptr": value})
+
+    async def remove(self):
+        await self.conn.delete(f"/rdns/{self.ip}")
+
+    def __repr__(self):
+        return f"<ReverseDNS PTR: {self.ptr}>"
+
+
+class AsyncReverseDNSManager:
+    def __init__(self, conn, main_ip=None):
+        self.conn = conn
+        self.main_ip = main_ip
+
+    async def get(self, ip):
+        rdns = AsyncReverseDNS(self.conn, ip)
+        await rdns.update_info()
+        return rdns
+
+    async def list(self):
+        if self.main_ip is None:
+            url = "/rdns"
+        else:
+            data = urlencode({"server_ip": self.main_ip})
+            url = f"/rdns?{data}"
+        return [AsyncReverseDNS(self.conn, result=rdns) for rdns in await _get_list(self.conn, url)]
+
+    async def __aiter__(self):
+        for rdns in await self.list():
+            yield rdns
+
+
+class AsyncIpAddress:
+    def __init__(self, conn, result, subnet_ip=None):
+        self.conn = conn
+        self.subnet_ip = subnet_ip
+        self._load(result)
+
+    def _load(self, result):
+        if self.subnet_ip is not None:
+            data = dict(result["subnet"])
+            self._subnet_addr = data["ip"]
+            data["ip"] = self.subnet_ip
+            # Does not exist in subnets
+            data["separate_mac"] = None
+        else:
+            data = result["ip"]
+
+        self.ip = data["ip"]
+        self.server_ip = data["server_ip"]
+        self.locked = data["locked"]
+        self.separate_mac = data["separate_mac"]
+        self.traffic_warnings = data["traffic_warnings"]
+        self.traffic_hourly = data["traffic_hourly"]
+        self.traffic_daily = data["traffic_daily"]
+        self.traffic_monthly = data["traffic_monthly"]
+
+    @property
+    def rdns(self):
+        return AsyncReverseDNS(self.conn, self.ip)
+
+    async def update_info(self, result=None):
+        if result is None:
+            if self.subnet_ip is not None:
+                result = await self.conn.get(f"/subnet/{self._subnet_addr}")
+            else:
+                result = await self.conn.get(f"/ip/{self.ip}")
+        self._load(result)
+
+    def __repr__(self):
+        return f"<IpAddress {self.ip}>"
+
+
+class AsyncIpManager:
+    def __init__(self, conn, main_ip):
+        self.conn = conn
+        self.main_ip = main_ip
+
+    async def get(self, ip):
+        return AsyncIpAddress(self.conn, await self.conn.get(f"/ip/{ip}"))
+
+    async def list(self):
+        data = urlencode({"server_ip": self.main_ip})
+        return [AsyncIpAddress(self.conn, ip) for ip in await self.conn.get(f"/ip?{data}")]
+
+    async def __aiter__(self):
+        for ip in await self.list():
+            yield ip
+
+
+class AsyncSubnet:
+    def __init__(self, conn, result):
+        self.conn = conn
+        self._load(result)
+
+    def _load(self, result):
+        data = result["subnet"]
+
+        self.net_ip = data["ip"]
+        self.mask = data["mask"]
+        self.gateway = data["gateway"]
+        self.server_ip = data["server_ip"]
+        self.failover = data["failover"]
+        self.locked = data["locked"]
+        self.traffic_warnings = data["traffic_warnings"]
+        self.traffic_hourly = data["traffic_hourly"]
+        self.traffic_daily = data["traffic_daily"]
+        self.traffic_monthly = data["traffic_monthly"]
+
+        self.is_ipv6, self.numeric_net_ip = addr.parse_ipaddr(self.net_ip)
+        self.numeric_gateway = addr.parse_ipaddr(self.gateway, self.is_ipv6)
+        getrange = addr.get_ipv6_range if self.is_ipv6 else addr.get_ipv4_range
+        self.numeric_range = getrange(self.numeric_net_ip, self.mask)
+
+    async def update_info(self, result=None):
+        if result is None:
+            result = await self.conn.get(f"/subnet/{self.net_ip}")
+        self._load(result)
+
+    def get_ip_range(self):
+        convert = addr.ipv6_bin2addr if self.is_ipv6 else addr.ipv4_bin2addr
+        return convert(self.numeric_range[0]), convert(self.numeric_range[1])
+
+    def __contains__(self, ip):
+        numeric_addr = addr.parse_ipaddr(ip, self.is_ipv6)
+        return self.numeric_range[0] <= numeric_addr <= self.numeric_range[1]
+
+    async def get_ip(self, ip):
+        if ip not in self:
+            return None
+        return AsyncIpAddress(self.conn, await self.conn.get(f"/subnet/{self.net_ip}"), ip)
+
+    def __repr__(self):
+        return f"<Subnet {self.net_ip}/{self.mask} (Gateway: {self.gateway})>"
+
+
+class AsyncSubnetManager:
+    def __init__(self, conn, main_ip):
+        self.conn = conn
+        self.main_ip = main_ip
+
+    async def get(self, net_ip):
+        return AsyncSubnet(self.conn, await self.conn.get(f"/subnet/{net_ip}"))
+
+    async def list(self):
+        data = urlencode({"server_ip": self.main_ip})
+        return [AsyncSubnet(self.conn, net) for net in await _get_list(self.conn, f"/subnet?{data}")]
+
+    async def __aiter__(self):
+        for net in await self.list():
+            yield net
+
+
+class AsyncReset:
+    def __init__(self, server):
+        self.server = server
+        self.conn = server.conn
+        self._reset_types = None
+
+    async def _status(self):
+        data = await self.conn.get(f"/reset/{self.server.number}")
+        self._reset_types = data["reset"]["type"]
+        return data["reset"]
+
+    async def operating_status(self):
+        """
+        The current operating status of the server, never cached.
+        """
+        return (await self._status())["operating_status"]
+
+    async def is_running(self):
+        return {"running": True, "shut off": False}.get(await self.operating_status())
+
+    async def reset_types(self):
+        if self._reset_types is None:
+            await self._status()
+        return self._reset_types
+
+    async def check_ssh(self, port=22, timeout=5):
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(self.server.ip, port), timeout)
+        except (OSError, TimeoutError):
+            return False
+        writer.close()
+        return True
+
+    async def observed_reboot(self, patience=300, tries=None, manual=False):
+        """
+        See Reset.observed_reboot().
+        """
+        is_down = False
+
+        if tries is None:
+            tries = ["soft", "hard"]
+
+        for mode in tries:
+            self.server.logger.info("Trying to reboot using the %r method.", mode)
+            await self.reboot(mode)
+
+            start_time = time.monotonic()
+            self.server.logger.info("Waiting for machine to become available.")
+            while time.monotonic() <= start_time + patience:
+                is_up = await self.check_ssh()
+                await asyncio.sleep(1)
+
+                if is_up and is_down:
+                    self.server.logger.info("Machine just became available.")
+                    return
+                elif not is_down:
+                    is_down = not is_up
+            self.server.logger.info("Machine didn't come up after %d seconds.", patience)
+        if manual:
+            await self.reboot("manual")
+            raise ManualReboot("Issued a manual reboot because the server did not come back to life.")
+        raise ConnectError("Server keeps playing dead after reboot :-(")
+
+    async def reboot(self, mode="soft"):
+        modes = {
+            "manual": "man",
+            "hard": "hw",
+            "soft": "sw",
+            "power": "power",
+        }
+        modekey = modes.get(mode, modes["soft"])
+        return await self.conn.post(f"/reset/{self.server.number}", {"type": modekey})
+
+
+class AsyncServer:
+    def __init__(self, conn, result):
+        self.conn = conn
+        self._load(result)
+        self.reset = AsyncReset(self)
+        self.ips = AsyncIpManager(self.conn, self.ip)
+        self.subnets = AsyncSubnetManager(self.conn, self.ip)
+        self.rdns = AsyncReverseDNSManager(self.conn, self.ip)
+
+    @property
+    def logger(self):
+        return _ServerLogger(_server_logger, {"number": self.number})
+
+    def _load(self, result):
+        data = result["server"]
+
+        self.ip = data["server_ip"]
+        self.number = data["server_number"]
+        self.name = data["server_name"]
+        self.product = data["product"]
+        self.datacenter = data["dc"]
+        self.traffic = data["traffic"]
+        self.status = data["status"]
+        self.cancelled = data["cancelled"]
+        self.paid_until = datetime.strptime(data["paid_until"], "%Y-%m-%d")
+
+    async def update_info(self, result=None):
+        if result is None:
+            result = await self.conn.get(f"/server/{self.ip}")
+        self._load(result)
+
+    async def set_name(self, name):
+        self._load(await self.conn.post(f"/server/{self.ip}", {"server_name": name}))
+
+    def __repr__(self):
+        return f"<{self.ip} (#{self.number} {self.product})>"
+
+
+class AsyncServerManager:
+    def __init__(self, conn):
+        self.conn = conn
+        self._by_ip = None
+
+    async def get(self, ip):
+        return AsyncServer(self.conn, await self.conn.get(f"/server/{ip}"))
+
+    async def list(self):
+        servers = [AsyncServer(self.conn, s) for s in await self.conn.get("/server")]
+        self._by_ip = {server.ip: server for server in servers}
+        return servers
+
+    async def by_ip(self, ip):
+        """
+        Return the server with the given main IP address or None, from the
+        last listing or a new one if there is none yet.
+        """
+        if self._by_ip is None:
+            await self.list()
+        return self._by_ip.get(ip)
+
+    async def __aiter__(self):
+        for server in await self.list():
+            yield server
+
+
+class AsyncFailoverManager:
+    def __init__(self, conn, servers):
+        self.conn = conn
+        self.servers = servers
+
+    async def list(self):
+        failovers = {}
+        for ip in await _get_list(self.conn, "/failover"):
+            failover = Failover(ip.get("failover"))
+            failovers[failover.ip] = failover
+        return failovers
+
+    async def set(self, ip, new_destination):
+        failovers, servers = await asyncio.gather(self.list(), self.servers.list())
+        if ip not in failovers:
+            raise RobotError(f"Invalid IP address '{ip}'. Failover IP addresses are {failovers.keys()}")
+        failover = failovers.get(ip)
+        if new_destination == failover.active_server_ip:
+            raise RobotError(f"{new_destination} is already the active destination of failover IP {ip}")
+        available_dests = [s.ip for s in servers]
+        if new_destination not in available_dests:
+            raise RobotError(
+                f"Invalid destination '{new_destination}'. "
+                f"The destination is not in your server list: {available_dests}"
+            )
+        result = await self.conn.post(f"/failover/{ip}", {"active_server_ip": new_destination})
+        return Failover(result.get("failover"))
+
+
+class AsyncVswitchManager:
+    def __init__(self, conn, servers):
+        self.conn = conn
+        self.servers = servers
+
+    async def list(self):
+        """
+        Return all vSwitches keyed by ID. The details of the vSwitches are
+        fetched concurrently, limited by the size of the connection pool.
+        """
+        vswitches = await _get_list(self.conn, "/vswitch")
+        details = await asyncio.gather(*(self.conn.get("/vswitch/{}".format(v["id"])) for v in vswitches))
+        result = {}
+        for data in details:
+            vswitch = Vswitch(data)
+            result[vswitch.id] = vswitch
+        return result
+
+    async def add_servers(self, switch, servers):
+        ips = [s.ip for s in servers if s.ip is not None]
+        unknown = [ip for ip in ips if await self.servers.by_ip(ip) is None]
+        if unknown:
+            raise RobotError(f"Invalid servers {unknown}. They are not in your server list.")
+        return await self.conn.request("POST", f"/vswitch/{switch.id}/server", {"server": ips}, allow_empty=True)
+
+
+class AsyncRobot:
+    """
+    The asyncio counterpart of Robot. Use it as an async context manager or
+    call close() when done to shut down the pooled connections.
+    """
+
+    def __init__(
+        self,
+        user,
+        passwd,
+        *,
+        transport=None,
+        pool_size=4,
+        pool_idle_timeout=15.0,
+        timeout=None,
+        deadline=None,
+        retry=None,
+        rate_limiter=None,
+        cache=None,
+    ):
+        self.conn = AsyncRobotConnection(
+            user,
+            passwd,
+            transport=transport,
+            pool_size=pool_size,
+            pool_idle_timeout=pool_idle_timeout,
+            timeout=timeout,
+            deadline=deadline,
+            retry=retry,
+            rate_limiter=rate_limiter,
+            cache=cache,
+        )
+        self.servers = AsyncServerManager(self.conn)
+        self.rdns = AsyncReverseDNSManager(self.conn)
+        self.failover = AsyncFailoverManager(self.conn, self.servers)
+        self.vswitch = AsyncVswitchManager(self.conn, self.servers)
+
+    def remaining_budget(self, path, method="GET"):
+        """
+        See Robot.remaining_budget().
+        """
+        return self.conn.rate_limiter.remaining(method, path)
+
+    def transfer_stats(self):
+        """
+        See Robot.transfer_stats().
+        """
+        return self.conn.transfer_stats.stats()
+
+    def cache_stats(self):
+        """
+        See Robot.cache_stats().
+        """
+        return None if self.conn.cache is None else self.conn.cache.stats()
+
+    async def close(self):
+        await self.conn.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
@@ -44,8 +44,8 @@ class FailoverManager:
         failover = failovers.get(ip)
         if new_destination == failover.active_server_ip:
             raise RobotError(f"{new_destination} is already the active destination of failover IP {ip}")
-        available_dests = [s.ip for s in list(self.servers)]
-        if new_destination not in available_dests:
+        if self.servers.by_ip(new_destination) is None:
+            available_dests = [s.ip for s in self.servers]
             raise RobotError(
                 f"Invalid destination '{new_destination}'. "
                 f"The destination is not in your server list: {available_dests}"
@@ -0,0 +1,718 @@
+"""
+A local stand-in for the Robot webservice, serving a synthetic fleet.
+
+FakeRobot implements the endpoints used by this package on a local HTTP
+server, with configurable latency and error rates, so that clients can be
+tested and benchmarked without network access or a Robot account:
+
+    with FakeRobot(Fleet(servers=10000, vswitches=200), latency=0.02) as fake:
+        robot = fake.robot()
+        servers = list(robot.servers)
+
+It can also be run on its own, for example for the CLI with a robot_client
+base_url of "http://127.0.0.1:8080":
+
+    python -m hetznerinv.hetzner.fake --servers 10000 --vswitches 200 --port 8080
+"""
+
+import argparse
+import gzip
+import ipaddress
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from base64 import b64decode
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .robot import Robot
+from .transport import HTTPTransport
+
+__all__ = ["FakeRobot", "Fleet"]
+
+DATACENTERS = ["FSN1-DC14", "NBG1-DC3", "HEL1-DC2", "FSN1-DC8"]
+PRODUCTS = ["AX41-NVMe", "AX52", "AX102", "EX44", "SX65"]
+NAME_PREFIXES = ["prod-k8s", "prod-db", "staging-k8s", "dev", ""]
+RESET_TYPES = ["sw", "hw", "man"]
+
+# Addresses come from the benchmarking range 198.18.0.0/15 (RFC 2544) and
+# the IPv6 documentation prefix, so they can't clash with real servers.
+MAIN_IPS = ipaddress.IPv4Network("198.18.0.0/16")
+EXTRA_IPS = ipaddress.IPv4Network("198.19.0.0/18")
+FAILOVER_IPS = ipaddress.IPv4Network("198.19.64.0/18")
+SUBNET_IPS = ipaddress.IPv4Network("198.19.128.0/17")
+IPV6_NETS = ipaddress.IPv6Network("2001:db8::/32")
+
+ERROR_CODES = {
+    400: "INVALID_INPUT",
+    401: "UNAUTHORIZED",
+    404: "NOT_FOUND",
+    409: "CONFLICT",
+    500: "INTERNAL_ERROR",
+    503: "MAINTENANCE",
+}
+
+
+def _traffic():
+    return {"traffic_warnings": False, "traffic_hourly": 50, "traffic_daily": 50, "traffic_monthly": 8}
+
+
+class Fleet:
+    """
+    A synthetic Robot account with 'servers' dedicated servers spread over
+    'vswitches' vSwitches. Every server has a main IPv4 address and an IPv6
+    /64; every 'extra_ip_every'-th server an additional IPv4 address and
+    every 'subnet_every'-th one an IPv4 /29. The fleet is deterministic, the
+    same arguments always give the same servers.
+    """
+
+    def __init__(self, servers=100, vswitches=10, *, failovers=None, extra_ip_every=3, subnet_every=20):
+        if servers >= MAIN_IPS.num_addresses - 1:
+            raise ValueError(f"At most {MAIN_IPS.num_addresses - 2} servers are supported")
+        self.servers = {}
+        self.by_ip = {}
+        self.ips = {}
+        self.subnets = {}
+        self.rdns = {}
+        self.rescue = {}
+        self.vswitches = {}
+        self.failovers = {}
+
+        for index in range(servers):
+            self._add_server(index, extra_ip_every, subnet_every)
+        numbers = list(self.servers)
+        for index in range(vswitches):
+            self._add_vswitch(index, numbers[index::vswitches] if vswitches else [])
+        if failovers is None:
+            failovers = servers // 50
+        for index in range(min(failovers, servers)):
+            self._add_failover(index, numbers[(index * 7) % servers], numbers[(index * 7 + 1) % servers])
+
+    def _add_server(self, index, extra_ip_every, subnet_every):
+        number = 100000 + index
+        ip = str(MAIN_IPS[index + 1])
+        ipv6_net = str(IPV6_NETS.network_address + ((index + 1) << 64))
+        prefix = NAME_PREFIXES[index % len(NAME_PREFIXES)]
+        server = {
+            "server_ip": ip,
+            "server_ipv6_net": ipv6_net,
+            "server_number": number,
+            "server_name": f"{prefix}-{index:05d}" if prefix else "",
+            "product": PRODUCTS[index % len(PRODUCTS)],
+            "dc": DATACENTERS[index % len(DATACENTERS)],
+            "traffic": "unlimited",
+            "status": "ready",
+            "cancelled": False,
+            "paid_until": "2030-12-31",
+            "ip": [ip],
+            "subnet": [{"ip": ipv6_net, "mask": "64"}],
+        }
+        self.servers[number] = server
+        self.by_ip[ip] = number
+        self.rdns[ip] = f"static.{ip}.clients.example.net"
+        self.rescue[number] = {"active": False, "password": None, "authorized_key": []}
+
+        self.ips[ip] = {"ip": ip, "server_ip": ip, "server_number": number, "locked": False, "separate_mac": None}
+        if extra_ip_every and index % extra_ip_every == 0:
+            extra = str(EXTRA_IPS[index // extra_ip_every])
+            server["ip"].append(extra)
+            self.ips[extra] = {
+                "ip": extra,
+                "server_ip": ip,
+                "server_number": number,
+                "locked": False,
+                "separate_mac": "00:50:56:00:{:02x}:{:02x}".format(*divmod(index // extra_ip_every % 65536, 256)),
+            }
+
+        self._add_subnet(server, ipv6_net, 64, "fe80::1")
+        if subnet_every and index % subnet_every == 0:
+            net = ipaddress.IPv4Network((int(SUBNET_IPS.network_address) + index // subnet_every * 8, 29))
+            self._add_subnet(server, str(net.network_address), 29, str(net.network_address + 1))
+            server["subnet"].append({"ip": str(net.network_address), "mask": "29"})
+
+    def _add_subnet(self, server, ip, mask, gateway):
+        self.subnets[ip] = {
+            "ip": ip,
+            "mask": mask,
+            "gateway": gateway,
+            "server_ip": server["server_ip"],
+            "server_number": server["server_number"],
+            "failover": False,
+            "locked": False,
+        }
+
+    def _add_vswitch(self, index, numbers):
+        vswitch_id = 10000 + index
+        self.vswitches[vswitch_id] = {
+            "id": vswitch_id,
+            "name": f"vswitch-{index}",
+            "vlan": 4000 + index % 92,
+            "cancelled": False,
+            # Every tenth server isn't attached to any vSwitch.
+            "server": [number for position, number in enumerate(numbers) if position % 10 != 9],
+            "subnet": [],
+            "cloud_network": [],
+        }
+
+    def _add_failover(self, index, number, active_number):
+        ip = str(FAILOVER_IPS[index])
+        self.failovers[ip] = {"ip": ip, "netmask": "255.255.255.255", "server_number": number, "active": active_number}
+
+    def server(self, ref):
+        """
+        Return the server with the main IP or server number 'ref', or None.
+        """
+        number = self.by_ip.get(ref)
+        if number is None and ref.isdigit():
+            number = int(ref)
+        return self.servers.get(number)
+
+
+class RobotFault(Exception):
+    """
+    An error response of the fake webservice.
+    """
+
+    def __init__(self, status, message, *, code=None, invalid=None, missing=None):
+        super().__init__(message)
+        self.status = status
+        self.error = {"status": status, "code": code or ERROR_CODES.get(status, "ERROR"), "message": message}
+        if invalid is not None:
+            self.error["invalid"] = invalid
+        if missing is not None:
+            self.error["missing"] = missing
+
+
+def _not_found(what):
+    return RobotFault(404, f"{what.capitalize()} not found", code=f"{what.upper()}_NOT_FOUND")
+
+
+def parse_form(body):
+    """
+    Decode a form encoded request body as built by encode_phpargs(), turning
+    "key[0]=a&key[1]=b" into {"key": ["a", "b"]}.
+    """
+    form = {}
+    for key, value in parse_qsl(body or "", keep_blank_values=True):
+        name, bracket, _ = key.partition("[")
+        if bracket:
+            form.setdefault(name, []).append(value)
+        else:
+            form[name] = value
+    return form
+
+
+# (method, path pattern, FakeRobot method name)
+ROUTES = [
+    ("GET", r"/server", "list_servers"),
+    ("GET", r"/server/(?P<ref>[^/]+)", "get_server"),
+    ("POST", r"/server/(?P<ref>[^/]+)", "update_server"),
+    ("GET", r"/vswitch", "list_vswitches"),
+    ("POST", r"/vswitch", "create_vswitch"),
+    ("GET", r"/vswitch/(?P<vswitch_id>\d+)", "get_vswitch"),
+    ("POST", r"/vswitch/(?P<vswitch_id>\d+)", "update_vswitch"),
+    ("DELETE", r"/vswitch/(?P<vswitch_id>\d+)", "cancel_vswitch"),
+    ("POST", r"/vswitch/(?P<vswitch_id>\d+)/server", "add_vswitch_servers"),
+    ("DELETE", r"/vswitch/(?P<vswitch_id>\d+)/server", "remove_vswitch_servers"),
+    ("GET", r"/failover", "list_failovers"),
+    ("GET", r"/failover/(?P<ip>[^/]+)", "get_failover"),
+    ("POST", r"/failover/(?P<ip>[^/]+)", "route_failover"),
+    ("GET", r"/rdns", "list_rdns"),
+    ("GET", r"/rdns/(?P<ip>[^/]+)", "get_rdns"),
+    ("POST", r"/rdns/(?P<ip>[^/]+)", "set_rdns"),
+    ("PUT", r"/rdns/(?P<ip>[^/]+)", "set_rdns"),
+    ("DELETE", r"/rdns/(?P<ip>[^/]+)", "delete_rdns"),
+    ("GET", r"/ip", "list_ips"),
+    ("GET", r"/ip/(?P<ip>[^/]+)", "get_ip"),
+    ("GET", r"/subnet", "list_subnets"),
+    ("GET", r"/subnet/(?P<ip>[^/]+)", "get_subnet"),
+    ("GET", r"/reset", "list_resets"),
+    ("GET", r"/reset/(?P<ref>[^/]+)", "get_reset"),
+    ("POST", r"/reset/(?P<ref>[^/]+)", "reset_server"),
+    ("GET", r"/boot/(?P<ref>[^/]+)/rescue", "get_rescue"),
+    ("POST", r"/boot/(?P<ref>[^/]+)/rescue", "activate_rescue"),
+    ("DELETE", r"/boot/(?P<ref>[^/]+)/rescue", "deactivate_rescue"),
+]
+COMPILED_ROUTES = [(method, re.compile(pattern + "/?"), pattern, name) for method, pattern, name in ROUTES]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, don't let Nagle's algorithm
+    # hold back the body until the client acknowledges the headers.
+    disable_nagle_algorithm = True
+
+    def _dispatch(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else None
+        status, data, headers = self.server.fake.handle(self.command, self.path, self.headers, body)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeRobot:
+    """
+    Serves 'fleet' (a Fleet, by default a small one) like the Robot webservice
+    does on http://'host':'port', by default on a free local port.
+
+    Every request is delayed by 'latency' seconds plus up to 'jitter' seconds
+    and fails with 'error_status' at the given 'error_rate' (between 0 and 1)
+    before it is looked at. If 'credentials' (a (user, password) tuple) are
+    set, requests with other credentials are rejected. Responses are gzip
+    compressed if the client accepts that, like Robot does.
+
+    The requests served so far are counted per route, for example
+    fake.requests["GET /vswitch/{vswitch_id}"].
+    """
+
+    def __init__(
+        self,
+        fleet=None,
+        *,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        error_status=503,
+        credentials=None,
+        seed=None,
+    ):
+        self.fleet = Fleet() if fleet is None else fleet
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.credentials = credentials
+        self.requests = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, name="fake-robot", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def robot(self, user="robot", passwd="secret", *, pool_size=4, **kwargs):
+        """
+        Return a Robot client talking to this server. Other keyword arguments
+        are passed on to Robot.
+        """
+        return Robot(user, passwd, transport=HTTPTransport(self.url, pool_size=pool_size), **kwargs)
+
+    def handle(self, method, path, headers, body=None):
+        """
+        Answer a request and return a tuple of the status, the response body
+        and a list of response headers.
+        """
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            if self.error_rate and self._random.random() < self.error_rate:
+                raise RobotFault(self.error_status, "Injected failure")
+            self._check_auth(headers.get("Authorization"))
+            status, data = self._route(method, path, body)
+        except RobotFault as fault:
+            status, data = fault.status, self._encode({"error": fault.error})
+        response_headers = [("Content-Type", "application/json")]
+        if data and "gzip" in (headers.get("Accept-Encoding") or ""):
+            data = self._compress(method, path, data)
+            response_headers.append(("Content-Encoding", "gzip"))
+        return status, data, response_headers
+
+    def _check_auth(self, authorization):
+        if self.credentials is None:
+            return
+        scheme, _, encoded = (authorization or "").partition(" ")
+        if scheme != "Basic" or tuple(b64decode(encoded).decode("utf-8").split(":", 1)) != tuple(self.credentials):
+            raise RobotFault(401, "Unauthorized")
+
+    def _route(self, method, path, body):
+        parts = urlsplit(path)
+        query = dict(parse_qsl(parts.query))
+        for route_method, regex, pattern, name in COMPILED_ROUTES:
+            match = regex.fullmatch(parts.path)
+            if match is None or route_method != method:
+                continue
+            route = method + " " + re.sub(r"\(\?P<(\w+)>[^)]*\)", r"{\1}", pattern)
+            args = {key: unquote(value) for key, value in match.groupdict().items()}
+            with self._lock:
+                self.requests[route] += 1
+                if method == "GET":
+                    cached = self._cache.get(path)
+                    if cached is None:
+                        cached = self._cache[path] = (200, self._encode(getattr(self, name)(query, **args)))
+                    return cached
+                self._cache.clear()
+                return getattr(self, name)(parse_form(body), **args)
+        raise RobotFault(404, f"No route for {method} {parts.path}")
+
+    @staticmethod
+    def _encode(data):
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    def _compress(self, method, path, data):
+        """
+        Gzip 'data', reusing the compressed body of an unchanged GET response.
+        """
+        with self._lock:
+            cached = self._cache.get(("gzip", path)) if method == "GET" else None
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        compressed = gzip.compress(data, compresslevel=1)
+        if method == "GET":
+            with self._lock:
+                self._cache[("gzip", path)] = (data, compressed)
+        return compressed
+
+    def _server(self, ref):
+        server = self.fleet.server(ref)
+        if server is None:
+            raise _not_found("server")
+        return server
+
+    @staticmethod
+    def _required(form, *names):
+        missing = [name for name in names if name not in form]
+        if missing:
+            raise RobotFault(400, "Invalid input parameters", missing=missing)
+
+    def _filtered(self, records, query, what):
+        server_ip = query.get("server_ip")
+        if server_ip is not None:
+            records = [record for record in records if record["server_ip"] == server_ip]
+        if not records:
+            raise _not_found(what)
+        return records
+
+    # Servers
+
+    def list_servers(self, query):
+        return [{"server": dict(server)} for server in self.fleet.servers.values()]
+
+    def _server_details(self, server):
+        details = dict(server)
+        details.update(
+            reset=True,
+            rescue=True,
+            vnc=True,
+            windows=False,
+            plesk=False,
+            cpanel=False,
+            wol=True,
+            hot_swap=False,
+            linked_storagebox=None,
+        )
+        return {"server": details}
+
+    def get_server(self, query, ref):
+        return self._server_details(self._server(ref))
+
+    def update_server(self, form, ref):
+        server = self._server(ref)
+        if "server_name" in form:
+            server["server_name"] = form["server_name"]
+        return 200, self._encode(self._server_details(server))
+
+    # vSwitches
+
+    def _vswitch(self, vswitch_id):
+        vswitch = self.fleet.vswitches.get(int(vswitch_id))
+        if vswitch is None:
+            raise _not_found("vswitch")
+        return vswitch
+
+    def _vswitch_server(self, number):
+        server = self.fleet.servers[number]
+        return {
+            "server_ip": server["server_ip"],
+            "server_ipv6_net": server["server_ipv6_net"],
+            "server_number": number,
+            "status": "ready",
+        }
+
+    def list_vswitches(self, query):
+        return [
+            {key: vswitch[key] for key in ("id", "name", "vlan", "cancelled")}
+            for vswitch in self.fleet.vswitches.values()
+        ]
+
+    def get_vswitch(self, query, vswitch_id):
+        vswitch = dict(self._vswitch(vswitch_id))
+        vswitch["server"] = [self._vswitch_server(number) for number in vswitch["server"]]
+        return vswitch
+
+    def create_vswitch(self, form):
+        self._required(form, "name", "vlan")
+        vswitch_id = max(self.fleet.vswitches, default=9999) + 1
+        self.fleet.vswitches[vswitch_id] = {
+            "id": vswitch_id,
+            "name": form["name"],
+            "vlan": int(form["vlan"]),
+            "cancelled": False,
+            "server": [],
+            "subnet": [],
+            "cloud_network": [],
+        }
+        return 201, self._encode(self.get_vswitch({}, vswitch_id))
+
+    def update_vswitch(self, form, vswitch_id):
+        vswitch = self._vswitch(vswitch_id)
+        if "name" in form:
+            vswitch["name"] = form["name"]
+        if "vlan" in form:
+            vswitch["vlan"] = int(form["vlan"])
+        return 201, b""
+
+    def cancel_vswitch(self, form, vswitch_id):
+        self._vswitch(vswitch_id)["cancelled"] = True
+        return 200, b""
+
+    def _servers_in_form(self, form):
+        self._required(form, "server")
+        refs = form["server"] if isinstance(form["server"], list) else [form["server"]]
+        servers = [self.fleet.server(ref) for ref in refs]
+        invalid = [ref for ref, server in zip(refs, servers, strict=True) if server is None]
+        if invalid:
+            raise RobotFault(400, "Invalid input parameters", invalid=["server"])
+        return [server["server_number"] for server in servers]
+
+    def add_vswitch_servers(self, form, vswitch_id):
+        vswitch = self._vswitch(vswitch_id)
+        for number in self._servers_in_form(form):
+            if number not in vswitch["server"]:
+                vswitch["server"].append(number)
+        return 201, b""
+
+    def remove_vswitch_servers(self, form, vswitch_id):
+        vswitch = self._vswitch(vswitch_id)
+        numbers = set(self._servers_in_form(form))
+        vswitch["server"] = [number for number in vswitch["server"] if number not in numbers]
+        return 200, b""
+
+    # Failover IPs
+
+    def _failover_record(self, failover):
+        server = self.fleet.servers[failover["server_number"]]
+        active = self.fleet.servers.get(failover["active"])
+        return {
+            "failover": {
+                "ip": failover["ip"],
+                "netmask": failover["netmask"],
+                "server_ip": server["server_ip"],
+                "server_ipv6_net": server["server_ipv6_net"],
+                "server_number": server["server_number"],
+                "active_server_ip": active["server_ip"] if active is not None else None,
+            }
+        }
+
+    def _failover(self, ip):
+        failover = self.fleet.failovers.get(ip)
+        if failover is None:
+            raise _not_found("failover")
+        return failover
+
+    def list_failovers(self, query):
+        if not self.fleet.failovers:
+            raise _not_found("failover")
+        return [self._failover_record(failover) for failover in self.fleet.failovers.values()]
+
+    def get_failover(self, query, ip):
+        return self._failover_record(self._failover(ip))
+
+    def route_failover(self, form, ip):
+        failover = self._failover(ip)
+        self._required(form, "active_server_ip")
+        server = self.fleet.server(form["active_server_ip"])
+        if server is None:
+            raise RobotFault(400, "Invalid input parameters", invalid=["active_server_ip"])
+        if server["server_number"] == failover["active"]:
+            raise RobotFault(409, "The failover IP is already routed to this server", code="FAILOVER_ALREADY_ROUTED")
+        failover["active"] = server["server_number"]
+        return 200, self._encode(self._failover_record(failover))
+
+    # Reverse DNS
+
+    def _rdns_record(self, ip):
+        return {"rdns": {"ip": ip, "ptr": self.fleet.rdns[ip]}}
+
+    def list_rdns(self, query):
+        ips = list(self.fleet.rdns)
+        server_ip = query.get("server_ip")
+        if server_ip is not None:
+            server = self._server(server_ip)
+            ips = [ip for ip in ips if ip in server["ip"]]
+        if not ips:
+            raise _not_found("rdns")
+        return [self._rdns_record(ip) for ip in ips]
+
+    def get_rdns(self, query, ip):
+        if ip not in self.fleet.rdns:
+            raise _not_found("rdns")
+        return self._rdns_record(ip)
+
+    def set_rdns(self, form, ip):
+        if ip not in self.fleet.ips:
+            raise _not_found("ip")
+        self._required(form, "ptr")
+        created = ip not in self.fleet.rdns
+        self.fleet.rdns[ip] = form["ptr"]
+        return 201 if created else 200, self._encode(self._rdns_record(ip))
+
+    def delete_rdns(self, form, ip):
+        if self.fleet.rdns.pop(ip, None) is None:
+            raise _not_found("rdns")
+        return 200, b""
+
+    # IP addresses and subnets
+
+    def list_ips(self, query):
+        records = self._filtered(list(self.fleet.ips.values()), query, "ip")
+        return [{"ip": {**record, **_traffic()}} for record in records]
+
+    def get_ip(self, query, ip):
+        record = self.fleet.ips.get(ip)
+        if record is None:
+            raise _not_found("ip")
+        return {"ip": {**record, **_traffic()}}
+
+    def list_subnets(self, query):
+        records = self._filtered(list(self.fleet.subnets.values()), query, "subnet")
+        return [{"subnet": {**record, **_traffic()}} for record in records]
+
+    def get_subnet(self, query, ip):
+        record = self.fleet.subnets.get(ip)
+        if record is None:
+            raise _not_found("subnet")
+        return {"subnet": {**record, **_traffic()}}
+
+    # Reset and rescue system
+
+    def _reset_record(self, server):
+        return {
+            "server_ip": server["server_ip"],
+            "server_ipv6_net": server["server_ipv6_net"],
+            "server_number": server["server_number"],
+            "type": list(RESET_TYPES),
+        }
+
+    def list_resets(self, query):
+        return [{"reset": self._reset_record(server)} for server in self.fleet.servers.values()]
+
+    def get_reset(self, query, ref):
+        return {"reset": {**self._reset_record(self._server(ref)), "operating_status": "running"}}
+
+    def reset_server(self, form, ref):
+        server = self._server(ref)
+        self._required(form, "type")
+        if form["type"] not in RESET_TYPES:
+            raise RobotFault(400, "Invalid input parameters", invalid=["type"])
+        return 200, self._encode({"reset": {"server_ip": server["server_ip"], "type": form["type"]}})
+
+    def _rescue_record(self, server, os=None, arch=None):
+        state = self.fleet.rescue[server["server_number"]]
+        return {
+            "rescue": {
+                "server_ip": server["server_ip"],
+                "server_ipv6_net": server["server_ipv6_net"],
+                "server_number": server["server_number"],
+                "os": os if os is not None else ["linux", "vkvm"],
+                "arch": arch if arch is not None else [64],
+                "active": state["active"],
+                "password": state["password"],
+                "authorized_key": state["authorized_key"],
+                "host_key": [],
+            }
+        }
+
+    def get_rescue(self, query, ref):
+        return self._rescue_record(self._server(ref))
+
+    def activate_rescue(self, form, ref):
+        server = self._server(ref)
+        self._required(form, "os")
+        state = self.fleet.rescue[server["server_number"]]
+        state.update(active=True, password=secrets.token_urlsafe(12), authorized_key=form.get("authorized_key", []))
+        return 200, self._encode(self._rescue_record(server, form["os"], int(form.get("arch", 64))))
+
+    def deactivate_rescue(self, form, ref):
+        server = self._server(ref)
+        self.fleet.rescue[server["server_number"]].update(active=False, password=None, authorized_key=[])
+        return 200, self._encode(self._rescue_record(server))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a synthetic fleet like the Robot webservice does.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--servers", type=int, default=1000)
+    parser.add_argument("--vswitches", type=int, default=20)
+    parser.add_argument("--failovers", type=int, default=None)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many seconds are added randomly.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail.")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    fleet = Fleet(args.servers, args.vswitches, failovers=args.failovers)
+    fake = FakeRobot(
+        fleet,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    print(f"Serving {len(fleet.servers)} servers and {len(fleet.vswitches)} vSwitches on {fake.url}")
+    try:
+        fake._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import threading
+
+from .robot import Robot
+
+__all__ = ["RobotRegistry"]
+
+
+class RobotRegistry:
+    """
+    Hands out one Robot per pair of credentials, so that environments
+    belonging to the same Robot account share its connections, rate limit
+    budget, response cache and snapshots.
+
+    New clients are created by calling 'factory' with the user and password,
+    by default the Robot class with default settings.
+    """
+
+    def __init__(self, factory=Robot):
+        self.factory = factory
+        self._robots = {}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def get(self, user, passwd):
+        """
+        Return the Robot for the given credentials, creating it if needed.
+        """
+        with self._lock:
+            robot = self._robots.get((user, passwd))
+            if robot is None:
+                robot = self._robots[(user, passwd)] = self.factory(user, passwd)
+            return robot
+
+    def snapshot(self, robot, include):
+        """
+        Return a FleetSnapshot of the resources named in 'include' taken
+        with 'robot', one of the clients of this registry. It is only taken
+        the first time it is asked for.
+        """
+        key = (id(robot), frozenset(include))
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            snapshot = self._snapshots[key] = robot.snapshot(include=include)
+        return snapshot
+
+    def __len__(self):
+        return len(self._robots)
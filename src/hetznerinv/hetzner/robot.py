@@ -1,49 +1,190 @@
 import functools
-import json
 import logging
 import re
+import time
 from base64 import b64encode
 
-try:
-    from httplib import BadStatusLine, ResponseNotReady
-except ImportError:
-    from http.client import BadStatusLine, ResponseNotReady
-
 try:
     from urllib import urlencode
 except ImportError:
     from urllib.parse import urlencode
 
-from . import RobotError, WebRobotError
+from . import RateLimitExceeded, RequestTimeout, RobotError, WebRobotError
 from .failover import FailoverManager
 from .rdns import ReverseDNSManager
-from .server import Server
-from .util.http import ValidatedHTTPSConnection
-from .vswitch import VswitchManager
-
-ROBOT_HOST = "robot-ws.your-server.de"
-ROBOT_WEBHOST = "robot.hetzner.com"
-ROBOT_LOGINHOST = "accounts.hetzner.com"
+from .server import AccountIpManager, AccountSubnetManager, Server
+from .snapshot import RESOURCES as SNAPSHOT_RESOURCES
+from .snapshot import FleetSnapshot
+from .transport import (
+    ROBOT_LOGIN_URL,
+    ROBOT_URL,
+    ROBOT_WEB_URL,
+    HTTPTransport,
+    _min_timeout,
+)
+from .util.codec import ACCEPT_ENCODING, TransferStats, decode_body, loads
+from .util.pool import PoolTimeout
+from .util.ratelimit import RateLimiter, endpoint_of
+from .util.retry import RetryPolicy
+from .util.singleflight import SingleFlight
+from .util.timeouts import Deadline, Timeout
+from .vswitch import VswitchIndex, VswitchManager
 
 RE_CSRF_TOKEN = re.compile(r'<input[^>]*?name="_csrf_token"[^>]*?value="([^">]+)"')
 
 __all__ = ["Robot", "RobotConnection", "RobotWebInterface", "ServerManager"]
 
 
+def encode_phpargs(node, path=None):
+    """
+    Encode the given 'node' in a way PHP recognizes.
+
+    See https://php.net/manual/function.http-build-query.php for a
+    description of the format.
+
+    >>> enc = lambda arg: sorted(encode_phpargs(arg).items())
+    >>> enc({'foo': [1, 2, 3]})
+    [('foo[0]', 1), ('foo[1]', 2), ('foo[2]', 3)]
+    >>> enc(['a', 'b', 'c'])
+    [('0', 'a'), ('1', 'b'), ('2', 'c')]
+    >>> enc({'a': {'b': [1, 2, 3], 'c': 'd'}})
+    [('a[b][0]', 1), ('a[b][1]', 2), ('a[b][2]', 3), ('a[c]', 'd')]
+    >>> enc({})
+    []
+    >>> enc({'a': {'b': {'c': {}}}})
+    []
+    >>> enc({'a': [1, 2, 3], 'b': {'c': 4}})
+    [('a[0]', 1), ('a[1]', 2), ('a[2]', 3), ('b[c]', 4)]
+    """
+    if path is None:
+        path = []
+    if isinstance(node, list):
+        enum = enumerate(node)
+    elif isinstance(node, dict):
+        enum = node.items()
+    elif len(path) == 0:
+        return node
+    else:
+        # TODO: Implement escaping of keys.
+        flatkey = ("[" + str(x) + "]" for x in path[1:])
+        return {str(path[0]) + "".join(flatkey): node}
+
+    encoded = [encode_phpargs(v, [*path, k]) for k, v in enum]
+    return functools.reduce(lambda a, b: a.update(b) or a, encoded, {})
+
+
+def basic_auth(user, passwd):
+    """
+    Return the value of the Authorization header for the given credentials.
+    """
+    return "Basic {}".format(b64encode(f"{user}:{passwd}".encode("ascii")).decode("ascii"))
+
+
+def parse_response(status, body, allow_empty=False):
+    """
+    Decode the JSON body of a Robot webservice response. If 'allow_empty' is
+    set, the body is ignored and None is returned.
+    """
+    if len(body) == 0 and not allow_empty:
+        msg = "Empty response, status {0}."
+        raise RobotError(msg.format(status), status)
+    elif not allow_empty:
+        try:
+            return loads(body)
+        except ValueError as err:
+            msg = "Response is not JSON (status {0}): {1}"
+            raise RobotError(msg.format(status, repr(body.decode("utf-8", "replace")))) from err
+    return None
+
+
+def rate_limit_error(status, body):
+    """
+    Return the error reported by Robot if a request was rejected because of
+    the rate limit of its endpoint, otherwise None.
+    """
+    if status != 403:
+        return None
+    try:
+        data = loads(body)
+    except ValueError:
+        return None
+    error = data.get("error") if isinstance(data, dict) else None
+    if isinstance(error, dict) and error.get("code") == "RATE_LIMIT_EXCEEDED":
+        return error
+    return None
+
+
+def check_response(status, data):
+    """
+    Return the decoded response 'data' if 'status' indicates success,
+    otherwise raise a RobotError describing the error reported by Robot.
+    """
+    if 200 <= status < 300:
+        return data
+
+    error = data.get("error", None) if isinstance(data, dict) else None
+    if error is None:
+        raise RobotError(f"Unknown error: {data}", status)
+
+    err = "{} - {}".format(error["status"], error["message"])
+    missing = error.get("missing", [])
+    invalid = error.get("invalid", [])
+    fields = []
+    if missing is not None:
+        fields += missing
+    if invalid is not None:
+        fields += invalid
+    if len(fields) > 0:
+        err += ", fields: {}".format(", ".join(fields))
+    if error.get("code") == "RATE_LIMIT_EXCEEDED":
+        raise RateLimitExceeded(err, status)
+    raise RobotError(err, status)
+
+
 class RobotWebInterface:
     """
     This is for scraping the web interface and can be used to implement
     features that are not yet available in the official API.
     """
 
-    def __init__(self, user=None, passwd=None):
+    def __init__(
+        self,
+        user=None,
+        passwd=None,
+        timeout=None,
+        deadline=None,
+        retry=None,
+        *,
+        web_transport=None,
+        login_transport=None,
+    ):
+        self.web = web_transport if web_transport is not None else HTTPTransport(ROBOT_WEB_URL)
+        self.login_site = login_transport if login_transport is not None else HTTPTransport(ROBOT_LOGIN_URL)
         self.conn = None
         self.session_cookie = None
         self.user = user
         self.passwd = passwd
+        self.timeout = timeout if timeout is not None else Timeout()
+        self.deadline = deadline if deadline is not None else Deadline()
+        self.retry = retry if retry is not None else RetryPolicy()
         self.logged_in = False
         self.logger = logging.getLogger(f"Robot scraper for {user}")
 
+    def _new_connection(self, transport):
+        """
+        Create a connection to the host of 'transport' using the configured
+        timeouts.
+
+        Responses are handed to the caller unread, so the total timeout can't
+        be enforced while reading them. Instead, every socket operation is
+        limited to the total timeout and the remaining deadline.
+        """
+        self.deadline.check(f"Request to {transport.base_url}")
+        read = self.deadline.cap(_min_timeout(self.timeout.read, self.timeout.total))
+        conn = transport.new_connection()
+        conn.set_timeouts(self.deadline.cap(self.timeout.connect), read)
+        return conn
+
     def _parse_cookies(self, response):
         """
         Return a dictionary consisting of the cookies from the given response.
@@ -84,24 +225,24 @@ class RobotWebInterface:
             self.conn.close()
             self.conn = None
         if self.conn is None:
-            self.conn = ValidatedHTTPSConnection(ROBOT_WEBHOST)
+            self.conn = self._new_connection(self.web)
 
     def _get_auth_url(self):
         """Get the OAuth authentication URL from Robot."""
         self.logger.debug("Visiting Robot web frontend for the first time.")
         auth_url = self.request("/", xhr=False).getheader("location")
 
-        if not auth_url.startswith("https://" + ROBOT_LOGINHOST + "/"):
-            msg = "https://{0}/ does not redirect to https://{1}/ but instead redirects to: {2}"
-            raise WebRobotError(msg.format(ROBOT_WEBHOST, ROBOT_LOGINHOST, auth_url))
+        if self.login_site.path_of(auth_url) is None:
+            msg = "{0}/ does not redirect to {1}/ but instead redirects to: {2}"
+            raise WebRobotError(msg.format(self.web.base_url, self.login_site.base_url, auth_url))
 
         self.logger.debug("Following authentication redirect to %r.", auth_url)
         return auth_url
 
     def _get_session_cookie(self, auth_url):
         """Get initial session cookie from auth site."""
-        login_conn = ValidatedHTTPSConnection(ROBOT_LOGINHOST)
-        login_conn.request("GET", auth_url[len(ROBOT_LOGINHOST) + 8 :], None)
+        login_conn = self._new_connection(self.login_site)
+        login_conn.request("GET", self.login_site.prefix + self.login_site.path_of(auth_url), None)
 
         response = login_conn.getresponse()
         if response.status != 302:
@@ -116,9 +257,9 @@ class RobotWebInterface:
 
     def _get_csrf_token(self, headers):
         """Get CSRF token from login page."""
-        self.logger.debug("Visiting login page at https://%s/login.", ROBOT_LOGINHOST)
-        login_conn = ValidatedHTTPSConnection(ROBOT_LOGINHOST)
-        login_conn.request("GET", "/login", None, headers)
+        self.logger.debug("Visiting login page at %s/login.", self.login_site.base_url)
+        login_conn = self._new_connection(self.login_site)
+        login_conn.request("GET", self.login_site.prefix + "/login", None, headers)
 
         response = login_conn.getresponse()
         if response.status != 200:
@@ -135,10 +276,10 @@ class RobotWebInterface:
         data = urlencode({"_username": self.user, "_password": self.passwd, "_csrf_token": csrf_token})
         self.logger.debug("Logging in to auth site with user %s.", self.user)
 
-        login_conn = ValidatedHTTPSConnection(ROBOT_LOGINHOST)
+        login_conn = self._new_connection(self.login_site)
         post_headers = headers.copy()
         post_headers["Content-Type"] = "application/x-www-form-urlencoded"
-        login_conn.request("POST", "/login_check", data, post_headers)
+        login_conn.request("POST", self.login_site.prefix + "/login_check", data, post_headers)
         response = login_conn.getresponse()
 
         cookies = self._parse_cookies(response)
@@ -153,25 +294,25 @@ class RobotWebInterface:
         if headers.status != 302 or location is None:
             raise WebRobotError("Unable to get OAuth authorization URL.")
 
-        if not location.startswith("https://" + ROBOT_LOGINHOST + "/"):
-            msg = "https://{0}/ does not redirect to https://{1}/ but instead redirects to: {2}"
-            raise WebRobotError(msg.format(ROBOT_LOGINHOST, ROBOT_LOGINHOST, location))
+        if self.login_site.path_of(location) is None:
+            msg = "{0}/ does not redirect to {1}/ but instead redirects to: {2}"
+            raise WebRobotError(msg.format(self.login_site.base_url, self.login_site.base_url, location))
 
         self.logger.debug("Got redirected, visiting %r.", location)
         return location
 
     def _complete_oauth_flow(self, oauth_url, headers):
         """Complete OAuth flow and return to Robot."""
-        login_conn = ValidatedHTTPSConnection(ROBOT_LOGINHOST)
-        login_conn.request("GET", oauth_url[len(ROBOT_LOGINHOST) + 8 :], None, headers)
+        login_conn = self._new_connection(self.login_site)
+        login_conn.request("GET", self.login_site.prefix + self.login_site.path_of(oauth_url), None, headers)
         response = login_conn.getresponse()
 
         location = response.getheader("Location")
         if response.status != 302 or location is None:
             raise WebRobotError("Failed to get OAuth URL for Robot.")
-        if not location.startswith("https://" + ROBOT_WEBHOST + "/"):
-            msg = "https://{0}/ does not redirect to https://{1}/ but instead redirects to: {2}"
-            raise WebRobotError(msg.format(ROBOT_LOGINHOST, ROBOT_WEBHOST, location))
+        if self.web.path_of(location) is None:
+            msg = "{0}/ does not redirect to {1}/ but instead redirects to: {2}"
+            raise WebRobotError(msg.format(self.login_site.base_url, self.web.base_url, location))
 
         self.logger.debug("Going back to Robot web interface via %r.", location)
         return location
@@ -179,12 +320,12 @@ class RobotWebInterface:
     def _finalize_login(self, robot_url):
         """Finalize login by connecting to Robot with OAuth token."""
         self.connect(force=True)
-        response = self.request(robot_url[len(ROBOT_WEBHOST) + 8 :], xhr=False)
+        response = self.request(self.web.path_of(robot_url), xhr=False)
 
         if response.status != 302:
             raise WebRobotError(f"Status after providing OAuth token should be 302 and not {response.status}")
 
-        if response.getheader("location") != "https://" + ROBOT_WEBHOST + "/":
+        if response.getheader("location") != self.web.base_url + "/":
             raise WebRobotError("Robot login with OAuth token has failed.")
 
     def login(self, user=None, passwd=None, force=False):
@@ -224,8 +365,8 @@ class RobotWebInterface:
         cookieval = "; ".join([k + "=" + v for k, v in cookies.items()])
         headers["Cookie"] = cookieval
 
-        login_conn = ValidatedHTTPSConnection(ROBOT_LOGINHOST)
-        login_conn.request("POST", "/login_check", "", headers)
+        login_conn = self._new_connection(self.login_site)
+        login_conn.request("POST", self.login_site.prefix + "/login_check", "", headers)
         response = login_conn.getresponse()
 
         oauth_url = self._get_oauth_url(response)
@@ -234,7 +375,7 @@ class RobotWebInterface:
 
         self.logged_in = True
 
-    def request(self, path, data=None, xhr=True, method=None, log=True):
+    def request(self, path, data=None, xhr=True, method=None, log=True, *, idempotent=None):
         """
         Send a request to the web interface, using 'data' for urlencoded POST
         data. If 'data' is None (which it is by default), a GET request is sent
@@ -245,9 +386,11 @@ class RobotWebInterface:
 
         If 'log' is set to False, don't log anything containing data. This is
         useful to prevent logging sensible information such as passwords.
-        """
-        self.connect()
 
+        If the connection breaks down, GET requests are sent again on a new
+        connection according to the retry policy, POST requests only if
+        'idempotent' is set to True.
+        """
         headers = {"Connection": "keep-alive"}
         if self.session_cookie is not None:
             headers["Cookie"] = self.session_cookie
@@ -271,16 +414,24 @@ class RobotWebInterface:
                 path,
                 encoded,
             )
-        self.conn.request(method, path, encoded, headers)
 
-        try:
-            response = self.conn.getresponse()
-        except ResponseNotReady:
-            self.logger.debug("Connection closed by Robot web frontend, retrying.")
-            # Connection closed, so we need to reconnect.
-            # FIXME: Try to avoid endless loops here!
-            self.connect(force=True)
-            return self.request(path, data=data, xhr=xhr, log=log)
+        retry = self.retry if self.retry.allows(method, idempotent) else RetryPolicy.never()
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                response = self._send(method, path, encoded, headers)
+                break
+            except Exception as err:
+                delay = retry.next_delay(attempt, started, self.deadline) if retry.retryable_error(err) else None
+                if delay is None:
+                    raise
+                # Most likely the keep-alive connection has been closed by
+                # the web frontend, so start over with a new one.
+                self.logger.debug("Request to Robot web frontend failed with %r, retrying.", err)
+                self.connect(force=True)
+                time.sleep(delay)
+                attempt += 1
 
         if log:
             self.logger.debug("Got response from web frontend with status %d.", response.status)
@@ -288,147 +439,455 @@ class RobotWebInterface:
         self.update_session(response)
         return response
 
+    def _send(self, method, path, encoded, headers):
+        self.connect()
+        self.deadline.check(f"Request to Robot web frontend at {path}")
+        self.conn.set_timeouts(
+            self.deadline.cap(self.timeout.connect),
+            self.deadline.cap(_min_timeout(self.timeout.read, self.timeout.total)),
+        )
+        try:
+            self.conn.request(method, self.web.prefix + path, encoded, headers)
+            return self.conn.getresponse()
+        except TimeoutError as err:
+            self.deadline.check(f"Request to Robot web frontend at {path}")
+            raise RequestTimeout(f"{method} {path} on Robot web frontend timed out") from err
+
 
 class RobotConnection:
-    def __init__(self, user, passwd):
+    def __init__(
+        self,
+        user,
+        passwd,
+        *,
+        transport=None,
+        pool_size=4,
+        pool_idle_timeout=15.0,
+        timeout=None,
+        deadline=None,
+        retry=None,
+        rate_limiter=None,
+        cache=None,
+        web_transport=None,
+        login_transport=None,
+    ):
         self.user = user
         self.passwd = passwd
-        self.conn = ValidatedHTTPSConnection(ROBOT_HOST)
+        if transport is None:
+            transport = HTTPTransport(ROBOT_URL, pool_size=pool_size, pool_idle_timeout=pool_idle_timeout)
+        self.transport = transport
+        self.timeout = timeout if timeout is not None else Timeout()
+        self.deadline = deadline if deadline is not None else Deadline()
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.transfer_stats = TransferStats()
+        self.cache = cache
+        self.inflight = SingleFlight()
         self.logger = logging.getLogger(f"Robot of {user}")
 
         # Provide this as a way to easily add unsupported API features.
-        self.scraper = RobotWebInterface(user, passwd)
-
-    def _request(self, method, path, data, headers, retry=1):
-        self.conn.request(method.upper(), path, data, headers)
-        try:
-            return self.conn.getresponse()
-        except BadStatusLine:
-            # XXX: Sometimes, the API server seems to have a problem with
-            # keepalives.
-            if retry <= 0:
-                raise
+        self.scraper = RobotWebInterface(
+            user,
+            passwd,
+            timeout=self.timeout,
+            deadline=self.deadline,
+            retry=self.retry,
+            web_transport=web_transport,
+            login_transport=login_transport,
+        )
+
+    @property
+    def concurrency(self):
+        """
+        How many requests can be in flight at the same time, which is the
+        size of the connection pool of the transport, or 4 if it has none.
+        """
+        pool = getattr(self.transport, "pool", None)
+        return pool.size if pool is not None else 4
 
-            self.conn.close()
-            self.conn.connect()
-            return self._request(method, path, data, headers, retry - 1)
-
-    def _encode_phpargs(self, node, path=None):
-        """
-        Encode the given 'node' in a way PHP recognizes.
-
-        See https://php.net/manual/function.http-build-query.php for a
-        description of the format.
-
-        >>> robot = RobotConnection(None, None)
-        >>> enc = lambda arg: sorted(robot._encode_phpargs(arg).items())
-        >>> enc({'foo': [1, 2, 3]})
-        [('foo[0]', 1), ('foo[1]', 2), ('foo[2]', 3)]
-        >>> enc(['a', 'b', 'c'])
-        [('0', 'a'), ('1', 'b'), ('2', 'c')]
-        >>> enc({'a': {'b': [1, 2, 3], 'c': 'd'}})
-        [('a[b][0]', 1), ('a[b][1]', 2), ('a[b][2]', 3), ('a[c]', 'd')]
-        >>> enc({})
-        []
-        >>> enc({'a': {'b': {'c': {}}}})
-        []
-        >>> enc({'a': [1, 2, 3], 'b': {'c': 4}})
-        [('a[0]', 1), ('a[1]', 2), ('a[2]', 3), ('b[c]', 4)]
-        """
-        if path is None:
-            path = []
-        if isinstance(node, list):
-            enum = enumerate(node)
-        elif isinstance(node, dict):
-            enum = node.items()
-        elif len(path) == 0:
-            return node
-        else:
-            # TODO: Implement escaping of keys.
-            flatkey = ("[" + str(x) + "]" for x in path[1:])
-            return {str(path[0]) + "".join(flatkey): node}
+    def expire(self, path):
+        """
+        Make the next GET request for the endpoint 'path' belongs to reach
+        Robot, even if a response is cached or a request already in flight.
+        Changes made other than through this connection, for example in the
+        Robot web interface, don't invalidate cached responses.
+        """
+        self.inflight.forget(path)
+        if self.cache is not None:
+            self.cache.invalidate(path)
 
-        encoded = [self._encode_phpargs(v, [*path, k]) for k, v in enum]
-        return functools.reduce(lambda a, b: a.update(b) or a, encoded, {})
+    def _send(self, method, path, data, headers):
+        """
+        Send a request through the transport and return a tuple of the
+        response status and the decompressed response body.
+        """
+        self.deadline.check(f"{method} {path}")
+        timeout = Timeout(self.timeout.connect, self.timeout.read, self.deadline.cap(self.timeout.total))
+        try:
+            response = self.transport.send(method.upper(), path, data, headers, timeout)
+        except (TimeoutError, PoolTimeout) as err:
+            self.deadline.check(f"{method} {path}")
+            raise RequestTimeout(f"{method} {path} timed out: {err}") from err
+        body = decode_body(response.body, response.getheader("Content-Encoding"))
+        self.transfer_stats.record(endpoint_of(path), len(response.body), len(body))
+        return response.status, body
+
+    def _request(self, method, path, data, headers, idempotent=None):
+        """
+        Like _send(), but retry transient failures according to the retry
+        policy. A connection that failed is discarded by the pool, so every
+        retry gets a fresh one.
 
-    def request(self, method, path, data=None, allow_empty=False):
+        Every attempt is held back until the rate limiter has budget for it.
+        Requests rejected because of Robot's rate limit haven't been carried
+        out, so they are sent again regardless of their method.
+        """
+        retry = self.retry if self.retry.allows(method, idempotent) else RetryPolicy.never()
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            self.rate_limiter.acquire(method, path, max_wait=self.deadline.remaining())
+            try:
+                status, body = self._send(method, path, data, headers)
+            except Exception as err:
+                delay = retry.next_delay(attempt, started, self.deadline) if retry.retryable_error(err) else None
+                if delay is None:
+                    raise
+                self.logger.debug("%s %s failed with %r, retrying in %.2f seconds.", method, path, err, delay)
+            else:
+                limit = rate_limit_error(status, body)
+                if limit is not None:
+                    limited = self.rate_limiter.exhausted(method, path, limit.get("max_request"), limit.get("interval"))
+                    if attempt >= self.retry.max_attempts:
+                        return status, body
+                    if limited:
+                        self.logger.debug("%s %s hit the rate limit, waiting for the budget to refill.", method, path)
+                        attempt += 1
+                        continue
+                    # Without a budget to wait for, back off like after other failures.
+                    delay = self.retry.next_delay(attempt, started, self.deadline)
+                    if delay is None:
+                        return status, body
+                    self.logger.debug("%s %s hit the rate limit, retrying in %.2f seconds.", method, path, delay)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                delay = retry.next_delay(attempt, started, self.deadline) if retry.retryable_status(status) else None
+                if delay is None:
+                    return status, body
+                self.logger.debug("%s %s returned status %d, retrying in %.2f seconds.", method, path, status, delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _cached_request(self, method, path, data, headers, idempotent=None):
+        """
+        Like _request(), but answer GET requests from the response cache if
+        there is one, and let concurrent GET requests for the same path share
+        one request. Other requests invalidate the cached and shared responses
+        of their endpoint, even if they failed, as they may have been carried
+        out.
+        """
+        if method.upper() != "GET":
+            try:
+                return self._request(method, path, data, headers, idempotent)
+            finally:
+                self.inflight.forget(path)
+                if self.cache is not None:
+                    self.cache.invalidate(path)
+        if self.cache is not None:
+            body = self.cache.get(path)
+            if body is not None:
+                self.logger.debug("Answering GET %s from the response cache.", path)
+                return 200, body
+        return self.inflight.do(path, self._get, path, headers, idempotent)
+
+    def _get(self, path, headers, idempotent):
+        # A change sent while this request is in flight invalidates the
+        # endpoint, and the response may predate it.
+        generation = self.cache.generation(path) if self.cache is not None else None
+        status, body = self._request("GET", path, None, headers, idempotent)
+        if self.cache is not None and 200 <= status < 300:
+            self.cache.put(path, body, generation)
+        return status, body
+
+    def request(self, method, path, data=None, allow_empty=False, idempotent=None):
+        """
+        Send a request to the Robot webservice and return the decoded
+        response. Failed GET and DELETE requests are retried according to
+        the retry policy, others only if 'idempotent' is set to True.
+        """
         if data is not None:
-            data = urlencode(self._encode_phpargs(data))
-
-        auth = "Basic {}".format(b64encode(f"{self.user}:{self.passwd}".encode("ascii")).decode("ascii"))
+            data = urlencode(encode_phpargs(data))
 
-        headers = {"Authorization": auth}
+        headers = {"Authorization": basic_auth(self.user, self.passwd), "Accept-Encoding": ACCEPT_ENCODING}
 
         if data is not None:
             headers["Content-Type"] = "application/x-www-form-urlencoded"
 
         self.logger.debug("Sending %s request to Robot at %s with data %r.", method, path, data)
 
-        response = self._request(method, path, data, headers)
-        raw_data = response.read().decode("utf-8")
-        if len(raw_data) == 0 and not allow_empty:
-            msg = "Empty response, status {0}."
-            raise RobotError(msg.format(response.status), response.status)
-        elif not allow_empty:
-            try:
-                data = json.loads(raw_data)
-            except ValueError as err:
-                msg = "Response is not JSON (status {0}): {1}"
-                raise RobotError(msg.format(response.status, repr(raw_data))) from err
-        else:
-            data = None
-        self.logger.debug("Got response from Robot with status %d and data %r.", response.status, data)
-
-        if 200 <= response.status < 300:
-            return data
-        else:
-            error = data.get("error", None)
-            if error is None:
-                raise RobotError(f"Unknown error: {data}", response.status)
-            else:
-                err = "{} - {}".format(error["status"], error["message"])
-                missing = error.get("missing", [])
-                invalid = error.get("invalid", [])
-                fields = []
-                if missing is not None:
-                    fields += missing
-                if invalid is not None:
-                    fields += invalid
-                if len(fields) > 0:
-                    err += ", fields: {}".format(", ".join(fields))
-                raise RobotError(err, response.status)
+        status, body = self._cached_request(method, path, data, headers, idempotent)
+        data = parse_response(status, body, allow_empty)
+        self.logger.debug("Got response from Robot with status %d and data %r.", status, data)
+        return check_response(status, data)
 
     def get(self, path):
         return self.request("GET", path)
 
-    def post(self, path, data):
-        return self.request("POST", path, data)
+    def post(self, path, data, idempotent=False):
+        return self.request("POST", path, data, idempotent=idempotent)
 
-    def put(self, path, data):
-        return self.request("PUT", path, data)
+    def put(self, path, data, idempotent=False):
+        return self.request("PUT", path, data, idempotent=idempotent)
 
     def delete(self, path, data=None):
         return self.request("DELETE", path, data, allow_empty=True)
 
 
 class ServerManager:
+    """
+    Lists the servers of the account. The last listing is kept, so repeated
+    iterations and the by_number(), by_ip() and by_name() lookups don't
+    request it again until refresh() is called.
+    """
+
     def __init__(self, conn):
         self.conn = conn
+        self._servers = None
+        self._by_number = {}
+        self._by_ip = {}
+        self._by_name = {}
 
     def get(self, ip):
         """
-        Get server by providing its main IP address.
+        Get server by providing its main IP address. If the servers were
+        listed already, the listed server is returned without a request.
+        """
+        server = self._by_ip.get(ip)
+        if server is None:
+            server = Server(self.conn, self.conn.get(f"/server/{ip}"))
+        return server
+
+    def refresh(self, servers=None):
+        """
+        Request the list of servers again and return it, bypassing the
+        response cache.
+
+        If 'servers' is given, the Server objects in it are updated in place
+        from that one listing instead, matched by their number, and returned.
+        Only servers the listing lacks fields of, or lacks entirely, are
+        requested one by one. The listing is kept with the given objects in
+        place of new ones, and the kept servers are updated along with them.
+        Given servers Robot doesn't know anymore are left out of the result.
+        """
+        self.conn.expire("/server")
+        if servers is None:
+            for _ in self._listing():
+                pass
+            return list(self._servers)
+
+        servers = list(servers)
+        known = {}
+        for server in [*servers, *(self._servers or ())]:
+            instances = known.setdefault(server.number, [])
+            if all(server is not other for other in instances):
+                instances.append(server)
+        listed = []
+        for data in self.conn.get("/server"):
+            instances = known.pop(data["server"]["server_number"], None)
+            if instances is None:
+                listed.append(Server(self.conn, data))
+                continue
+            complete = all(field in data["server"] for field in Server.FIELDS)
+            for server in instances:
+                if complete:
+                    server.update_info(data)
+                else:
+                    server.update_info()
+            listed.append(instances[0])
+        self._keep(listed)
+        # Servers that aren't listed anymore, such as cancelled ones, are
+        # requested one by one once the listing is kept.
+        requested = {id(server) for server in servers}
+        gone = set()
+        for instances in known.values():
+            for server in instances:
+                if id(server) not in requested:
+                    continue
+                try:
+                    server.update_info()
+                except RobotError as err:
+                    if err.status != 404:
+                        raise
+                    gone.add(id(server))
+        return [server for server in servers if id(server) not in gone]
+
+    def _listing(self):
+        """
+        Yield the servers of a new listing as they are created. The listing
+        is only kept once all of them were yielded.
+        """
+        servers = []
+        for data in self.conn.get("/server"):
+            server = Server(self.conn, data)
+            servers.append(server)
+            yield server
+        self._keep(servers)
+
+    def _keep(self, servers):
+        by_number, by_ip, by_name = {}, {}, {}
+        for server in servers:
+            by_number[server.number] = server
+            by_ip[server.ip] = server
+            by_name.setdefault(server.name, server)
+        self._servers = servers
+        self._by_number = by_number
+        self._by_ip = by_ip
+        self._by_name = by_name
+
+    def _listed(self):
+        if self._servers is None:
+            self.refresh()
+        return self._servers
+
+    def by_number(self, number):
+        """
+        Return the server with the given number or None.
         """
-        return Server(self.conn, self.conn.get(f"/server/{ip}"))
+        self._listed()
+        return self._by_number.get(number)
+
+    def by_ip(self, ip):
+        """
+        Return the server with the given main IP address or None.
+        """
+        self._listed()
+        return self._by_ip.get(ip)
+
+    def by_name(self, name):
+        """
+        Return the first listed server with the given name or None. Names
+        changed with Server.set_name() are taken into account.
+        """
+        servers = self._listed()
+        server = self._by_name.get(name)
+        if server is None or server.name != name:
+            self._by_name = {}
+            for each in servers:
+                self._by_name.setdefault(each.name, each)
+            server = self._by_name.get(name)
+        return server
 
     def __iter__(self):
-        return iter([Server(self.conn, s) for s in self.conn.get("/server")])
+        if self._servers is None:
+            return self._listing()
+        return iter(self._servers)
 
 
 class Robot:
-    def __init__(self, user, passwd):
-        self.conn = RobotConnection(user, passwd)
+    def __init__(
+        self,
+        user,
+        passwd,
+        *,
+        transport=None,
+        pool_size=4,
+        pool_idle_timeout=15.0,
+        timeout=None,
+        deadline=None,
+        retry=None,
+        rate_limiter=None,
+        cache=None,
+        web_transport=None,
+        login_transport=None,
+    ):
+        """
+        The Robot webservice client. Requests go through 'transport' (a
+        Transport instance), by default an HTTPTransport to the Robot
+        webservice. With the default transport, up to 'pool_size' requests
+        can be in flight at the same time, so the managers may be used from
+        worker threads, and keep-alive connections idle for more than
+        'pool_idle_timeout' seconds are closed.
+
+        Every request is limited by 'timeout' (a Timeout instance) and all
+        requests together by 'deadline' (a Deadline instance), after which
+        further requests fail with DeadlineExceeded. Transient failures are
+        retried according to 'retry' (a RetryPolicy instance). Requests are
+        delayed to stay within the per-endpoint budgets of 'rate_limiter' (a
+        RateLimiter instance).
+
+        If 'cache' (a ResponseCache instance) is given, GET responses are
+        reused until they expire or a change through this client, such as
+        Server.set_name(), invalidates them. Either way, GET requests for a
+        path that is already being requested wait for that response instead
+        of sending the same request again.
+
+        Features the webservice lacks are scraped from the Robot web
+        interface through 'web_transport' and 'login_transport', by default
+        HTTPTransports to the web interface and its login site.
+        """
+        self.conn = RobotConnection(
+            user,
+            passwd,
+            transport=transport,
+            pool_size=pool_size,
+            pool_idle_timeout=pool_idle_timeout,
+            timeout=timeout,
+            deadline=deadline,
+            retry=retry,
+            rate_limiter=rate_limiter,
+            cache=cache,
+            web_transport=web_transport,
+            login_transport=login_transport,
+        )
         self.servers = ServerManager(self.conn)
+        self.ips = AccountIpManager(self.conn)
+        self.subnets = AccountSubnetManager(self.conn)
         self.rdns = ReverseDNSManager(self.conn)
         self.failover = FailoverManager(self.conn, self.servers)
         self.vswitch = VswitchManager(self.conn, self.servers)
+        self._vswitch_index = None
+
+    def snapshot(self, include=tuple(SNAPSHOT_RESOURCES), max_workers=None):
+        """
+        Fetch servers, vSwitches with their details, failover IPs, reverse
+        DNS entries, IPs and subnets, or only those named in 'include', and
+        return them as a FleetSnapshot. Requests run concurrently, at most
+        'max_workers' at a time, by default as many as the connection pool
+        of the transport allows.
+        """
+        if max_workers is None:
+            max_workers = self.conn.concurrency
+        return FleetSnapshot.fetch(self.conn, include, max_workers=max_workers)
+
+    def vswitch_index(self, refresh=False):
+        """
+        Return a VswitchIndex of all vSwitches. It is built once and kept
+        until 'refresh' is set, which requests the details of all vSwitches
+        again, so servers attached or detached elsewhere show up.
+        """
+        if self._vswitch_index is None or refresh:
+            self._vswitch_index = VswitchIndex(self.vswitch.list(refresh=refresh))
+        return self._vswitch_index
+
+    def remaining_budget(self, path, method="GET"):
+        """
+        Return how many requests like 'method' 'path' can be sent right away
+        without waiting for the rate limit, or None if they aren't limited.
+        Bulk operations can use this to size their parallelism.
+        """
+        return self.conn.rate_limiter.remaining(method, path)
+
+    def transfer_stats(self):
+        """
+        Return the response bytes received per endpoint, on the wire and
+        after decompression, see TransferStats.stats().
+        """
+        return self.conn.transfer_stats.stats()
+
+    def cache_stats(self):
+        """
+        Return the number and size of cached responses and the cache hits
+        and misses so far, or None if responses aren't cached.
+        """
+        return None if self.conn.cache is None else self.conn.cache.stats()
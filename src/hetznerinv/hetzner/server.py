@@ -19,7 +19,17 @@ from .rdns import ReverseDNS, ReverseDNSManager
 from .reset import Reset
 from .util import addr, scraping
 
-__all__ = ["AdminAccount", "IpAddress", "IpManager", "RescueSystem", "Server", "Subnet", "SubnetManager"]
+__all__ = [
+    "AccountIpManager",
+    "AccountSubnetManager",
+    "AdminAccount",
+    "IpAddress",
+    "IpManager",
+    "RescueSystem",
+    "Server",
+    "Subnet",
+    "SubnetManager",
+]
 
 
 class SSHAskPassHelper:
@@ -262,12 +272,36 @@ class AdminAccount:
 
 
 class IpAddress:
+    # What only the /ip endpoints tell about an address, see from_listing().
+    DETAILS = ("locked", "separate_mac", "traffic_warnings", "traffic_hourly", "traffic_daily", "traffic_monthly")
+
     def __init__(self, conn, result, subnet_ip=None):
         self.conn = conn
         self.subnet_ip = subnet_ip
         self.update_info(result)
         self._rdns = None
 
+    @classmethod
+    def from_listing(cls, conn, ip, server_ip):
+        """
+        Create an IpAddress from an address of the server listing, which
+        includes nothing but the address. Its details are requested when one
+        of them is accessed first.
+        """
+        self = cls.__new__(cls)
+        self.conn = conn
+        self.subnet_ip = None
+        self.ip = ip
+        self.server_ip = server_ip
+        self._rdns = None
+        return self
+
+    def __getattr__(self, name):
+        if name not in self.DETAILS or "ip" not in self.__dict__:
+            raise AttributeError(name)
+        self.update_info()
+        return self.__dict__[name]
+
     @property
     def rdns(self):
         """
@@ -310,9 +344,15 @@ class IpAddress:
 
 
 class IpManager:
-    def __init__(self, conn, main_ip):
+    def __init__(self, conn, main_ip, addresses=None):
+        """
+        Manage the IP addresses of the server with 'main_ip'. If they are
+        known, for example from the server listing, 'addresses' is a list of
+        them.
+        """
         self.conn = conn
         self.main_ip = main_ip
+        self.addresses = addresses
 
     def get(self, ip):
         """
@@ -320,17 +360,61 @@ class IpManager:
         """
         return IpAddress(self.conn, self.conn.get(f"/ip/{ip}"))
 
-    def __iter__(self):
+    def list(self, refresh=False):
+        """
+        Return the IP addresses of the server. If they are known already,
+        no request is sent unless 'refresh' is set, and the details of every
+        address are only requested when first accessed.
+        """
+        if self.addresses is not None and not refresh:
+            return [IpAddress.from_listing(self.conn, ip, self.main_ip) for ip in self.addresses]
         data = urlencode({"server_ip": self.main_ip})
-        result = self.conn.get(f"/ip?{data}")
-        return iter([IpAddress(self.conn, ip) for ip in result])
+        ips = [IpAddress(self.conn, ip) for ip in self.conn.get(f"/ip?{data}")]
+        self.addresses = [ip.ip for ip in ips]
+        return ips
+
+    def __iter__(self):
+        return iter(self.list())
 
 
 class Subnet:
+    # What only the /subnet endpoints tell about a subnet, see from_listing().
+    DETAILS = (
+        "gateway",
+        "numeric_gateway",
+        "failover",
+        "locked",
+        "traffic_warnings",
+        "traffic_hourly",
+        "traffic_daily",
+        "traffic_monthly",
+    )
+
     def __init__(self, conn, result):
         self.conn = conn
         self.update_info(result)
 
+    @classmethod
+    def from_listing(cls, conn, data, server_ip):
+        """
+        Create a Subnet from an entry of the server listing, which has just
+        the network address and mask. Its details are requested when one of
+        them is accessed first.
+        """
+        self = cls.__new__(cls)
+        self.conn = conn
+        self.net_ip = data["ip"]
+        self.mask = int(data["mask"])
+        self.server_ip = server_ip
+        self._set_range()
+        return self
+
+    def __getattr__(self, name):
+        if name not in self.DETAILS or "net_ip" not in self.__dict__:
+            raise AttributeError(name)
+        self.update_info()
+        return self.__dict__[name]
+
     def update_info(self, result=None):
         """
         Update the information of the subnet. If result is omitted, a new
@@ -352,8 +436,11 @@ class Subnet:
         self.traffic_daily = data["traffic_daily"]
         self.traffic_monthly = data["traffic_monthly"]
 
-        self.is_ipv6, self.numeric_net_ip = addr.parse_ipaddr(self.net_ip)
+        self._set_range()
         self.numeric_gateway = addr.parse_ipaddr(self.gateway, self.is_ipv6)
+
+    def _set_range(self):
+        self.is_ipv6, self.numeric_net_ip = addr.parse_ipaddr(self.net_ip)
         getrange = addr.get_ipv6_range if self.is_ipv6 else addr.get_ipv4_range
         self.numeric_range = getrange(self.numeric_net_ip, self.mask)
 
@@ -365,11 +452,11 @@ class Subnet:
         convert = addr.ipv6_bin2addr if self.is_ipv6 else addr.ipv4_bin2addr
         return convert(self.numeric_range[0]), convert(self.numeric_range[1])
 
-    def __contains__(self, addr):
+    def __contains__(self, ip):
         """
         Check whether a specific IP address is within the current subnet.
         """
-        numeric_addr = addr.parse_ipaddr(addr, self.is_ipv6)
+        numeric_addr = addr.parse_ipaddr(ip, self.is_ipv6)
         return self.numeric_range[0] <= numeric_addr <= self.numeric_range[1]
 
     def get_ip(self, addr):
@@ -384,13 +471,21 @@ class Subnet:
             return None
 
     def __repr__(self):
+        if "gateway" not in self.__dict__:
+            return f"<Subnet {self.net_ip}/{self.mask}>"
         return f"<Subnet {self.net_ip}/{self.mask} (Gateway: {self.gateway})>"
 
 
 class SubnetManager:
-    def __init__(self, conn, main_ip):
+    def __init__(self, conn, main_ip, networks=None):
+        """
+        Manage the subnets of the server with 'main_ip'. If they are known,
+        for example from the server listing, 'networks' is a list of dicts
+        with their "ip" and "mask".
+        """
         self.conn = conn
         self.main_ip = main_ip
+        self.networks = networks
 
     def get(self, net_ip):
         """
@@ -398,29 +493,199 @@ class SubnetManager:
         """
         return Subnet(self.conn, self.conn.get(f"/subnet/{net_ip}"))
 
-    def __iter__(self):
+    def list(self, refresh=False):
+        """
+        Return the subnets of the server. If they are known already, no
+        request is sent unless 'refresh' is set, and the details of every
+        subnet are only requested when first accessed.
+        """
+        if self.networks is not None and not refresh:
+            return [Subnet.from_listing(self.conn, net, self.main_ip) for net in self.networks]
         data = urlencode({"server_ip": self.main_ip})
         try:
             result = self.conn.get(f"/subnet?{data}")
         except RobotError as err:
             # If there are no subnets a 404 is returned rather than just an
             # empty list.
-            if err.status == 404:
-                result = []
-        return iter([Subnet(self.conn, net) for net in result])
+            if err.status != 404:
+                raise
+            result = []
+        subnets = [Subnet(self.conn, net) for net in result]
+        self.networks = [{"ip": net.net_ip, "mask": net.mask} for net in subnets]
+        return subnets
+
+    def __iter__(self):
+        return iter(self.list())
+
+
+class _AccountManager:
+    """
+    Lists the records of 'path' for the whole account with one request and
+    groups them by the main IP of their server.
+    """
+
+    path = None
+    # Creates a record from an item of the listing and the connection.
+    _record = None
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._by_server = None
+
+    def refresh(self):
+        """
+        Request the records again.
+        """
+        try:
+            result = self.conn.get(self.path)
+        except RobotError as err:
+            # Robot answers with 404 if there are none.
+            if err.status != 404:
+                raise
+            result = []
+        by_server = {}
+        for item in result:
+            record = self._record(self.conn, item)
+            by_server.setdefault(record.server_ip, []).append(record)
+        self._by_server = by_server
+
+    def by_server(self):
+        """
+        Return a dict mapping the main IP of every server to its records,
+        requesting them the first time.
+        """
+        if self._by_server is None:
+            self.refresh()
+        return self._by_server
+
+    def of(self, server_ip):
+        """
+        Return the records of the server with main IP 'server_ip'.
+        """
+        return list(self.by_server().get(server_ip, ()))
+
+    def __iter__(self):
+        return iter([record for records in self.by_server().values() for record in records])
+
+
+class AccountIpManager(_AccountManager):
+    """
+    The IP addresses of all servers of the account, requested at once and
+    looked up by server with of() or by_server().
+    """
+
+    path = "/ip"
+    _record = IpAddress
+
+    def get(self, ip):
+        return IpAddress(self.conn, self.conn.get(f"/ip/{ip}"))
+
+
+class AccountSubnetManager(_AccountManager):
+    """
+    The subnets of all servers of the account, requested at once and looked
+    up by server with of() or by_server().
+    """
+
+    path = "/subnet"
+    _record = Subnet
+
+    def get(self, net_ip):
+        return Subnet(self.conn, self.conn.get(f"/subnet/{net_ip}"))
+
+
+class _ServerLogger(logging.LoggerAdapter):
+    """
+    Prefixes messages with the server number, so servers can share one
+    logger instead of each registering its own for good.
+    """
+
+    def process(self, msg, kwargs):
+        return f"Server #{self.extra['number']}: {msg}", kwargs
+
+
+_server_logger = logging.getLogger("hetzner.server")
 
 
 class Server:
+    """
+    A server of the account. As fleets have thousands of them, servers only
+    keep what Robot sent about them and create the objects for rescue
+    system, reset, IPs, subnets, reverse DNS and admin account when first
+    used.
+    """
+
+    # The fields of the server record update_info() reads.
+    FIELDS = (
+        "server_ip",
+        "server_number",
+        "server_name",
+        "product",
+        "dc",
+        "traffic",
+        "status",
+        "cancelled",
+        "paid_until",
+    )
+
+    __slots__ = (
+        "_admin_account",
+        "_ip_list",
+        "_ips",
+        "_rdns",
+        "_rescue",
+        "_reset",
+        "_subnet_list",
+        "_subnets",
+        "cancelled",
+        "conn",
+        "datacenter",
+        "ip",
+        "name",
+        "number",
+        "paid_until",
+        "product",
+        "status",
+        "traffic",
+    )
+
     def __init__(self, conn, result):
         self.conn = conn
-        self.update_info(result)
-        self.rescue = RescueSystem(self)
-        self.reset = Reset(self)
-        self.ips = IpManager(self.conn, self.ip)
-        self.subnets = SubnetManager(self.conn, self.ip)
-        self.rdns = ReverseDNSManager(self.conn, self.ip)
+        self._rescue = None
+        self._reset = None
+        self._rdns = None
         self._admin_account = None
-        self.logger = logging.getLogger(f"Server #{self.number}")
+        self.update_info(result)
+
+    @property
+    def rescue(self):
+        if self._rescue is None:
+            self._rescue = RescueSystem(self)
+        return self._rescue
+
+    @property
+    def reset(self):
+        if self._reset is None:
+            self._reset = Reset(self)
+        return self._reset
+
+    @property
+    def ips(self):
+        if self._ips is None:
+            self._ips = IpManager(self.conn, self.ip, self._ip_list)
+        return self._ips
+
+    @property
+    def subnets(self):
+        if self._subnets is None:
+            self._subnets = SubnetManager(self.conn, self.ip, self._subnet_list)
+        return self._subnets
+
+    @property
+    def rdns(self):
+        if self._rdns is None:
+            self._rdns = ReverseDNSManager(self.conn, self.ip)
+        return self._rdns
 
     @property
     def admin(self):
@@ -431,6 +696,10 @@ class Server:
             self._admin_account = AdminAccount(self)
         return self._admin_account
 
+    @property
+    def logger(self):
+        return _ServerLogger(_server_logger, {"number": self.number})
+
     def update_info(self, result=None):
         """
         Updates the information of the current Server instance either by
@@ -451,6 +720,13 @@ class Server:
         self.cancelled = data["cancelled"]
         self.paid_until = datetime.strptime(data["paid_until"], "%Y-%m-%d")
 
+        # Robot includes the addresses of the server, so listing them
+        # doesn't take another request per server.
+        self._ip_list = data.get("ip")
+        self._subnet_list = data.get("subnet")
+        self._ips = None
+        self._subnets = None
+
     def observed_reboot(self, *args, **kwargs):
         msg = "Server.observed_reboot() is deprecated. Please use Server.reset.observed_reboot() instead."
         warnings.warn(msg, DeprecationWarning, stacklevel=2)
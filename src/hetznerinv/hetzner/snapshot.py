@@ -0,0 +1,165 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+from . import RobotError
+from .failover import Failover
+from .server import Server
+from .vswitch import Vswitch, VswitchIndex
+
+__all__ = ["RESOURCES", "FleetSnapshot"]
+
+# Resource name -> (list path, envelope of the list items)
+RESOURCES = {
+    "servers": ("/server", "server"),
+    "vswitches": ("/vswitch", None),
+    "failovers": ("/failover", "failover"),
+    "rdns": ("/rdns", "rdns"),
+    "ips": ("/ip", "ip"),
+    "subnets": ("/subnet", "subnet"),
+}
+
+
+def _get_list(conn, path, envelope):
+    """
+    GET a collection and strip the envelope of its items. Robot answers with
+    404 instead of an empty list if there is nothing.
+    """
+    try:
+        items = conn.get(path)
+    except RobotError as err:
+        if err.status == 404:
+            return []
+        raise
+    return [item[envelope] for item in items] if envelope else items
+
+
+def _group_by_server(records):
+    groups = {}
+    for data in records:
+        groups.setdefault(data["server_ip"], []).append(data)
+    return MappingProxyType({server_ip: tuple(group) for server_ip, group in groups.items()})
+
+
+class FleetSnapshot:
+    """
+    The state of a Robot account at one point in time, with indexes for the
+    common lookups. The snapshot itself can't be changed; its Server objects
+    are bound to the connection and can still send requests.
+
+    'records' maps the names in RESOURCES to the items of the respective
+    list as sent by Robot, without their envelopes; vSwitches with their
+    details. Missing resources are empty.
+    """
+
+    def __init__(self, conn, records, taken_at=None):
+        self._records = MappingProxyType({name: tuple(records.get(name, ())) for name in RESOURCES})
+        self._taken_at = time.time() if taken_at is None else taken_at
+
+        self._servers = tuple(Server(conn, {"server": data}) for data in self._records["servers"])
+        by_number = {server.number: server for server in self._servers}
+        by_ip = {server.ip: server for server in self._servers}
+        for data in self._records["ips"]:
+            server = by_ip.get(data["server_ip"])
+            if server is not None:
+                by_ip.setdefault(data["ip"], server)
+
+        self._vswitch_index = VswitchIndex((data["id"], Vswitch(data)) for data in self._records["vswitches"])
+
+        self._by_number = MappingProxyType(by_number)
+        self._by_ip = MappingProxyType(by_ip)
+        self._vswitches = MappingProxyType(self._vswitch_index.vswitches)
+        self._ips_by_server = _group_by_server(self._records["ips"])
+        self._subnets_by_server = _group_by_server(self._records["subnets"])
+        self._failovers = MappingProxyType({data["ip"]: Failover(data) for data in self._records["failovers"]})
+        self._rdns = MappingProxyType({data["ip"]: data["ptr"] for data in self._records["rdns"]})
+
+    @classmethod
+    def fetch(cls, conn, include=tuple(RESOURCES), max_workers=4):
+        """
+        Fetch the resources named in 'include' with up to 'max_workers'
+        requests in flight. The vSwitch details are requested as soon as the
+        vSwitch list has arrived, while the other lists are still loading.
+        The snapshot is as old as its first request.
+        """
+        unknown = set(include) - set(RESOURCES)
+        if unknown:
+            raise ValueError("Unknown resources: {}".format(", ".join(sorted(unknown))))
+        taken_at = time.time()
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="robot-snapshot")
+        try:
+            futures = {name: pool.submit(_get_list, conn, *RESOURCES[name]) for name in include}
+            if "vswitches" in futures:
+                details = [pool.submit(conn.get, "/vswitch/{}".format(v["id"])) for v in futures["vswitches"].result()]
+                futures["vswitches"] = details
+            records = {
+                name: [f.result() for f in future] if isinstance(future, list) else future.result()
+                for name, future in futures.items()
+            }
+        finally:
+            pool.shutdown(cancel_futures=True)
+        return cls(conn, records, taken_at)
+
+    @property
+    def records(self):
+        return self._records
+
+    @property
+    def taken_at(self):
+        """
+        When the snapshot was taken, in seconds since the epoch.
+        """
+        return self._taken_at
+
+    @property
+    def servers(self):
+        return self._servers
+
+    @property
+    def vswitches(self):
+        """
+        The vSwitches by ID, like VswitchManager.list() returns them.
+        """
+        return self._vswitches
+
+    @property
+    def vswitch_index(self):
+        return self._vswitch_index
+
+    @property
+    def failovers(self):
+        """
+        The failover IPs by address, like FailoverManager.list() returns them.
+        """
+        return self._failovers
+
+    def server(self, key):
+        """
+        Return the server with the given number or IP address, which may
+        also be one of its additional IPs, or None.
+        """
+        if isinstance(key, int):
+            return self._by_number.get(key)
+        return self._by_ip.get(key)
+
+    def vswitch_of(self, server_ip):
+        """
+        Return the vSwitch the server with main IP 'server_ip' is attached to,
+        or None, see VswitchIndex.
+        """
+        return self._vswitch_index.vswitch_of(server_ip)
+
+    def rdns(self, ip):
+        """
+        Return the reverse DNS PTR of 'ip', or None.
+        """
+        return self._rdns.get(ip)
+
+    def ips_of(self, server_ip):
+        return self._ips_by_server.get(server_ip, ())
+
+    def subnets_of(self, server_ip):
+        return self._subnets_by_server.get(server_ip, ())
+
+    def __repr__(self):
+        return f"<FleetSnapshot of {len(self._servers)} servers and {len(self._vswitches)} vSwitches>"
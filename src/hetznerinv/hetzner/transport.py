@@ -0,0 +1,181 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from .util.asynchttp import AsyncHTTPSConnection
+from .util.http import PlainHTTPConnection, ValidatedHTTPSConnection
+from .util.pool import AsyncConnectionPool, ConnectionPool
+from .util.timeouts import Timeout
+
+ROBOT_HOST = "robot-ws.your-server.de"
+ROBOT_WEBHOST = "robot.hetzner.com"
+ROBOT_LOGINHOST = "accounts.hetzner.com"
+
+ROBOT_URL = f"https://{ROBOT_HOST}"
+ROBOT_WEB_URL = f"https://{ROBOT_WEBHOST}"
+ROBOT_LOGIN_URL = f"https://{ROBOT_LOGINHOST}"
+
+__all__ = [
+    "ROBOT_LOGIN_URL",
+    "ROBOT_URL",
+    "ROBOT_WEB_URL",
+    "AsyncHTTPTransport",
+    "HTTPTransport",
+    "Response",
+    "Transport",
+]
+
+
+def _min_timeout(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+def _cap(timeout, expires_at):
+    """
+    Limit 'timeout' to the time left until 'expires_at' (monotonic clock).
+    """
+    if expires_at is None:
+        return timeout
+    return _min_timeout(timeout, max(0.0, expires_at - time.monotonic()))
+
+
+def _read_body(conn, response, read_timeout, expires_at):
+    """
+    Read the whole response body, making sure that reading doesn't go on
+    past 'expires_at' even if the server keeps trickling in data.
+    """
+    if expires_at is None:
+        return response.read()
+    chunks = []
+    while True:
+        left = expires_at - time.monotonic()
+        if left <= 0:
+            raise TimeoutError("Total request timeout exceeded while reading the response")
+        # The connection is gone already if the server asked to close it,
+        # then only the read timeout set before the request applies.
+        if conn.sock is not None:
+            conn.sock.settimeout(_min_timeout(read_timeout, left))
+        chunk = response.read(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+class Response:
+    """
+    A completely read response, as returned by Transport.send().
+    """
+
+    def __init__(self, status, reason, headers, body):
+        self.status = status
+        self.reason = reason
+        self.headers = {name.lower(): value for name, value in headers}
+        self.body = body
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+    def read(self):
+        return self.body
+
+
+class Transport:
+    """
+    Carries requests to one base URL such as "https://robot-ws.your-server.de"
+    or "http://localhost:8080/robot" for a local stand-in. Request paths are
+    relative to the base URL.
+
+    Subclasses implement send(method, path, body, headers, timeout), which
+    returns a Response with the body read completely, and close(). To wrap
+    an existing transport, for example for instrumentation, delegate to it.
+    """
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        if parts.scheme not in {"http", "https"} or not parts.hostname:
+            raise ValueError(f"Unsupported base URL {base_url!r}, expected http(s)://host[:port][/path]")
+        self.base_url = base_url.rstrip("/")
+        self.tls = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.tls else 80)
+        self.prefix = parts.path.rstrip("/")
+
+    def url(self, path):
+        return self.base_url + path
+
+    def path_of(self, url):
+        """
+        Return the request path of the absolute 'url' if it points below the
+        base URL, otherwise None.
+        """
+        if url.startswith(self.base_url + "/"):
+            return url[len(self.base_url) :]
+        return None
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.base_url}>"
+
+
+class HTTPTransport(Transport):
+    """
+    The default transport: HTTP/1.1 over a bounded pool of keep-alive
+    connections, validated TLS for https base URLs.
+    """
+
+    def __init__(self, base_url=ROBOT_URL, *, pool_size=4, pool_idle_timeout=15.0):
+        super().__init__(base_url)
+        self.pool = ConnectionPool(self.new_connection, size=pool_size, idle_timeout=pool_idle_timeout)
+
+    def new_connection(self):
+        """
+        Return a new, unpooled connection to the base URL's host.
+        """
+        if self.tls:
+            return ValidatedHTTPSConnection(self.host, self.port)
+        return PlainHTTPConnection(self.host, self.port)
+
+    def send(self, method, path, body=None, headers=None, timeout=None):
+        """
+        Send a request over a pooled connection and return the Response. The
+        'timeout' (a Timeout instance) covers waiting for a free connection,
+        connecting, every read and, with its total, the whole request.
+        """
+        if timeout is None:
+            timeout = Timeout()
+        expires_at = None if timeout.total is None else time.monotonic() + timeout.total
+        with self.pool.connection(timeout=timeout.total) as conn:
+            conn.set_timeouts(_cap(timeout.connect, expires_at), _cap(timeout.read, expires_at))
+            conn.request(method, self.prefix + path, body, headers or {})
+            response = conn.getresponse()
+            data = _read_body(conn, response, timeout.read, expires_at)
+            return Response(response.status, response.reason, response.getheaders(), data)
+
+    def close(self):
+        self.pool.close()
+
+
+class AsyncHTTPTransport(Transport):
+    """
+    The asyncio counterpart of HTTPTransport. send() and close() are
+    coroutines.
+    """
+
+    def __init__(self, base_url=ROBOT_URL, *, pool_size=4, pool_idle_timeout=15.0, connect_timeout=None):
+        super().__init__(base_url)
+        self.connect_timeout = connect_timeout
+        self.pool = AsyncConnectionPool(self.new_connection, size=pool_size, idle_timeout=pool_idle_timeout)
+
+    def new_connection(self):
+        return AsyncHTTPSConnection(self.host, self.port, connect_timeout=self.connect_timeout, tls=self.tls)
+
+    async def send(self, method, path, body=None, headers=None, timeout=None):
+        total = None if timeout is None else timeout.total
+        async with asyncio.timeout(total), self.pool.connection() as conn:
+            return await conn.request(method, self.prefix + path, body, headers)
+
+    async def close(self):
+        await self.pool.close()
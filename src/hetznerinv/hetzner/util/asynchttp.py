@@ -0,0 +1,145 @@
+import asyncio
+import contextlib
+import ssl
+from http.client import RemoteDisconnected
+
+from .http import get_ssl_context, tls_sessions
+
+__all__ = ["AsyncHTTPResponse", "AsyncHTTPSConnection"]
+
+
+class AsyncHTTPResponse:
+    def __init__(self, status, reason, headers, body):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+    def read(self):
+        return self.body
+
+
+class AsyncHTTPSConnection:
+    """
+    A minimal HTTP/1.1 client connection on top of asyncio streams.
+
+    It speaks just enough HTTP for the Robot webservice: one request at a
+    time, keep-alive, and bodies delimited by Content-Length, chunked
+    transfer encoding or the end of the connection.
+    """
+
+    def __init__(self, host, port=443, ssl_context=None, connect_timeout=None, tls=True):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        # Without TLS this speaks plain HTTP, for local stand-ins of Robot.
+        if not tls:
+            self.ssl_context = None
+        else:
+            self.ssl_context = ssl_context if ssl_context is not None else get_ssl_context()
+        self.will_close = False
+        self._reader = None
+        self._writer = None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                self.host,
+                self.port,
+                ssl=self.ssl_context,
+                server_hostname=self.host if self.ssl_context is not None else None,
+            ),
+            self.connect_timeout,
+        )
+        self.will_close = False
+        # asyncio has no way to pass a session to resume, but the handshake is
+        # still counted so the statistics cover both clients.
+        ssl_object = self._writer.get_extra_info("ssl_object")
+        if ssl_object is not None:
+            tls_sessions.record(ssl_object.session_reused)
+
+    async def request(self, method, path, body=None, headers=None):
+        """
+        Send a request and return the complete AsyncHTTPResponse.
+        """
+        if self._writer is None or self.will_close:
+            await self.close()
+            await self.connect()
+
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        default_port = 443 if self.ssl_context is not None else 80
+        host = self.host if self.port == default_port else f"{self.host}:{self.port}"
+        request_headers = {"Host": host, "Connection": "keep-alive"}
+        request_headers.update(headers or {})
+        if body is not None:
+            request_headers["Content-Length"] = str(len(body))
+
+        head = [f"{method} {path} HTTP/1.1"]
+        head += [f"{name}: {value}" for name, value in request_headers.items()]
+        self._writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if body is not None:
+            self._writer.write(body)
+        await self._writer.drain()
+        return await self._read_response(method)
+
+    async def _read_response(self, method):
+        status_line = await self._reader.readline()
+        if not status_line:
+            # Same error http.client raises when a keep-alive connection has
+            # been closed by the server in the meantime.
+            self.will_close = True
+            raise RemoteDisconnected("Remote end closed connection without response")
+
+        version, _, rest = status_line.decode("latin-1").rstrip("\r\n").partition(" ")
+        status, _, reason = rest.partition(" ")
+        status = int(status)
+
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in {b"\r\n", b"\n", b""}:
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if method == "HEAD" or status in {204, 304} or 100 <= status < 200:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._read_chunked()
+        elif "content-length" in headers:
+            body = await self._reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self._reader.read()
+            self.will_close = True
+
+        if headers.get("connection", "").lower() == "close" or version == "HTTP/1.0":
+            self.will_close = True
+        return AsyncHTTPResponse(status, reason, headers, body)
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size_line = await self._reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                # Skip optional trailers up to the terminating empty line.
+                while (await self._reader.readline()) not in {b"\r\n", b"\n", b""}:
+                    pass
+                return b"".join(chunks)
+            chunks.append(await self._reader.readexactly(size))
+            await self._reader.readexactly(2)
+
+    async def close(self):
+        if self._writer is None:
+            return
+        writer = self._writer
+        self._reader = None
+        self._writer = None
+        writer.close()
+        with contextlib.suppress(OSError, ssl.SSLError):
+            await writer.wait_closed()
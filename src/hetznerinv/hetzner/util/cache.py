@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+
+from .ratelimit import endpoint_of
+
+__all__ = ["DEFAULT_TTLS", "ResponseCache"]
+
+# The reset endpoint reports the current operating status, which callers
+# poll while waiting for a reboot, so it is never cached by default.
+DEFAULT_TTLS = {"/reset": 0.0}
+
+
+class ResponseCache:
+    """
+    Keeps the bodies of successful GET responses for a while, keyed by the
+    request path including the query string.
+
+    Entries expire after a TTL that depends on the endpoint, the first path
+    segment, as given in 'ttls' (a TTL of zero disables caching for the
+    endpoint), falling back to 'ttl' seconds. Once the cached bodies take up
+    more than 'max_bytes', the least recently used ones are evicted.
+
+    Bodies are stored as received rather than decoded, so callers can't
+    change what later callers get by modifying a response.
+
+    A response that was requested before an invalidation of its endpoint may
+    predate the change, so callers pass the generation() from when they sent
+    the request to put(), which drops the body if it is outdated.
+    """
+
+    def __init__(self, ttl=60.0, ttls=None, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._cleared = 0
+        self._lock = threading.Lock()
+
+    def ttl_for(self, path):
+        return self.ttls.get(endpoint_of(path), self.ttl)
+
+    def get(self, path):
+        """
+        Return the cached body for 'path' or None if there is no fresh one.
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(path)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, path):
+        """
+        Return a token that changes whenever the endpoint 'path' belongs to
+        is invalidated or the cache is cleared.
+        """
+        with self._lock:
+            return self._cleared, self._generations.get(endpoint_of(path), 0)
+
+    def put(self, path, body, generation=None):
+        """
+        Cache 'body' for 'path', unless 'generation' is given and the
+        endpoint was invalidated since generation() returned it.
+        """
+        ttl = self.ttl_for(path)
+        if not ttl or ttl <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            current = (self._cleared, self._generations.get(endpoint_of(path), 0))
+            if generation is not None and generation != current:
+                return
+            if path in self._entries:
+                self._remove(path)
+            self._entries[path] = (time.monotonic() + ttl, body)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, path):
+        _, body = self._entries.pop(path)
+        self.size -= len(body)
+
+    def invalidate(self, path):
+        """
+        Drop every entry of the endpoint 'path' belongs to. A change to one
+        resource, such as renaming a server, also changes the listings it is
+        part of, which may have other paths and query strings.
+        """
+        endpoint = endpoint_of(path)
+        with self._lock:
+            self._generations[endpoint] = self._generations.get(endpoint, 0) + 1
+            for key in [key for key in self._entries if endpoint_of(key) == endpoint]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._cleared += 1
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
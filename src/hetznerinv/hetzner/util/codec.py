@@ -0,0 +1,70 @@
+import json
+import threading
+import zlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = ["ACCEPT_ENCODING", "TransferStats", "decode_body", "loads"]
+
+# Robot answers with gzip if asked to, deflate is accepted for completeness.
+ACCEPT_ENCODING = "gzip, deflate"
+
+
+def loads(data):
+    """
+    Decode JSON directly from bytes, using orjson if it is installed.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_body(body, content_encoding=None):
+    """
+    Undo the 'content_encoding' of a response body.
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding in {"identity", ""}:
+        return body
+    if encoding in {"gzip", "x-gzip"}:
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send a raw deflate stream without zlib header.
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    raise ValueError(f"Unsupported content encoding {content_encoding!r}")
+
+
+class TransferStats:
+    """
+    Thread-safe counters of response bytes per endpoint, both as received on
+    the wire and after decompression.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, wire_bytes, decoded_bytes):
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {"requests": 0, "wire_bytes": 0, "decoded_bytes": 0})
+            entry["requests"] += 1
+            entry["wire_bytes"] += wire_bytes
+            entry["decoded_bytes"] += decoded_bytes
+
+    def stats(self):
+        """
+        Return a dict mapping endpoints to dicts with the number of
+        'requests' and the sum of 'wire_bytes' and 'decoded_bytes'.
+        """
+        with self._lock:
+            return {endpoint: dict(entry) for endpoint, entry in self._endpoints.items()}
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
@@ -1,12 +1,21 @@
+import contextlib
+import functools
 import os
 import socket
 import ssl
-from http.client import HTTPSConnection
-from tempfile import NamedTemporaryFile
+import threading
+from http.client import HTTPConnection, HTTPSConnection
 
+__all__ = [
+    "PlainHTTPConnection",
+    "TLSSessionCache",
+    "ValidatedHTTPSConnection",
+    "get_ca_cert_bundle",
+    "get_ssl_context",
+    "tls_sessions",
+]
 
-class ValidatedHTTPSConnection(HTTPSConnection):
-    CA_ROOT_CERT_FALLBACK = """
+CA_ROOT_CERT_FALLBACK = """
         DigiCert Global Root G2
         -----BEGIN CERTIFICATE-----
         MIIDjjCCAnagAwIBAgIQAzrx5qcRqaC7KGSxHQn65TANBgkqhkiG9w0BAQsFADBh
@@ -32,30 +41,152 @@ class ValidatedHTTPSConnection(HTTPSConnection):
         -----END CERTIFICATE-----
     """
 
+
+def get_ca_cert_bundle():
+    """
+    Return the path of the system CA bundle or None if none could be found.
+    """
+    via_env = os.getenv("SSL_CERT_FILE")
+    if via_env is not None and os.path.exists(via_env):
+        return via_env
+    probe_paths = [
+        "/etc/ssl/certs/ca-certificates.crt",
+        "/etc/ssl/certs/ca-bundle.crt",
+        "/etc/pki/tls/certs/ca-bundle.crt",
+    ]
+    for path in probe_paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+_ssl_context_lock = threading.Lock()
+
+
+@functools.cache
+def _create_ssl_context():
+    bundle = get_ca_cert_bundle()
+    if bundle is None:
+        cadata = "\n".join(map(str.strip, CA_ROOT_CERT_FALLBACK.splitlines()))
+        return ssl.create_default_context(cadata=cadata)
+    return ssl.create_default_context(cafile=bundle)
+
+
+def get_ssl_context():
+    """
+    Return the process-wide SSL context, which is created on first use.
+
+    It trusts the system CA bundle or, if there is none, the embedded
+    DigiCert root, which is loaded from memory.
+    """
+    # TLS sessions can only be resumed with the context that created them, so
+    # make sure concurrent first calls don't end up with different contexts.
+    with _ssl_context_lock:
+        return _create_ssl_context()
+
+
+class TLSSessionCache:
+    """
+    Remembers the last TLS session per (host, port), so new connections can
+    resume it instead of doing a full handshake, and counts both kinds of
+    handshakes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self.full_handshakes = 0
+        self.resumed_handshakes = 0
+
+    def get(self, key):
+        with self._lock:
+            return self._sessions.get(key)
+
+    def store(self, key, session):
+        if session is None:
+            return
+        with self._lock:
+            self._sessions[key] = session
+
+    def record(self, resumed):
+        with self._lock:
+            if resumed:
+                self.resumed_handshakes += 1
+            else:
+                self.full_handshakes += 1
+
+    def stats(self):
+        with self._lock:
+            return {"full": self.full_handshakes, "resumed": self.resumed_handshakes}
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self.full_handshakes = 0
+            self.resumed_handshakes = 0
+
+
+tls_sessions = TLSSessionCache()
+
+
+class ValidatedHTTPSConnection(HTTPSConnection):
+    CA_ROOT_CERT_FALLBACK = CA_ROOT_CERT_FALLBACK
+
+    # Timeout for establishing the connection including the TLS handshake,
+    # self.timeout is used if this is None.
+    connect_timeout = None
+
     def get_ca_cert_bundle(self):
-        via_env = os.getenv("SSL_CERT_FILE")
-        if via_env is not None and os.path.exists(via_env):
-            return via_env
-        probe_paths = [
-            "/etc/ssl/certs/ca-certificates.crt",
-            "/etc/ssl/certs/ca-bundle.crt",
-            "/etc/pki/tls/certs/ca-bundle.crt",
-        ]
-        for path in probe_paths:
-            if os.path.exists(path):
-                return path
-        return None
+        return get_ca_cert_bundle()
+
+    def set_timeouts(self, connect, read):
+        """
+        Use 'connect' seconds for establishing the connection and 'read'
+        seconds for every socket operation after that.
+        """
+        self.connect_timeout = connect
+        self.timeout = read
+        if self.sock is not None:
+            self.sock.settimeout(read)
 
     def connect(self):
-        context = ssl.create_default_context()
-        with socket.create_connection(
-            (self.host, self.port), timeout=self.timeout, source_address=self.source_address
-        ) as sock:
-            bundle = self.get_ca_cert_bundle()
-            if bundle is None:
-                with NamedTemporaryFile() as ca_certs:
-                    ca_certs.write("\n".join(map(str.strip, self.CA_ROOT_CERT_FALLBACK.splitlines())).encode("ascii"))
-                    ca_certs.flush()
-                    self.sock = context.wrap_socket(sock, server_hostname=self.host, do_handshake_on_connect=True)
-            else:
-                self.sock = context.wrap_socket(sock, server_hostname=self.host, do_handshake_on_connect=True)
+        key = (self.host, self.port)
+        timeout = self.timeout if self.connect_timeout is None else self.connect_timeout
+        sock = socket.create_connection((self.host, self.port), timeout=timeout, source_address=self.source_address)
+        try:
+            self.sock = get_ssl_context().wrap_socket(
+                sock, server_hostname=self.host, do_handshake_on_connect=True, session=tls_sessions.get(key)
+            )
+        except BaseException:
+            sock.close()
+            raise
+        if self.connect_timeout is not None:
+            self.sock.settimeout(self.timeout)
+        tls_sessions.record(self.sock.session_reused)
+        tls_sessions.store(key, self.sock.session)
+
+    def close(self):
+        # With TLS 1.3 the session ticket only arrives after the handshake, so
+        # remember the session again before the socket goes away.
+        if isinstance(self.sock, ssl.SSLSocket):
+            with contextlib.suppress(OSError, ValueError):
+                tls_sessions.store((self.host, self.port), self.sock.session)
+        super().close()
+
+
+class PlainHTTPConnection(HTTPConnection):
+    """
+    An unencrypted connection with the same timeout handling as
+    ValidatedHTTPSConnection, for local stand-ins of the Robot webservice.
+    """
+
+    connect_timeout = None
+
+    set_timeouts = ValidatedHTTPSConnection.set_timeouts
+
+    def connect(self):
+        timeout = self.timeout if self.connect_timeout is None else self.connect_timeout
+        self.sock = socket.create_connection(
+            (self.host, self.port), timeout=timeout, source_address=self.source_address
+        )
+        self.sock.settimeout(self.timeout)
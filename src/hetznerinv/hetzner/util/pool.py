@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+__all__ = ["AsyncConnectionPool", "ConnectionPool", "PoolTimeout"]
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of keep-alive connections.
+
+    At most 'size' connections are handed out at the same time, callers
+    beyond that block until a connection is released (or 'timeout' runs out).
+    Released connections are kept for reuse and closed once they have been
+    idle for longer than 'idle_timeout' seconds.
+    """
+
+    def __init__(self, factory, size=4, idle_timeout=15.0):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.factory = factory
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        # Stack of (connection, released_at), most recently used last.
+        self._idle = []
+
+    def _reap(self, now):
+        """
+        Close connections that have been idle for too long. Must be called
+        with self._lock held.
+        """
+        if self.idle_timeout is None:
+            return
+        fresh = []
+        for conn, released_at in self._idle:
+            if now - released_at > self.idle_timeout:
+                conn.close()
+            else:
+                fresh.append((conn, released_at))
+        self._idle = fresh
+
+    def acquire(self, timeout=None):
+        """
+        Return an idle connection or a new one if none is available. Blocks
+        while all connections are in use.
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolTimeout(f"No connection available within {timeout} seconds.")
+        try:
+            with self._lock:
+                self._reap(time.monotonic())
+                if self._idle:
+                    return self._idle.pop()[0]
+            return self.factory()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, discard=False):
+        """
+        Hand a connection back to the pool. If 'discard' is True, the
+        connection is closed instead, for example after a protocol error.
+        """
+        try:
+            if discard:
+                conn.close()
+            else:
+                with self._lock:
+                    now = time.monotonic()
+                    self._idle.append((conn, now))
+                    self._reap(now)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Context manager around acquire() and release(), which discards the
+        connection if the block raises.
+        """
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except BaseException:
+            self.release(conn, discard=True)
+            raise
+        self.release(conn)
+
+    @property
+    def idle(self):
+        with self._lock:
+            return len(self._idle)
+
+    def close(self):
+        """
+        Close all idle connections.
+        """
+        with self._lock:
+            for conn, _ in self._idle:
+                conn.close()
+            self._idle = []
+
+
+class AsyncConnectionPool:
+    """
+    The asyncio counterpart of ConnectionPool. Connections are expected to
+    provide a coroutine close() method.
+    """
+
+    def __init__(self, factory, size=4, idle_timeout=15.0):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.factory = factory
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+
+    def _take_stale(self, now):
+        if self.idle_timeout is None:
+            return []
+        stale = [conn for conn, released_at in self._idle if now - released_at > self.idle_timeout]
+        self._idle = [(conn, released_at) for conn, released_at in self._idle if conn not in stale]
+        return stale
+
+    async def acquire(self, timeout=None):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except TimeoutError as err:
+            raise PoolTimeout(f"No connection available within {timeout} seconds.") from err
+        try:
+            for conn in self._take_stale(time.monotonic()):
+                await conn.close()
+            if self._idle:
+                return self._idle.pop()[0]
+            return self.factory()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, conn, discard=False):
+        try:
+            if discard:
+                await conn.close()
+            else:
+                now = time.monotonic()
+                self._idle.append((conn, now))
+                for stale in self._take_stale(now):
+                    await stale.close()
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self, timeout=None):
+        conn = await self.acquire(timeout)
+        try:
+            yield conn
+        except BaseException:
+            await self.release(conn, discard=True)
+            raise
+        await self.release(conn)
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            await conn.close()
@@ -0,0 +1,154 @@
+import threading
+import time
+
+from .. import RateLimitExceeded
+
+__all__ = ["RateLimiter", "TokenBucket", "endpoint_of"]
+
+
+def endpoint_of(path):
+    """
+    Return the endpoint Robot accounts a request to 'path' against, which is
+    its first path segment, for example "/server" for "/server/1.2.3.4".
+    """
+    segment = path.split("?", 1)[0].lstrip("/").split("/", 1)[0]
+    return "/" + segment
+
+
+class TokenBucket:
+    """
+    Allows 'capacity' requests per 'interval' seconds, refilled continuously.
+
+    Tokens are reserved rather than waited for: reserve() takes a token even
+    if none is left yet and returns how long the caller has to wait until
+    that token has been refilled, so blocking and asyncio callers can share
+    a bucket. Not thread-safe on its own, see RateLimiter.
+    """
+
+    def __init__(self, capacity, interval):
+        self.capacity = capacity
+        self.interval = interval
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self):
+        return self.capacity / self.interval
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, max_wait=None):
+        """
+        Take a token and return the seconds to wait before using it, or None
+        without taking a token if the wait would be longer than 'max_wait'.
+        """
+        self._refill()
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        if max_wait is not None and wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+    def drain(self):
+        """
+        Drop all tokens left, for when the server says the limit is reached.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+    @property
+    def remaining(self):
+        self._refill()
+        return max(0, int(self.tokens))
+
+
+class RateLimiter:
+    """
+    Per-endpoint request budgets for one Robot account.
+
+    'limits' maps endpoints to (requests, interval) tuples. A key is either
+    an endpoint like "/reset", which then counts requests of all methods, or
+    a method and an endpoint like "POST /reset"; the latter wins if both
+    match. Requests to endpoints without a limit aren't delayed, unless
+    Robot reports a rate limit for them, which is then adopted.
+
+    Requests that would have to wait longer than 'max_wait' seconds for the
+    budget to refill fail with RateLimitExceeded instead.
+    """
+
+    def __init__(self, limits=None, max_wait=60.0):
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._buckets = {key: TokenBucket(*limit) for key, limit in (limits or {}).items()}
+
+    def _key(self, method, path):
+        endpoint = endpoint_of(path)
+        for key in (f"{method.upper()} {endpoint}", endpoint):
+            if key in self._buckets:
+                return key
+        return None
+
+    def reserve(self, method, path, max_wait=None):
+        """
+        Take a token for the request and return the seconds to wait before
+        sending it. 'max_wait' further limits the configured maximum wait.
+        """
+        if max_wait is None or (self.max_wait is not None and self.max_wait < max_wait):
+            max_wait = self.max_wait
+        with self._lock:
+            key = self._key(method, path)
+            if key is None:
+                return 0.0
+            wait = self._buckets[key].reserve(max_wait)
+        if wait is None:
+            raise RateLimitExceeded(f"Request budget for {key} exhausted, not waiting longer than {max_wait} seconds")
+        return wait
+
+    def acquire(self, method, path, max_wait=None):
+        """
+        Like reserve(), but sleep until the request may be sent.
+        """
+        wait = self.reserve(method, path, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+
+    def exhausted(self, method, path, max_request=None, interval=None):
+        """
+        Record that Robot rejected a request because of its rate limit, so
+        further requests wait for the budget to refill. If Robot reported
+        the limit, it replaces the configured one.
+
+        Return whether a bucket limits the endpoint. If not, neither Robot
+        nor the configuration said how long to wait.
+        """
+        with self._lock:
+            key = self._key(method, path) or f"{method.upper()} {endpoint_of(path)}"
+            bucket = self._buckets.get(key)
+            if (
+                max_request
+                and interval
+                and (bucket is None or (bucket.capacity, bucket.interval) != (max_request, interval))
+            ):
+                bucket = self._buckets[key] = TokenBucket(max_request, interval)
+            if bucket is not None:
+                bucket.drain()
+            return bucket is not None
+
+    def remaining(self, method, path):
+        """
+        Return the number of requests to 'path' that can be sent right away,
+        or None if they aren't limited.
+        """
+        with self._lock:
+            key = self._key(method, path)
+            return None if key is None else self._buckets[key].remaining
+
+    def budgets(self):
+        """
+        Return a dict of all limited endpoints and their remaining requests.
+        """
+        with self._lock:
+            return {key: bucket.remaining for key, bucket in self._buckets.items()}
@@ -0,0 +1,97 @@
+import random
+import time
+from http.client import HTTPException
+
+from .. import DeadlineExceeded, RequestTimeout
+
+__all__ = ["RetryPolicy"]
+
+
+class RetryPolicy:
+    """
+    Decides whether and when a failed request is sent again.
+
+    Connection errors (resets, stale keep-alive connections), timeouts and
+    the HTTP statuses in 'statuses' are retried up to 'max_attempts' times
+    in total, as long as 'max_elapsed' seconds since the first attempt
+    haven't passed. The delay before attempt n + 1 is drawn uniformly from
+    [0, min(max_backoff, backoff * 2 ** (n - 1))] ("full jitter"), so many
+    clients hitting the same hiccup don't come back in lockstep.
+
+    Only requests with a method in 'methods' are retried automatically, by
+    default the idempotent GET, HEAD and DELETE. Others, most importantly
+    POST and PUT, are retried only if the caller explicitly marks the
+    request as idempotent.
+    """
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "DELETE"})
+
+    def __init__(
+        self,
+        *,
+        max_attempts=4,
+        backoff=0.5,
+        max_backoff=8.0,
+        max_elapsed=60.0,
+        statuses=(500, 502, 503, 504),
+        methods=IDEMPOTENT_METHODS,
+    ):
+        if max_attempts < 1:
+            raise ValueError("At least one attempt is required.")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_elapsed = max_elapsed
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+
+    @classmethod
+    def never(cls):
+        """
+        A policy that sends every request exactly once.
+        """
+        return cls(max_attempts=1)
+
+    def allows(self, method, idempotent=None):
+        """
+        Whether requests with 'method' may be retried at all. 'idempotent'
+        overrides the decision for a single request if it isn't None.
+        """
+        if idempotent is not None:
+            return idempotent
+        return method.upper() in self.methods
+
+    def retryable_error(self, err):
+        """
+        Whether 'err' is a transient failure worth another attempt.
+        """
+        if isinstance(err, DeadlineExceeded):
+            return False
+        return isinstance(err, ConnectionError | HTTPException | RequestTimeout | TimeoutError)
+
+    def retryable_status(self, status):
+        return status in self.statuses
+
+    def next_delay(self, attempt, started, deadline=None):
+        """
+        Return the number of seconds to wait before the attempt following
+        'attempt' (counted from 1), or None if no further attempt should be
+        made because the attempts, the elapsed time or the deadline would be
+        exceeded.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        if self.max_elapsed is not None and time.monotonic() - started + delay > self.max_elapsed:
+            return None
+        if deadline is not None:
+            remaining = deadline.remaining()
+            if remaining is not None and remaining <= delay:
+                return None
+        return delay
+
+    def __repr__(self):
+        return (
+            f"<RetryPolicy max_attempts={self.max_attempts} backoff={self.backoff} "
+            f"max_backoff={self.max_backoff} max_elapsed={self.max_elapsed}>"
+        )
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+
+from .ratelimit import endpoint_of
+
+__all__ = ["AsyncSingleFlight", "SingleFlight"]
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Lets concurrent callers asking for the same key share one call: the first
+    caller runs it, the others wait for it and get its result, or its
+    exception raised again.
+
+    Keys are request paths. forget() makes callers that arrive later start a
+    call of their own, for example after a request changed the resource.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args):
+        """
+        Return func(*args), or the result of the call of 'func' that is
+        already in flight for 'key'.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def forget(self, path):
+        """
+        Stop sharing the calls in flight for the endpoint 'path' belongs to.
+        Their current callers still get their results.
+        """
+        endpoint = endpoint_of(path)
+        with self._lock:
+            for key in [key for key in self._calls if endpoint_of(key) == endpoint]:
+                del self._calls[key]
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    The asyncio counterpart of SingleFlight. The shared call runs as a task
+    of its own, so a caller being cancelled doesn't cancel it for the others.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._calls = {}
+
+    async def do(self, key, func, *args):
+        """
+        Return await func(*args), or the result of the call of 'func' that
+        is already in flight for 'key'.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(func(*args))
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Nobody may be waiting for the result anymore.
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self, path):
+        """
+        See SingleFlight.forget().
+        """
+        endpoint = endpoint_of(path)
+        for key in [key for key in self._calls if endpoint_of(key) == endpoint]:
+            del self._calls[key]
+
+    def __len__(self):
+        return len(self._calls)
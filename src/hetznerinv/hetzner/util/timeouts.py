@@ -0,0 +1,67 @@
+import time
+
+from .. import DeadlineExceeded
+
+__all__ = ["Deadline", "Timeout"]
+
+
+class Timeout:
+    """
+    Timeouts in seconds for a single request: 'connect' covers the TCP and TLS
+    handshake, 'read' every single socket read and 'total' the whole request
+    including reading the response body. None disables the respective limit.
+    """
+
+    def __init__(self, connect=10.0, read=60.0, total=120.0):
+        self.connect = connect
+        self.read = read
+        self.total = total
+
+    def __repr__(self):
+        return f"<Timeout connect={self.connect} read={self.read} total={self.total}>"
+
+
+class Deadline:
+    """
+    A time budget for a whole operation, such as one CLI command. Every
+    request checks the remaining budget before it is sent and caps its own
+    timeouts to it. A Deadline created with None never expires.
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self):
+        """
+        Seconds left until the deadline (never negative) or None if there is
+        no deadline.
+        """
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self, what="Operation"):
+        """
+        Raise DeadlineExceeded if the budget has been used up.
+        """
+        if self.expired:
+            raise DeadlineExceeded(f"{what} aborted, deadline of {self.seconds} seconds exceeded")
+
+    def cap(self, timeout):
+        """
+        Return 'timeout' limited to the remaining budget.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def __repr__(self):
+        return f"<Deadline remaining={self.remaining()}>"
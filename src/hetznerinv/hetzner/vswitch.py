@@ -1,8 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import ClassVar
 
 from . import RobotError
 
-__all__ = ["Vswitch", "VswitchManager"]
+__all__ = ["Vswitch", "VswitchIndex", "VswitchManager"]
 
 
 class Vswitch:
@@ -22,25 +23,92 @@ class Vswitch:
                 setattr(self, attr, value)
 
 
+class VswitchIndex:
+    """
+    Lookups over vSwitches with their details, keyed by ID: the vSwitch a
+    server is attached to, the servers attached to a vSwitch and the
+    vSwitches using a VLAN. If a server is attached to several vSwitches,
+    the one listed last wins.
+    """
+
+    def __init__(self, vswitches):
+        self.vswitches = dict(vswitches)
+        self._by_server_ip = {}
+        self._by_vlan = {}
+        for vswitch in self.vswitches.values():
+            for server in vswitch.server:
+                self._by_server_ip[server["server_ip"]] = vswitch
+            self._by_vlan.setdefault(vswitch.vlan, []).append(vswitch)
+
+    def vswitch_of(self, server_ip):
+        """
+        Return the vSwitch the server with main IP 'server_ip' is attached
+        to, or None.
+        """
+        return self._by_server_ip.get(server_ip)
+
+    def servers_of(self, vswitch_id):
+        """
+        Return the servers attached to a vSwitch, as dicts like Robot sends
+        them with "server_ip", "server_number" and "status".
+        """
+        vswitch = self.vswitches.get(vswitch_id)
+        return list(vswitch.server) if vswitch is not None else []
+
+    def with_vlan(self, vlan):
+        return list(self._by_vlan.get(vlan, ()))
+
+    def __len__(self):
+        return len(self.vswitches)
+
+
 class VswitchManager:
     def __init__(self, conn, servers):
         self.conn = conn
         self.servers = servers
+        # vSwitch ID -> (entry of the vSwitch list, Vswitch with details)
+        self._details = {}
+
+    def list(self, details=True, refresh=False, max_workers=None):
+        """
+        Return all vSwitches keyed by ID.
 
-    def list(self):
-        vswitchs = {}
+        Unless 'details' is False, in which case the vSwitches only have
+        their ID, name and VLAN, the details including the attached servers
+        are requested for every vSwitch, up to 'max_workers' at a time (by
+        default as many as the connection allows). They are kept and only
+        requested again for vSwitches whose entry in the vSwitch list
+        changed, or for all of them if 'refresh' is set.
+
+        The vSwitch list doesn't include the attached servers, so servers
+        attached or detached other than with add_servers() only show up
+        with 'refresh'.
+        """
         try:
-            vswitches = self.conn.get("/vswitch")
+            summaries = self.conn.get("/vswitch")
         except RobotError as err:
             if err.status == 404:
-                return vswitchs
+                summaries = []
             else:
                 raise
-        for v in vswitches:
-            vswitch = Vswitch(self.conn.get("/vswitch/{}".format(v["id"])))
-            vswitchs[vswitch.id] = vswitch
-        return vswitchs
+        if not details:
+            return {v["id"]: Vswitch(v) for v in summaries}
+
+        known = dict(self._details)
+        outdated = [v for v in summaries if refresh or v["id"] not in known or known[v["id"]][0] != v]
+        if outdated:
+            max_workers = min(len(outdated), max_workers or self.conn.concurrency)
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="robot-vswitch") as pool:
+                fetched = list(pool.map(lambda v: self.conn.get("/vswitch/{}".format(v["id"])), outdated))
+            for v, data in zip(outdated, fetched, strict=True):
+                known[v["id"]] = (v, Vswitch(data))
+        self._details = {v["id"]: known[v["id"]] for v in summaries}
+        return {vswitch_id: vswitch for vswitch_id, (_, vswitch) in self._details.items()}
 
     def add_servers(self, switch, servers):
         ips = [s.ip for s in servers if s.ip is not None]
-        return self.conn.post(f"vswitch/{switch.id}/server", {"server": ips})
+        unknown = [ip for ip in ips if self.servers.by_ip(ip) is None]
+        if unknown:
+            raise RobotError(f"Invalid servers {unknown}. They are not in your server list.")
+        self._details.pop(switch.id, None)
+        return self.conn.request("POST", f"/vswitch/{switch.id}/server", {"server": ips}, allow_empty=True)
@@ -0,0 +1,112 @@
+"""SQLite-backed leases of cluster subnet addresses, so servers keep their addresses between inventory runs."""
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+SCHEMA_VERSION = 1
+
+
+class Lease(NamedTuple):
+    """The address `ip` of the cluster subnet `subnet` leased to the server with ID `server_id`."""
+
+    subnet: str
+    server_id: int
+    ip: str
+    allocated_at: float
+    released: bool
+
+
+class LeaseStore:
+    """
+    Remembers which address of each cluster subnet a server was given and when, keyed by server ID.
+
+    Servers keep their leases until they are released with `reclaim()`. Released leases stay in the store, but
+    their addresses may be handed out again.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path).expanduser()
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+        with self._transaction():
+            self._db.execute(
+                "CREATE TABLE leases (subnet TEXT, server_id INTEGER, ip TEXT, allocated_at REAL, released INTEGER,"
+                " PRIMARY KEY (subnet, server_id))"
+            )
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "LeaseStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> list[Lease]:
+        with self._lock:
+            rows = self._db.execute(f"SELECT subnet, server_id, ip, allocated_at, released FROM leases{sql}", params)
+            return [
+                Lease(subnet, server_id, ip, allocated_at, bool(released))
+                for subnet, server_id, ip, allocated_at, released in rows
+            ]
+
+    def get(self, subnet: str, server_id: int) -> Lease | None:
+        """The lease of the server with ID `server_id` in `subnet`, unless there is none or it was released."""
+        leases = self._query(" WHERE subnet = ? AND server_id = ? AND NOT released", (subnet, server_id))
+        return leases[0] if leases else None
+
+    def leases(self, subnet: str | None = None, released: bool = False) -> list[Lease]:
+        """The leases of `subnet` or of all subnets, ordered by server ID, including released ones if `released`."""
+        conditions, params = [], ()
+        if subnet is not None:
+            conditions.append("subnet = ?")
+            params = (subnet,)
+        if not released:
+            conditions.append("NOT released")
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return self._query(f"{where} ORDER BY subnet, server_id", params)
+
+    def acquire(self, subnet: str, server_id: int, ip: str) -> Lease:
+        """Lease `ip` of `subnet` to the server with ID `server_id`, replacing any lease it had there."""
+        lease = Lease(subnet, server_id, ip, time.time(), False)
+        with self._transaction():
+            self._db.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?, ?, ?)", lease)
+        return lease
+
+    def reclaim(self, keep: Iterable[int]) -> list[Lease]:
+        """Release the leases of all servers whose IDs are not in `keep`; returns the released leases."""
+        keep = set(keep)
+        released = [lease for lease in self.leases() if lease.server_id not in keep]
+        with self._transaction():
+            self._db.executemany(
+                "UPDATE leases SET released = 1 WHERE subnet = ? AND server_id = ?",
+                [(lease.subnet, lease.server_id) for lease in released],
+            )
+        return [lease._replace(released=True) for lease in released]
@@ -0,0 +1,284 @@
+"""SQLite-backed store of fetched Robot and Cloud state, so commands can skip re-downloading fresh data."""
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from hcloud import Client
+from hcloud.servers import BoundServer
+
+from hetznerinv.cloud import get_all_server_data
+from hetznerinv.hetzner.robot import Robot
+from hetznerinv.hetzner.snapshot import RESOURCES as SNAPSHOT_RESOURCES
+from hetznerinv.hetzner.snapshot import FleetSnapshot
+from hetznerinv.hetzner.util.timeouts import Deadline
+
+SCHEMA_VERSION = 1
+
+
+def _cloud_ipv4(data: dict) -> str | None:
+    ipv4 = (data.get("public_net") or {}).get("ipv4")
+    return ipv4["ip"] if ipv4 else None
+
+
+class Resource:
+    """The table of one kind of record and the columns extracted from it for lookups."""
+
+    def __init__(
+        self,
+        table: str,
+        key: str,
+        columns: dict[str, Callable[[dict], Any]],
+        *,
+        indexes: Iterable[str] = (),
+    ):
+        self.table = table
+        self.key = key
+        self.columns = columns
+        self.indexes = tuple(indexes)
+
+    def row(self, env: str, record: dict, fetched_at: float) -> tuple:
+        values = [column(record) for column in self.columns.values()]
+        return (env, *values, json.dumps(record, separators=(",", ":")), fetched_at)
+
+
+RESOURCES = {
+    "servers": Resource(
+        "robot_servers",
+        "number",
+        {
+            "number": lambda d: d["server_number"],
+            "ip": lambda d: d["server_ip"],
+            "name": lambda d: d.get("server_name"),
+            "dc": lambda d: d.get("dc"),
+            "product": lambda d: d.get("product"),
+        },
+        indexes=("ip", "dc"),
+    ),
+    "vswitches": Resource(
+        "vswitches",
+        "id",
+        {"id": lambda d: d["id"], "vlan": lambda d: d.get("vlan"), "name": lambda d: d.get("name")},
+        indexes=("vlan",),
+    ),
+    "failovers": Resource(
+        "failovers",
+        "ip",
+        {
+            "ip": lambda d: d["ip"],
+            "server_ip": lambda d: d.get("server_ip"),
+            "active_server_ip": lambda d: d.get("active_server_ip"),
+        },
+        indexes=("server_ip", "active_server_ip"),
+    ),
+    "rdns": Resource("rdns", "ip", {"ip": lambda d: d["ip"], "ptr": lambda d: d.get("ptr")}),
+    "ips": Resource(
+        "ips",
+        "ip",
+        {"ip": lambda d: d["ip"], "server_ip": lambda d: d.get("server_ip")},
+        indexes=("server_ip",),
+    ),
+    "subnets": Resource(
+        "subnets",
+        "ip",
+        {"ip": lambda d: d["ip"], "mask": lambda d: d.get("mask"), "server_ip": lambda d: d.get("server_ip")},
+        indexes=("server_ip",),
+    ),
+    "cloud_servers": Resource(
+        "cloud_servers",
+        "id",
+        {
+            "id": lambda d: d["id"],
+            "name": lambda d: d.get("name"),
+            "ip": _cloud_ipv4,
+            "dc": lambda d: (d.get("datacenter") or {}).get("name"),
+        },
+        indexes=("ip", "dc", "name"),
+    ),
+}
+ROBOT_RESOURCES = tuple(SNAPSHOT_RESOURCES)
+
+
+class FleetStore:
+    """
+    Persists servers, vSwitches, failover IPs, reverse DNS entries, IPs, subnets and Cloud servers per environment.
+
+    Every record is kept as the JSON the API returned, next to indexed columns (server number, public IP,
+    datacenter, ...) for lookups. Each resource is replaced as a whole and remembers when it was fetched, so
+    callers can refresh just the resources older than `max_age` seconds.
+    """
+
+    def __init__(self, path: str | Path, max_age: float = 300.0):
+        self.path = Path(path).expanduser()
+        self.max_age = max_age
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+        with self._transaction():
+            for resource in RESOURCES.values():
+                self._db.execute(f"DROP TABLE IF EXISTS {resource.table}")
+            self._db.execute("DROP TABLE IF EXISTS vswitch_servers")
+            self._db.execute("DROP TABLE IF EXISTS fetches")
+            self._db.execute(
+                "CREATE TABLE fetches (env TEXT, resource TEXT, fetched_at REAL, PRIMARY KEY (env, resource))"
+            )
+            for resource in RESOURCES.values():
+                columns = ", ".join(resource.columns)
+                self._db.execute(
+                    f"CREATE TABLE {resource.table} (env TEXT, {columns}, data TEXT, fetched_at REAL,"
+                    f" PRIMARY KEY (env, {resource.key}))"
+                )
+                for column in resource.indexes:
+                    self._db.execute(f"CREATE INDEX {resource.table}_{column} ON {resource.table} (env, {column})")
+            self._db.execute(
+                "CREATE TABLE vswitch_servers (env TEXT, vswitch_id INTEGER, server_ip TEXT, server_number INTEGER)"
+            )
+            self._db.execute("CREATE INDEX vswitch_servers_ip ON vswitch_servers (env, server_ip)")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "FleetStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def fetched_at(self, env: str, resource: str) -> float | None:
+        """When `resource` was last saved for `env` (seconds since the epoch), or None if never."""
+        rows = self._query("SELECT fetched_at FROM fetches WHERE env = ? AND resource = ?", (env, resource))
+        return rows[0]["fetched_at"] if rows else None
+
+    def is_fresh(self, env: str, resource: str, max_age: float | None = None) -> bool:
+        fetched_at = self.fetched_at(env, resource)
+        max_age = self.max_age if max_age is None else max_age
+        return fetched_at is not None and time.time() - fetched_at <= max_age
+
+    def stale(self, env: str, resources: Iterable[str], max_age: float | None = None) -> list[str]:
+        """The `resources` that were never saved for `env` or are older than `max_age` seconds."""
+        return [resource for resource in resources if not self.is_fresh(env, resource, max_age)]
+
+    def save(self, env: str, resource: str, records: Iterable[dict], fetched_at: float | None = None) -> None:
+        """Replace all records of `resource` for `env`, as sent by the API but without Robot's envelopes."""
+        spec = RESOURCES[resource]
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        records = list(records)
+        rows = [spec.row(env, record, fetched_at) for record in records]
+        placeholders = ", ".join("?" * (len(spec.columns) + 3))
+        with self._transaction():
+            self._db.execute(f"DELETE FROM {spec.table} WHERE env = ?", (env,))
+            self._db.executemany(f"INSERT OR REPLACE INTO {spec.table} VALUES ({placeholders})", rows)
+            if resource == "vswitches":
+                self._db.execute("DELETE FROM vswitch_servers WHERE env = ?", (env,))
+                self._db.executemany(
+                    "INSERT INTO vswitch_servers VALUES (?, ?, ?, ?)",
+                    [
+                        (env, vswitch["id"], server.get("server_ip"), server.get("server_number"))
+                        for vswitch in records
+                        for server in vswitch.get("server") or []
+                    ],
+                )
+            self._db.execute("INSERT OR REPLACE INTO fetches VALUES (?, ?, ?)", (env, resource, fetched_at))
+
+    def load(self, env: str, resource: str, **where: Any) -> list[dict]:
+        """The saved records of `resource` for `env`, optionally filtered by indexed columns, e.g. `dc="FSN1-DC14"`."""
+        spec = RESOURCES[resource]
+        unknown = set(where) - set(spec.columns)
+        if unknown:
+            raise ValueError(f"Can't filter {resource} by {', '.join(sorted(unknown))}")
+        conditions = "".join(f" AND {column} = ?" for column in where)
+        rows = self._query(
+            f"SELECT data FROM {spec.table} WHERE env = ?{conditions} ORDER BY {spec.key}", (env, *where.values())
+        )
+        return [json.loads(row["data"]) for row in rows]
+
+    def server_by_number(self, env: str, number: int) -> dict | None:
+        servers = self.load(env, "servers", number=number)
+        return servers[0] if servers else None
+
+    def server_by_ip(self, env: str, ip: str) -> dict | None:
+        servers = self.load(env, "servers", ip=ip)
+        return servers[0] if servers else None
+
+    def servers_in_dc(self, env: str, dc: str) -> list[dict]:
+        return self.load(env, "servers", dc=dc)
+
+    def vswitch_of(self, env: str, server_ip: str) -> dict | None:
+        """The vSwitch the Robot server with main IP `server_ip` is attached to, if any."""
+        rows = self._query(
+            "SELECT v.data FROM vswitch_servers s JOIN vswitches v ON v.env = s.env AND v.id = s.vswitch_id"
+            " WHERE s.env = ? AND s.server_ip = ? ORDER BY v.id LIMIT 1",
+            (env, server_ip),
+        )
+        return json.loads(rows[0]["data"]) if rows else None
+
+    def snapshot(self, env: str, robot: Robot | None = None) -> FleetSnapshot:
+        """
+        The saved Robot resources of `env` as a snapshot, as old as its oldest resource. Without `robot`, its
+        servers aren't bound to a connection and can only be read.
+        """
+        fetched = [self.fetched_at(env, resource) for resource in ROBOT_RESOURCES]
+        fetched = [fetched_at for fetched_at in fetched if fetched_at is not None]
+        records = {resource: self.load(env, resource) for resource in ROBOT_RESOURCES}
+        return FleetSnapshot(robot.conn if robot else None, records, min(fetched, default=None))
+
+    def save_snapshot(self, env: str, snapshot: FleetSnapshot, resources: Iterable[str] = ROBOT_RESOURCES) -> None:
+        """Save the `resources` of a Robot `snapshot` for `env`, as fetched when it was taken."""
+        for resource in resources:
+            self.save(env, resource, snapshot.records[resource], snapshot.taken_at)
+
+    def cloud_servers(self, env: str, client: Client) -> list[BoundServer]:
+        """The saved Cloud servers of `env` bound to `client`."""
+        return [BoundServer(client.servers, data) for data in self.load(env, "cloud_servers")]
+
+    def refresh_robot(
+        self,
+        env: str,
+        robot: Robot,
+        resources: Iterable[str] = ROBOT_RESOURCES,
+        max_age: float | None = None,
+    ) -> list[str]:
+        """Fetch the stale Robot `resources` of `env` concurrently and save them; returns those refreshed."""
+        refreshed = self.stale(env, resources, max_age)
+        if refreshed:
+            self.save_snapshot(env, robot.snapshot(include=refreshed), refreshed)
+        return refreshed
+
+    def refresh_cloud(
+        self, env: str, client: Client, deadline: Deadline | None = None, max_age: float | None = None
+    ) -> bool:
+        """Fetch and save the Cloud servers of `env` if stale; returns whether they were refreshed."""
+        if self.is_fresh(env, "cloud_servers", max_age):
+            return False
+        self.save(env, "cloud_servers", get_all_server_data(client, deadline))
+        return True
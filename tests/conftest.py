@@ -0,0 +1,16 @@
+import pytest
+
+from hetznerinv.hetzner.fake import FakeRobot, Fleet
+
+
+@pytest.fixture
+def fake_robot(request):
+    """
+    A running FakeRobot serving a small synthetic fleet. Its arguments can be
+    changed with @pytest.mark.fake_robot(servers=..., vswitches=..., latency=...).
+    """
+    marker = request.node.get_closest_marker("fake_robot")
+    options = dict(marker.kwargs) if marker is not None else {}
+    fleet = Fleet(options.pop("servers", 20), options.pop("vswitches", 3))
+    with FakeRobot(fleet, seed=0, **options) as fake:
+        yield fake
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from hetznerinv.hetzner import RobotError
+from hetznerinv.hetzner.aio import AsyncRobot
+from hetznerinv.hetzner.transport import AsyncHTTPTransport
+from hetznerinv.hetzner.util.asynchttp import AsyncHTTPResponse
+
+SERVER = {
+    "server": {
+        "server_ip": "192.0.2.10",
+        "server_number": 321,
+        "server_name": "web1",
+        "product": "AX41",
+        "dc": "FSN1-DC14",
+        "traffic": "unlimited",
+        "status": "ready",
+        "cancelled": False,
+        "paid_until": "2030-01-01",
+    }
+}
+
+
+class FakeConnection:
+    def __init__(self, routes, calls):
+        self.routes = routes
+        self.calls = calls
+
+    async def request(self, method, path, body=None, headers=None):
+        self.calls.append((method, path, body))
+        status, payload = self.routes[(method, path)]
+        return AsyncHTTPResponse(status, "", {}, json.dumps(payload).encode())
+
+    async def close(self):
+        pass
+
+
+def make_robot(routes):
+    calls = []
+    robot = AsyncRobot("user", "secret")
+    robot.conn.transport.pool.factory = lambda: FakeConnection(routes, calls)
+    return robot, calls
+
+
+def test_async_server_listing():
+    robot, calls = make_robot({("GET", "/server"): (200, [SERVER])})
+    servers = asyncio.run(robot.servers.list())
+    assert [s.number for s in servers] == [321]
+    assert servers[0].ips.main_ip == "192.0.2.10"
+    assert calls == [("GET", "/server", None)]
+
+
+def test_async_robot_error_semantics():
+    error = {"error": {"status": 404, "code": "SERVER_NOT_FOUND", "message": "Server not found"}}
+    robot, _ = make_robot({("GET", "/server/192.0.2.99"): (404, error)})
+    with pytest.raises(RobotError) as err:
+        asyncio.run(robot.servers.get("192.0.2.99"))
+    assert err.value.status == 404
+    assert "Server not found" in str(err.value)
+
+
+def test_async_add_servers(fake_robot):
+    async def run():
+        transport = AsyncHTTPTransport(fake_robot.url)
+        async with AsyncRobot("robot", "secret", transport=transport) as robot:
+            servers = (await robot.servers.list())[:2]
+            vswitch = next(iter((await robot.vswitch.list()).values()))
+            assert await robot.vswitch.add_servers(vswitch, servers) is None
+            with pytest.raises(RobotError, match="not in your server list"):
+                await robot.vswitch.add_servers(vswitch, [SimpleNamespace(ip="203.0.113.1")])
+
+    asyncio.run(run())
+    assert fake_robot.requests["POST /vswitch/{vswitch_id}/server"] == 1
+    assert fake_robot.requests["GET /server"] == 1
+
+
+def test_async_vswitch_details_fetched_concurrently():
+    routes = {("GET", "/vswitch"): (200, [{"id": 1}, {"id": 2}])}
+    for vid in (1, 2):
+        routes[("GET", f"/vswitch/{vid}")] = (200, {"id": vid, "vlan": 4000 + vid, "server": []})
+    robot, calls = make_robot(routes)
+    vswitches = asyncio.run(robot.vswitch.list())
+    assert {v.vlan for v in vswitches.values()} == {4001, 4002}
+    assert len(calls) == 3
@@ -0,0 +1,109 @@
+import asyncio
+
+from hetznerinv.hetzner.aio import AsyncRobot
+from hetznerinv.hetzner.server import IpAddress
+from hetznerinv.hetzner.transport import AsyncHTTPTransport
+from hetznerinv.hetzner.util.cache import ResponseCache
+
+
+def test_entries_expire_per_endpoint(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("hetznerinv.hetzner.util.cache.time.monotonic", lambda: now[0])
+    cache = ResponseCache(ttl=10, ttls={"/failover": 1, "/reset": 0})
+    cache.put("/server", b"[]")
+    cache.put("/failover", b"[]")
+    cache.put("/reset/1", b"{}")
+    assert cache.get("/reset/1") is None
+    now[0] += 5
+    assert cache.get("/server") == b"[]"
+    assert cache.get("/failover") is None
+    now[0] += 6
+    assert cache.get("/server") is None
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 1, "misses": 3}
+
+
+def test_least_recently_used_are_evicted():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("/server/1", b"1234")
+    cache.put("/server/2", b"1234")
+    cache.get("/server/1")
+    cache.put("/server/3", b"1234")
+    assert cache.get("/server/2") is None
+    assert cache.get("/server/1") == b"1234"
+    assert cache.size == 8
+    cache.put("/server/4", b"x" * 11)
+    assert len(cache) == 2
+
+
+def test_invalidate_drops_the_whole_endpoint():
+    cache = ResponseCache()
+    for path in ["/rdns", "/rdns?server_ip=1.2.3.4", "/rdns/1.2.3.4", "/server"]:
+        cache.put(path, b"[]")
+    cache.invalidate("/rdns/1.2.3.4")
+    assert len(cache) == 1
+    assert cache.get("/server") == b"[]"
+
+
+def test_robot_reuses_and_invalidates_responses(fake_robot):
+    robot = fake_robot.robot(cache=ResponseCache())
+    robot.vswitch.list()
+    robot.vswitch.list(refresh=True)
+    assert fake_robot.requests["GET /vswitch"] == 1
+    assert fake_robot.requests["GET /vswitch/{vswitch_id}"] == 3
+
+    server = robot.servers.get("100000")
+    server.set_name("renamed")
+    assert [s.name for s in robot.servers if s.number == 100000] == ["renamed"]
+    assert fake_robot.requests["GET /server"] == 1
+
+    # Callers modifying a response don't affect the cached one.
+    subnet = next(iter(server.subnets))
+    IpAddress(robot.conn, robot.conn.get(f"/subnet/{subnet.net_ip}"), "2001:db8:0:1::1")
+    assert robot.conn.get(f"/subnet/{subnet.net_ip}")["subnet"]["ip"] == subnet.net_ip
+    assert fake_robot.requests["GET /subnet/{ip}"] == 1
+
+    assert server.reset.is_running
+    assert server.reset.is_running
+    assert fake_robot.requests["GET /reset/{ref}"] == 2
+    assert robot.cache_stats()["hits"] >= 4
+
+
+def test_async_robot_uses_the_cache(fake_robot):
+    async def run():
+        cache = ResponseCache()
+        async with AsyncRobot("robot", "secret", transport=AsyncHTTPTransport(fake_robot.url), cache=cache) as robot:
+            await robot.conn.get("/server")
+            await robot.conn.get("/server")
+            await robot.conn.post("/server/100000", {"server_name": "renamed"})
+            return await robot.conn.get("/server")
+
+    servers = asyncio.run(run())
+    assert servers[0]["server"]["server_name"] == "renamed"
+    assert fake_robot.requests["GET /server"] == 2
+
+
+def test_outdated_responses_are_not_cached():
+    cache = ResponseCache()
+    generation = cache.generation("/server")
+    cache.invalidate("/server/1")
+    cache.put("/server", b"[]", generation)
+    assert cache.get("/server") is None
+    cache.put("/server", b"[]", cache.generation("/server"))
+    assert cache.get("/server") == b"[]"
+
+
+def test_change_during_a_get_isnt_lost(fake_robot, monkeypatch):
+    robot = fake_robot.robot(cache=ResponseCache())
+    send = robot.conn._request
+
+    def rename_while_listing(method, path, *args):
+        response = send(method, path, *args)
+        if method == "GET" and path == "/server" and fake_robot.requests["POST /server/{ref}"] == 0:
+            robot.conn.post("/server/100000", {"server_name": "renamed"})
+        return response
+
+    monkeypatch.setattr(robot.conn, "_request", rename_while_listing)
+    robot.conn.get("/server")
+    listing = robot.conn.get("/server")
+    assert [s["server"]["server_name"] for s in listing if s["server"]["server_number"] == 100000] == ["renamed"]
+    assert fake_robot.requests["GET /server"] == 2
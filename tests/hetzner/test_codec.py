@@ -0,0 +1,77 @@
+import gzip
+import json
+import zlib
+
+import pytest
+
+from hetznerinv.hetzner.robot import Robot
+from hetznerinv.hetzner.util.codec import TransferStats, decode_body, loads
+
+SERVERS = [{"server": {"server_ip": f"192.0.2.{i}", "server_number": i, "product": "AX41"}} for i in range(200)]
+
+
+class GzipResponse:
+    status = 200
+    reason = "OK"
+
+    def __init__(self, payload):
+        self.body = gzip.compress(json.dumps(payload).encode())
+
+    def getheaders(self):
+        return [("Content-Encoding", "gzip")]
+
+    def read(self, amt=None):
+        body, self.body = self.body, b""
+        return body
+
+
+class GzipConnection:
+    sock = None
+
+    def __init__(self, headers):
+        self.headers = headers
+
+    def set_timeouts(self, connect, read):
+        pass
+
+    def request(self, method, path, body=None, headers=None):
+        self.headers.append(headers)
+
+    def getresponse(self):
+        return GzipResponse(SERVERS)
+
+    def close(self):
+        pass
+
+
+def test_decode_body():
+    data = b'{"a": [1, 2, 3]}'
+    assert decode_body(data) == data
+    assert decode_body(gzip.compress(data), "gzip") == data
+    assert decode_body(zlib.compress(data), "deflate") == data
+    with pytest.raises(ValueError):
+        decode_body(data, "br")
+
+
+def test_loads_accepts_bytes():
+    assert loads(b'{"ip": "192.0.2.1", "name": "\xc3\xa4"}') == {"ip": "192.0.2.1", "name": "ä"}
+    with pytest.raises(ValueError):
+        loads(b"<html>")
+
+
+def test_transfer_stats():
+    stats = TransferStats()
+    stats.record("/server", 10, 100)
+    stats.record("/server", 20, 200)
+    assert stats.stats() == {"/server": {"requests": 2, "wire_bytes": 30, "decoded_bytes": 300}}
+
+
+def test_robot_requests_and_decodes_gzip():
+    headers = []
+    robot = Robot("user", "secret")
+    robot.conn.transport.pool.factory = lambda: GzipConnection(headers)
+    assert robot.conn.get("/server") == SERVERS
+    assert "gzip" in headers[0]["Accept-Encoding"]
+    stats = robot.transfer_stats()["/server"]
+    assert stats["requests"] == 1
+    assert stats["wire_bytes"] < stats["decoded_bytes"]
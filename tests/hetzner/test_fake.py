@@ -0,0 +1,83 @@
+import pytest
+
+from hetznerinv.hetzner import RobotError
+from hetznerinv.hetzner.fake import Fleet, parse_form
+from hetznerinv.hetzner.util.retry import RetryPolicy
+
+
+def test_fleet_is_deterministic():
+    fleet = Fleet(1000, 20)
+    assert len(fleet.servers) == 1000
+    assert len(fleet.vswitches) == 20
+    assert len(fleet.failovers) == 20
+    assert Fleet(1000, 20).servers == fleet.servers
+    attached = {number for vswitch in fleet.vswitches.values() for number in vswitch["server"]}
+    assert 0 < len(attached) < 1000
+
+
+def test_parse_form():
+    assert parse_form("server[0]=a&server[1]=b&name=x") == {"server": ["a", "b"], "name": "x"}
+    assert parse_form(None) == {}
+
+
+def test_servers_and_vswitches(fake_robot):
+    robot = fake_robot.robot()
+    servers = list(robot.servers)
+    assert len(servers) == 20
+    server = robot.servers.get(servers[0].ip)
+    assert (server.number, server.name, server.datacenter) == (servers[0].number, servers[0].name, "FSN1-DC14")
+
+    vswitches = robot.vswitch.list()
+    assert len(vswitches) == 3
+    assert all(s["server_ip"] for vswitch in vswitches.values() for s in vswitch.server)
+    assert fake_robot.requests["GET /vswitch/{vswitch_id}"] == 3
+
+    server.set_name("renamed")
+    assert robot.servers.get(server.ip).name == "renamed"
+
+
+def test_ips_subnets_rdns_and_failover(fake_robot):
+    robot = fake_robot.robot()
+    server = robot.servers.get("100000")
+    assert len(list(server.ips)) == 2
+    assert {subnet.mask for subnet in server.subnets} == {64, 29}
+    assert [rdns.ptr for rdns in server.rdns] == [f"static.{server.ip}.clients.example.net"]
+    server.rdns.get(server.ip).set("host.example.com")
+    assert server.rdns.get(server.ip).ptr == "host.example.com"
+    # Servers without any IPv4 subnet still have their IPv6 one.
+    assert len(list(robot.servers.get("100001").subnets)) == 1
+    assert robot.failover.list() == {}
+
+
+def test_reset_and_rescue(fake_robot):
+    server = fake_robot.robot().servers.get("100003")
+    assert server.reset.reset_types == ["sw", "hw", "man"]
+    assert server.reset.is_running
+    assert server.reset.reboot("hard")["reset"]["type"] == "hw"
+    server.rescue.activate()
+    assert server.rescue.active
+    assert server.rescue.password
+    server.rescue.deactivate()
+    assert not server.rescue.active
+
+
+@pytest.mark.fake_robot(credentials=("robot", "secret"))
+def test_wrong_credentials_are_rejected(fake_robot):
+    with pytest.raises(RobotError) as excinfo:
+        list(fake_robot.robot(passwd="wrong").servers)
+    assert excinfo.value.status == 401
+    assert len(list(fake_robot.robot().servers)) == 20
+
+
+@pytest.mark.fake_robot(error_rate=0.3)
+def test_injected_errors_are_retried(fake_robot):
+    robot = fake_robot.robot(retry=RetryPolicy(max_attempts=20, backoff=0))
+    assert len(robot.vswitch.list()) == 3
+    assert fake_robot.requests["GET /vswitch"] + fake_robot.requests["GET /vswitch/{vswitch_id}"] == 4
+
+
+@pytest.mark.fake_robot(error_rate=1.0, error_status=500)
+def test_injected_errors_surface(fake_robot):
+    with pytest.raises(RobotError) as excinfo:
+        fake_robot.robot(retry=RetryPolicy.never()).vswitch.list()
+    assert excinfo.value.status == 500
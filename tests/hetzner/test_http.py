@@ -0,0 +1,31 @@
+from hetznerinv.hetzner.util import http
+
+
+def test_ssl_context_is_shared():
+    assert http.get_ssl_context() is http.get_ssl_context()
+
+
+def test_ssl_context_falls_back_to_embedded_root(monkeypatch):
+    monkeypatch.setattr(http, "get_ca_cert_bundle", lambda: None)
+    http._create_ssl_context.cache_clear()
+    try:
+        context = http.get_ssl_context()
+        assert context.cert_store_stats()["x509_ca"] == 1
+    finally:
+        http._create_ssl_context.cache_clear()
+
+
+def test_tls_session_cache_counts_handshakes():
+    cache = http.TLSSessionCache()
+    cache.record(resumed=False)
+    cache.record(resumed=True)
+    cache.record(resumed=True)
+    assert cache.stats() == {"full": 1, "resumed": 2}
+
+
+def test_tls_session_cache_keeps_last_session():
+    cache = http.TLSSessionCache()
+    cache.store(("robot-ws.your-server.de", 443), "session-1")
+    cache.store(("robot-ws.your-server.de", 443), None)
+    assert cache.get(("robot-ws.your-server.de", 443)) == "session-1"
+    assert cache.get(("robot.hetzner.com", 443)) is None
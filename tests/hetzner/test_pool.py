@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from hetznerinv.hetzner.util.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_reuses_released_connections():
+    pool = ConnectionPool(FakeConn, size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+
+
+def test_pool_discards_connection_on_error():
+    pool = ConnectionPool(FakeConn, size=1)
+    with pytest.raises(RuntimeError), pool.connection() as conn:
+        raise RuntimeError("boom")
+    assert conn.closed
+    assert pool.idle == 0
+    assert pool.acquire() is not conn
+
+
+def test_pool_is_bounded():
+    pool = ConnectionPool(FakeConn, size=1)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.01)
+    pool.release(conn)
+    assert pool.acquire(timeout=0.01) is conn
+
+
+def test_pool_reaps_idle_connections():
+    pool = ConnectionPool(FakeConn, size=1, idle_timeout=0.01)
+    conn = pool.acquire()
+    pool.release(conn)
+    time.sleep(0.02)
+    assert pool.acquire() is not conn
+    assert conn.closed
+
+
+def test_pool_limits_concurrency():
+    pool = ConnectionPool(FakeConn, size=3)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def worker():
+        with pool.connection():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(peak) == 12
+    assert max(peak) <= 3
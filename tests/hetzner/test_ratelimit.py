@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from hetznerinv.hetzner import RateLimitExceeded
+from hetznerinv.hetzner.robot import Robot
+from hetznerinv.hetzner.util.ratelimit import RateLimiter, TokenBucket, endpoint_of
+from hetznerinv.hetzner.util.retry import RetryPolicy
+
+RATE_LIMITED = {
+    "error": {
+        "status": 403,
+        "code": "RATE_LIMIT_EXCEEDED",
+        "max_request": 3600,
+        "interval": 36,
+        "message": "Rate limit exceeded",
+    }
+}
+
+
+class FakeResponse:
+    def __init__(self, status, data):
+        self.status = status
+        self.body = json.dumps(data).encode()
+
+    reason = ""
+
+    def getheaders(self):
+        return []
+
+    def read(self, amt=None):
+        body, self.body = self.body, b""
+        return body
+
+
+class FakeConnection:
+    sock = None
+
+    def __init__(self, responses, calls):
+        self.responses = responses
+        self.calls = calls
+
+    def set_timeouts(self, connect, read):
+        pass
+
+    def request(self, method, path, body=None, headers=None):
+        self.calls.append((method, path))
+
+    def getresponse(self):
+        return FakeResponse(*self.responses.pop(0))
+
+    def close(self):
+        pass
+
+
+def make_robot(responses, **kwargs):
+    calls = []
+    robot = Robot("user", "secret", **kwargs)
+    robot.conn.transport.pool.factory = lambda: FakeConnection(responses, calls)
+    return robot, calls
+
+
+def test_endpoint_of():
+    assert endpoint_of("/server") == "/server"
+    assert endpoint_of("/server/1.2.3.4/cancellation") == "/server"
+    assert endpoint_of("/rdns?server_ip=1.2.3.4") == "/rdns"
+
+
+def test_token_bucket_delays_instead_of_exceeding():
+    bucket = TokenBucket(2, 10.0)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.remaining == 0
+    assert 4.9 < bucket.reserve() <= 5.0
+    assert bucket.reserve(max_wait=1.0) is None
+
+
+def test_method_specific_limits_win():
+    limiter = RateLimiter({"/reset": (100, 3600), "POST /reset": (1, 3600)}, max_wait=0)
+    limiter.acquire("POST", "/reset/1.2.3.4")
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire("POST", "/reset/1.2.3.4")
+    limiter.acquire("GET", "/reset")
+    assert limiter.remaining("GET", "/reset") == 99
+    assert limiter.remaining("GET", "/server") is None
+    assert limiter.budgets() == {"/reset": 99, "POST /reset": 0}
+
+
+def test_rate_limit_error_is_adopted_and_retried():
+    robot, calls = make_robot([(403, RATE_LIMITED), (200, [])])
+    assert robot.conn.get("/server") == []
+    assert len(calls) == 2
+    # The limit reported by Robot (one request per 10ms) now applies.
+    assert robot.remaining_budget("/server") is not None
+
+
+def test_rate_limit_error_is_raised_when_budget_does_not_refill():
+    robot, calls = make_robot([(403, RATE_LIMITED)], rate_limiter=RateLimiter(max_wait=0))
+    with pytest.raises(RateLimitExceeded):
+        robot.conn.post("/reset/1.2.3.4", {"type": "hw"})
+    assert calls == [("POST", "/reset/1.2.3.4")]
+
+
+def test_rate_limit_error_without_limit_backs_off(monkeypatch):
+    unreported = {"error": {"status": 403, "code": "RATE_LIMIT_EXCEEDED", "message": "Rate limit exceeded"}}
+    sleeps = []
+    monkeypatch.setattr("hetznerinv.hetzner.robot.time.sleep", sleeps.append)
+    robot, calls = make_robot([(403, unreported)] * 3, retry=RetryPolicy(max_attempts=3, backoff=1.0))
+    with pytest.raises(RateLimitExceeded):
+        robot.conn.get("/server")
+    assert len(calls) == 3
+    # Every retry waited for the retry policy, not for a bucket that doesn't exist.
+    assert len(sleeps) == 2
+    assert robot.remaining_budget("/server") is None
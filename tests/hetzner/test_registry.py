@@ -0,0 +1,21 @@
+from hetznerinv.hetzner.registry import RobotRegistry
+
+
+def test_one_robot_per_account(fake_robot):
+    robots = RobotRegistry(fake_robot.robot)
+    production = robots.get("robot", "secret")
+    assert robots.get("robot", "secret") is production
+    assert robots.get("other", "secret") is not production
+    assert len(robots) == 2
+
+
+def test_snapshots_are_shared(fake_robot):
+    robots = RobotRegistry(fake_robot.robot)
+    for _env in ["production", "staging", "dev"]:
+        robot = robots.get("robot", "secret")
+        snapshot = robots.snapshot(robot, ("servers", "vswitches"))
+        assert len(snapshot.servers) == 20
+    assert robots.snapshot(robot, ("vswitches", "servers")) is snapshot
+    assert fake_robot.requests["GET /server"] == 1
+    robots.snapshot(robot, ("servers",))
+    assert fake_robot.requests["GET /server"] == 2
@@ -0,0 +1,102 @@
+from http.client import RemoteDisconnected
+
+import pytest
+
+from hetznerinv.hetzner import DeadlineExceeded, RequestTimeout
+from hetznerinv.hetzner.robot import RobotConnection
+from hetznerinv.hetzner.util.retry import RetryPolicy
+from hetznerinv.hetzner.util.timeouts import Deadline
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    reason = ""
+
+    def getheaders(self):
+        return []
+
+    def read(self, amt=None):
+        body, self.body = self.body, b""
+        return body
+
+
+class FlakyConnection:
+    """
+    Fails with the queued outcomes first, then answers with an empty server
+    list. An outcome is either an exception or a response status.
+    """
+
+    sock = None
+
+    def __init__(self, outcomes, calls):
+        self.outcomes = outcomes
+        self.calls = calls
+
+    def set_timeouts(self, connect, read):
+        pass
+
+    def request(self, method, path, body=None, headers=None):
+        self.calls.append(method)
+
+    def getresponse(self):
+        outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome, b"[]" if outcome == 200 else b'{"error": {"status": 500, "code": "X"}}')
+
+    def close(self):
+        pass
+
+
+def make_conn(outcomes, **kwargs):
+    calls = []
+    kwargs.setdefault("retry", RetryPolicy(backoff=0))
+    conn = RobotConnection("user", "secret", **kwargs)
+    conn.transport.pool.factory = lambda: FlakyConnection(outcomes, calls)
+    return conn, calls
+
+
+def test_get_is_retried_on_connection_reset_and_5xx():
+    conn, calls = make_conn([RemoteDisconnected("closed"), 503, TimeoutError()])
+    assert conn.get("/server") == []
+    assert calls == ["GET"] * 4
+
+
+def test_retries_are_bounded():
+    conn, calls = make_conn([RemoteDisconnected("closed")] * 10)
+    with pytest.raises(RemoteDisconnected):
+        conn.get("/server")
+    assert len(calls) == 4
+
+
+def test_post_is_only_retried_when_marked_idempotent():
+    conn, calls = make_conn([RemoteDisconnected("closed")])
+    with pytest.raises(RemoteDisconnected):
+        conn.post("/vswitch", {"name": "test"})
+    assert calls == ["POST"]
+
+    conn, calls = make_conn([RemoteDisconnected("closed")])
+    assert conn.post("/vswitch", {"name": "test"}, idempotent=True) == []
+    assert calls == ["POST", "POST"]
+
+
+def test_timeouts_are_retried_until_the_deadline():
+    conn, calls = make_conn([TimeoutError()], retry=RetryPolicy.never())
+    with pytest.raises(RequestTimeout):
+        conn.get("/server")
+
+    conn, calls = make_conn([TimeoutError()] * 10, deadline=Deadline(0))
+    with pytest.raises(DeadlineExceeded):
+        conn.get("/server")
+    assert calls == []
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(max_attempts=10, backoff=1.0, max_backoff=4.0, max_elapsed=None)
+    delays = [policy.next_delay(attempt, started=0) for attempt in range(1, 10)]
+    assert all(0 <= delay <= min(4.0, 2 ** (attempt - 1)) for attempt, delay in enumerate(delays, 1))
+    assert policy.next_delay(10, started=0) is None
+    assert RetryPolicy(max_elapsed=0.0, backoff=1.0).next_delay(1, started=0) is None
@@ -0,0 +1,201 @@
+import gc
+import logging
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+from hetznerinv.hetzner import RobotError
+from hetznerinv.hetzner.fake import Fleet
+from hetznerinv.hetzner.server import Server, Subnet
+from hetznerinv.hetzner.util.cache import ResponseCache
+
+
+def test_addresses_come_from_the_server_listing(fake_robot):
+    robot = fake_robot.robot()
+    servers = list(robot.servers)
+    audit = {server.ip: ([ip.ip for ip in server.ips], [str(net) for net in server.subnets]) for server in servers}
+    assert len(audit) == 20
+    assert audit[servers[0].ip][1][1] == "<Subnet 198.19.128.0/29>"
+    assert "GET /ip" not in fake_robot.requests
+    assert "GET /subnet" not in fake_robot.requests
+
+    server = servers[0]
+    ips = server.ips.list()
+    assert len(ips) == 2
+    assert {subnet.mask for subnet in server.subnets} == {64, 29}
+    # Details are only requested when needed.
+    assert ips[1].separate_mac is not None
+    assert fake_robot.requests["GET /ip/{ip}"] == 1
+    subnet = server.subnets.list()[0]
+    assert subnet.gateway == "fe80::1"
+    assert fake_robot.requests["GET /subnet/{ip}"] == 1
+
+
+def test_refresh_requests_the_addresses(fake_robot):
+    server = next(iter(fake_robot.robot().servers))
+    assert [ip.ip for ip in server.ips.list(refresh=True)] == server.ips.addresses
+    assert fake_robot.requests["GET /ip"] == 1
+    assert len(server.subnets.list(refresh=True)) == 2
+    assert fake_robot.requests["GET /subnet"] == 1
+    assert server.subnets.networks[0]["mask"] == 64
+
+
+def test_subnet_contains():
+    subnet = Subnet.from_listing(None, {"ip": "198.51.100.8", "mask": "29"}, "192.0.2.1")
+    assert "198.51.100.15" in subnet
+    assert "198.51.100.16" not in subnet
+    assert subnet.get_ip_range() == ("198.51.100.8", "198.51.100.15")
+
+
+@pytest.mark.fake_robot(servers=60)
+def test_account_addresses_are_requested_once(fake_robot):
+    robot = fake_robot.robot()
+    ips = robot.ips.by_server()
+    subnets = robot.subnets.by_server()
+    assert len(ips) == len(subnets) == 60
+    server = next(iter(robot.servers))
+    assert [ip.ip for ip in robot.ips.of(server.ip)] == server.ips.addresses
+    assert {subnet.mask for subnet in robot.subnets.of(server.ip)} == {64, 29}
+    assert robot.ips.of("192.0.2.1") == []
+    assert len(list(robot.ips)) == 80
+    assert fake_robot.requests["GET /ip"] == fake_robot.requests["GET /subnet"] == 1
+    assert "GET /ip/{ip}" not in fake_robot.requests
+
+    robot.ips.refresh()
+    assert fake_robot.requests["GET /ip"] == 2
+
+
+def test_servers_are_compact():
+    records = [{"server": data} for data in Fleet(10000, 0).servers.values()]
+    gc.collect()
+    loggers = len(logging.root.manager.loggerDict)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        servers = [Server(None, record) for record in records]
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    # About 1.2 KB each while every server created its helpers up front.
+    assert used / len(servers) < 400
+    assert len(logging.root.manager.loggerDict) == loggers
+
+
+def test_helpers_are_created_on_first_use(fake_robot):
+    server = next(iter(fake_robot.robot().servers))
+    assert server._reset is None
+    assert server._ips is None
+    assert server.reset is server.reset
+    assert server.ips is server.ips
+    assert server.rdns.conn is server.conn
+    with pytest.raises(AttributeError):
+        server.nickname = "web1"
+
+
+def test_listing_is_kept_and_indexed(fake_robot):
+    robot = fake_robot.robot()
+    servers = list(robot.servers)
+    assert list(robot.servers) == servers
+    first = servers[0]
+    assert robot.servers.by_number(first.number) is first
+    assert robot.servers.by_ip(first.ip) is first
+    assert robot.servers.by_name(first.name) is first
+    assert robot.servers.get(first.ip) is first
+    assert robot.servers.by_ip("203.0.113.1") is None
+    assert fake_robot.requests["GET /server"] == 1
+    assert "GET /server/{ref}" not in fake_robot.requests
+
+    first.set_name("renamed")
+    assert robot.servers.by_name("renamed") is first
+
+    assert robot.servers.refresh()[0] is not first
+    assert fake_robot.requests["GET /server"] == 2
+
+
+def test_abandoned_iteration_keeps_no_listing(fake_robot):
+    robot = fake_robot.robot()
+    next(iter(robot.servers))
+    assert robot.servers.by_number(100000) is not None
+    assert fake_robot.requests["GET /server"] == 2
+
+
+@pytest.mark.fake_robot(servers=100)
+def test_failover_and_vswitch_validate_against_the_listing(fake_robot):
+    robot = fake_robot.robot()
+    servers = list(robot.servers)
+    failover = next(iter(robot.failover.list().values()))
+    destination = next(s for s in servers if s.ip != failover.active_server_ip)
+    assert robot.failover.set(failover.ip, destination.ip).active_server_ip == destination.ip
+    with pytest.raises(RobotError, match="not in your server list"):
+        robot.failover.set(failover.ip, "203.0.113.1")
+
+    vswitch = next(iter(robot.vswitch.list(details=False).values()))
+    robot.vswitch.add_servers(vswitch, servers[:2])
+    with pytest.raises(RobotError, match="not in your server list"):
+        robot.vswitch.add_servers(vswitch, [SimpleNamespace(ip="203.0.113.1")])
+    assert fake_robot.requests["GET /server"] == 1
+    assert fake_robot.requests["POST /vswitch/{vswitch_id}/server"] == 1
+
+
+def test_refresh_updates_servers_in_place(fake_robot):
+    robot = fake_robot.robot()
+    servers = list(fake_robot.robot().servers)[:5]
+    kept = robot.servers.by_number(servers[0].number)
+    for server in servers:
+        robot.servers.get(str(server.number)).set_name(f"renamed-{server.number}")
+
+    assert robot.servers.refresh(servers) == servers
+    assert [server.name for server in servers] == [f"renamed-{server.number}" for server in servers]
+    assert kept.name == f"renamed-{kept.number}"
+    assert fake_robot.requests["GET /server"] == 3
+    assert fake_robot.requests["GET /server/{ref}"] == 5
+
+
+def test_refresh_requests_servers_missing_from_the_listing(fake_robot, monkeypatch):
+    robot = fake_robot.robot()
+    servers = list(robot.servers)[:2]
+    listing = robot.conn.get("/server")
+    del listing[0]["server"]["paid_until"]
+    monkeypatch.setattr(robot.conn, "get", lambda path, get=robot.conn.get: listing if path == "/server" else get(path))
+
+    robot.servers.refresh(servers)
+    assert fake_robot.requests["GET /server/{ref}"] == 1
+
+
+def test_refresh_leaves_out_servers_robot_does_not_know(fake_robot):
+    robot = fake_robot.robot()
+    server = robot.servers.by_number(100000)
+    data = {**robot.conn.get("/server")[1]["server"], "server_ip": "198.51.100.1", "server_number": 999999}
+    gone = Server(robot.conn, {"server": data})
+
+    assert robot.servers.refresh([server, gone]) == [server]
+    assert fake_robot.requests["GET /server/{ref}"] == 1
+    assert robot.servers.by_number(999999) is None
+    assert robot.servers.by_number(100000) is server
+    assert len(list(robot.servers)) == 20
+
+
+def test_refresh_bypasses_the_response_cache(fake_robot):
+    robot = fake_robot.robot(cache=ResponseCache(60))
+    server = robot.servers.by_number(100000)
+    fake_robot.robot().conn.post("/server/100000", {"server_name": "renamed"})
+    assert robot.servers.by_number(100000).name == server.name
+    assert robot.servers.refresh()[0].name == "renamed"
+    assert robot.servers.by_name("renamed").number == 100000
+    assert fake_robot.requests["GET /server"] == 2
+
+
+def test_refresh_of_servers_bypasses_the_cache_and_updates_the_indexes(fake_robot):
+    robot = fake_robot.robot(cache=ResponseCache(60))
+    server = robot.servers.by_number(100000)
+    old_name = server.name
+    fake_robot.robot().conn.post("/server/100000", {"server_name": "renamed"})
+
+    assert robot.servers.refresh([server]) == [server]
+    assert server.name == "renamed"
+    assert robot.servers.by_name("renamed") is server
+    assert robot.servers.by_name(old_name) is None
+    assert robot.servers.by_ip(server.ip) is server
+    assert fake_robot.requests["GET /server"] == 2
+    assert "GET /server/{ref}" not in fake_robot.requests
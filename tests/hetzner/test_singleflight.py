@@ -0,0 +1,128 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from hetznerinv.hetzner import RobotError
+from hetznerinv.hetzner.aio import AsyncRobot
+from hetznerinv.hetzner.transport import AsyncHTTPTransport
+from hetznerinv.hetzner.util.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait()
+        return "result"
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, "/reset/1", fetch) for _ in range(8)]
+        while flight.shared < 7:
+            threading.Event().wait(0.001)
+        release.set()
+        assert [f.result() for f in futures] == ["result"] * 8
+    assert len(calls) == 1
+    assert len(flight) == 0
+    # Later callers start a new call.
+    flight.do("/reset/1", fetch)
+    assert len(calls) == 2
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait()
+        raise RobotError("boom", 500)
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, "/failover", fail) for _ in range(4)]
+        while flight.shared < 3:
+            threading.Event().wait(0.001)
+        release.set()
+        for future in futures:
+            with pytest.raises(RobotError):
+                future.result()
+    assert len(flight) == 0
+
+
+def test_forget_starts_a_new_call_for_later_callers():
+    flight = SingleFlight()
+    release = threading.Event()
+    results = iter(["old", "new"])
+
+    def fetch():
+        release.wait()
+        return next(results)
+
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(flight.do, "/failover/192.0.2.1", fetch)
+        while len(flight) == 0:
+            threading.Event().wait(0.001)
+        flight.forget("/failover")
+        assert len(flight) == 0
+        release.set()
+        assert first.result() == "old"
+    assert flight.do("/failover/192.0.2.1", fetch) == "new"
+
+
+@pytest.mark.fake_robot(latency=0.05)
+def test_robot_sends_concurrent_gets_once(fake_robot):
+    robot = fake_robot.robot(pool_size=8)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: robot.conn.get("/server"), range(8)))
+    assert all(len(servers) == 20 for servers in results)
+    assert fake_robot.requests["GET /server"] < 8
+    assert robot.conn.inflight.shared == 8 - fake_robot.requests["GET /server"]
+
+
+def test_async_callers_share_one_call():
+    async def run():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("/server", fetch) for _ in range(5)))
+        return results, calls, flight
+
+    results, calls, flight = asyncio.run(run())
+    assert results == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.shared == 4
+
+
+def test_cancelled_async_caller_doesnt_cancel_the_shared_call():
+    async def run():
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return "result"
+
+        first = asyncio.ensure_future(flight.do("/server", fetch))
+        second = asyncio.ensure_future(flight.do("/server", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "result"
+
+
+@pytest.mark.fake_robot(latency=0.05)
+def test_async_robot_sends_concurrent_gets_once(fake_robot):
+    async def run():
+        async with AsyncRobot("robot", "secret", transport=AsyncHTTPTransport(fake_robot.url)) as robot:
+            return await asyncio.gather(*(robot.conn.get("/server") for _ in range(5)))
+
+    assert all(len(servers) == 20 for servers in asyncio.run(run()))
+    assert fake_robot.requests["GET /server"] == 1
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from hetznerinv.hetzner.fake import Fleet
+
+
+@pytest.mark.fake_robot(servers=100, vswitches=4)
+def test_snapshot_indexes(fake_robot):
+    robot = fake_robot.robot()
+    snapshot = robot.snapshot()
+    fleet = Fleet(100, 4)
+    assert len(snapshot.servers) == 100
+    assert len(snapshot.vswitches) == 4
+    assert len(snapshot.failovers) == 2
+    assert fake_robot.requests["GET /server"] == 1
+    assert fake_robot.requests["GET /vswitch/{vswitch_id}"] == 4
+
+    server = snapshot.server(100003)
+    assert snapshot.server(server.ip) is server
+    for ip in snapshot.ips_of(server.ip):
+        assert snapshot.server(ip["ip"]) is server
+    attached = fleet.vswitches[10001]["server"][0]
+    assert snapshot.vswitch_of(fleet.servers[attached]["server_ip"]).id == 10001
+    assert snapshot.rdns(server.ip) == robot.rdns.get(server.ip).ptr
+    assert snapshot.server(99) is None
+    assert snapshot.vswitch_of("192.0.2.1") is None
+
+
+def test_snapshot_is_read_only(fake_robot):
+    snapshot = fake_robot.robot().snapshot(include=("servers",))
+    with pytest.raises(TypeError):
+        snapshot.records["servers"] = ()
+    with pytest.raises(TypeError):
+        snapshot.vswitches[1] = None
+    assert isinstance(snapshot.servers, tuple)
+
+
+def test_snapshot_include(fake_robot):
+    started = time.time()
+    snapshot = fake_robot.robot().snapshot(include=("servers", "failovers"))
+    assert started <= snapshot.taken_at <= time.time()
+    assert len(snapshot.servers) == 20
+    # Robot answers 404 for an account without failover IPs.
+    assert snapshot.failovers == {}
+    assert snapshot.vswitches == {}
+    assert "GET /vswitch" not in fake_robot.requests
+    with pytest.raises(ValueError):
+        fake_robot.robot().snapshot(include=("servers", "invoices"))
+
+
+@pytest.mark.fake_robot(servers=20, vswitches=8, latency=0.05)
+def test_snapshot_requests_run_concurrently(fake_robot):
+    robot = fake_robot.robot()
+    started = time.monotonic()
+    robot.snapshot(max_workers=8)
+    # 6 lists and 8 vSwitch details, at least 0.7s one after another.
+    assert time.monotonic() - started < 0.5
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from hetznerinv.hetzner import DeadlineExceeded, RequestTimeout
+from hetznerinv.hetzner.robot import RobotConnection
+from hetznerinv.hetzner.util.retry import RetryPolicy
+from hetznerinv.hetzner.util.timeouts import Deadline, Timeout
+
+
+class SlowConnection:
+    sock = None
+
+    def __init__(self):
+        self.requests = []
+        self.timeouts = None
+
+    def set_timeouts(self, connect, read):
+        self.timeouts = (connect, read)
+
+    def request(self, method, path, body=None, headers=None):
+        self.requests.append((method, path))
+
+    def getresponse(self):
+        raise TimeoutError("timed out")
+
+    def close(self):
+        pass
+
+
+def test_deadline_without_limit_never_expires():
+    deadline = Deadline()
+    assert deadline.remaining() is None
+    assert not deadline.expired
+    assert deadline.cap(5.0) == 5.0
+    assert deadline.cap(None) is None
+    deadline.check()
+
+
+def test_deadline_caps_timeouts_and_expires():
+    deadline = Deadline(0.05)
+    assert deadline.cap(None) <= 0.05
+    assert deadline.cap(10.0) <= 0.05
+    assert deadline.cap(0.01) == 0.01
+    time.sleep(0.06)
+    assert deadline.expired
+    assert deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("Listing servers")
+
+
+def test_request_timeout_is_a_robot_error():
+    conn = RobotConnection(
+        "user", "secret", timeout=Timeout(connect=1.0, read=2.0, total=None), retry=RetryPolicy.never()
+    )
+    fake = SlowConnection()
+    conn.transport.pool.factory = lambda: fake
+    with pytest.raises(RequestTimeout):
+        conn.get("/server")
+    assert fake.timeouts == (1.0, 2.0)
+
+
+def test_expired_deadline_fails_before_sending():
+    deadline = Deadline(0)
+    conn = RobotConnection("user", "secret", deadline=deadline)
+    fake = SlowConnection()
+    conn.transport.pool.factory = lambda: fake
+    with pytest.raises(DeadlineExceeded):
+        conn.get("/server")
+    assert fake.requests == []
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from hetznerinv.hetzner.aio import AsyncRobot
+from hetznerinv.hetzner.robot import Robot
+from hetznerinv.hetzner.transport import ROBOT_WEB_URL, AsyncHTTPTransport, HTTPTransport, Transport
+
+SERVERS = [{"server": {"server_ip": "192.0.2.1", "server_number": 1, "server_name": "a", "product": "AX41"}}]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        body = json.dumps(SERVERS).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_robot():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.paths = []
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_transport_parses_base_url():
+    transport = Transport("http://localhost:8080/robot/")
+    assert (transport.tls, transport.host, transport.port, transport.prefix) == (False, "localhost", 8080, "/robot")
+    assert transport.path_of("http://localhost:8080/robot/server") == "/server"
+    assert transport.path_of("https://example.com/server") is None
+    assert Transport("https://robot-ws.your-server.de").port == 443
+    with pytest.raises(ValueError):
+        Transport("ftp://example.com")
+
+
+def test_robot_over_local_transport(local_robot):
+    base_url = f"http://127.0.0.1:{local_robot.server_port}/ws"
+    robot = Robot("user", "secret", transport=HTTPTransport(base_url, pool_size=1))
+    assert robot.conn.get("/server") == SERVERS
+    assert robot.conn.get("/server") == SERVERS
+    assert local_robot.paths == ["/ws/server", "/ws/server"]
+    # Both requests went over the same keep-alive connection.
+    assert robot.conn.transport.pool.idle == 1
+    robot.conn.transport.close()
+
+
+def test_async_robot_over_local_transport(local_robot):
+    base_url = f"http://127.0.0.1:{local_robot.server_port}"
+
+    async def run():
+        async with AsyncRobot("user", "secret", transport=AsyncHTTPTransport(base_url)) as robot:
+            return await robot.conn.get("/server")
+
+    assert asyncio.run(run()) == SERVERS
+    assert local_robot.paths == ["/server"]
+
+
+def test_web_interface_transports_are_pluggable(local_robot):
+    base_url = f"http://127.0.0.1:{local_robot.server_port}"
+    web = HTTPTransport(f"{base_url}/web")
+    login = HTTPTransport(f"{base_url}/login")
+    robot = Robot("user", "secret", web_transport=web, login_transport=login)
+    assert robot.conn.scraper.web is web
+    assert robot.conn.scraper.login_site is login
+    assert Robot("user", "secret").conn.scraper.web.base_url == ROBOT_WEB_URL
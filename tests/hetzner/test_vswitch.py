@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+
+@pytest.mark.fake_robot(servers=20, vswitches=8, latency=0.05)
+def test_details_are_fetched_concurrently(fake_robot):
+    robot = fake_robot.robot(pool_size=8)
+    started = time.monotonic()
+    vswitches = robot.vswitch.list()
+    # 9 requests, at least 0.45s one after another.
+    assert time.monotonic() - started < 0.3
+    assert len(vswitches) == 8
+    assert all(vswitch.server for vswitch in vswitches.values())
+
+
+@pytest.mark.fake_robot(servers=20, vswitches=3)
+def test_details_are_only_fetched_again_when_changed(fake_robot):
+    robot = fake_robot.robot()
+    robot.vswitch.list()
+    robot.vswitch.list()
+    assert fake_robot.requests["GET /vswitch"] == 2
+    assert fake_robot.requests["GET /vswitch/{vswitch_id}"] == 3
+
+    robot.conn.request("POST", "/vswitch/10001", {"name": "renamed", "vlan": 4001}, allow_empty=True)
+    vswitches = robot.vswitch.list()
+    assert vswitches[10001].name == "renamed"
+    assert fake_robot.requests["GET /vswitch/{vswitch_id}"] == 4
+
+    robot.vswitch.list(refresh=True)
+    assert fake_robot.requests["GET /vswitch/{vswitch_id}"] == 7
+
+
+def test_list_without_details(fake_robot):
+    vswitches = fake_robot.robot().vswitch.list(details=False)
+    assert {vswitch.id: vswitch.vlan for vswitch in vswitches.values()} == {10000: 4000, 10001: 4001, 10002: 4002}
+    assert vswitches[10000].server == []
+    assert "GET /vswitch/{vswitch_id}" not in fake_robot.requests
+
+
+@pytest.mark.fake_robot(servers=20, vswitches=2)
+def test_vswitch_index(fake_robot):
+    robot = fake_robot.robot()
+    index = robot.vswitch_index()
+    assert robot.vswitch_index() is index
+    assert fake_robot.requests["GET /vswitch"] == 1
+    assert len(index) == 2
+
+    servers = index.servers_of(10001)
+    assert len(servers) == 9
+    assert all(index.vswitch_of(server["server_ip"]).id == 10001 for server in servers)
+    assert index.vswitch_of("192.0.2.1") is None
+    assert [vswitch.id for vswitch in index.with_vlan(4000)] == [10000]
+    assert index.servers_of(1) == []
+
+    # A server attached by another client only shows up with refresh.
+    other = fake_robot.robot()
+    other.conn.request("POST", "/vswitch/10000/server", {"server": [servers[0]["server_ip"]]}, allow_empty=True)
+    assert robot.vswitch_index() is index
+    refreshed = robot.vswitch_index(refresh=True)
+    assert len(refreshed.servers_of(10000)) == len(index.servers_of(10000)) + 1
+    assert fake_robot.requests["GET /vswitch/{vswitch_id}"] == 4
@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+from hetznerinv.allocator import SubnetAllocator, SubnetExhausted
+
+
+def test_addresses_are_handed_out_in_order_within_the_subnet():
+    allocator = SubnetAllocator("10.0.0.4", "10.0.0.0/29")
+    allocator.reserve("10.0.0.5")
+    allocator.reserve("10.0.1.5")
+    assert [allocator.allocate() for _ in range(2)] == ["10.0.0.4", "10.0.0.6"]
+    assert allocator.remaining == 0
+    with pytest.raises(SubnetExhausted):
+        allocator.allocate()
+
+
+def test_start_must_be_in_the_subnet():
+    with pytest.raises(ValueError, match="outside"):
+        SubnetAllocator("10.0.1.1", "10.0.0.0/24")
+
+
+def test_no_subnet_means_no_upper_bound():
+    allocator = SubnetAllocator("10.0.0.255")
+    assert [allocator.allocate() for _ in range(2)] == ["10.0.0.255", "10.0.1.0"]
+
+
+def test_allocating_a_slash_16_takes_linear_time():
+    allocator = SubnetAllocator("10.0.0.1", "10.0.0.0/16")
+    # Every other address is already taken by a host of the previous inventory.
+    for address in range(1, 65534, 2):
+        allocator.reserve(f"10.0.{address >> 8}.{address & 0xFF}")
+
+    started = time.perf_counter()
+    allocated = []
+    while allocator.remaining:
+        allocated.append(allocator.allocate())
+    elapsed = time.perf_counter() - started
+
+    assert len(allocated) == 32767
+    assert allocated[:2] == ["10.0.0.2", "10.0.0.4"]
+    assert allocated[-1] == "10.0.255.254"
+    assert elapsed < 1.0
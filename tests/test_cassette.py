@@ -0,0 +1,71 @@
+import gzip
+import json
+
+import pytest
+import requests
+from hcloud import Client
+
+from hetznerinv.cassette import REDACTED, Cassette, CassetteMiss, redact
+from hetznerinv.hetzner.robot import Robot
+from hetznerinv.hetzner.transport import Response, Transport
+
+SERVERS = [{"server": {"server_ip": "192.0.2.1", "server_number": 1, "server_name": "a"}}]
+
+
+class FakeTransport(Transport):
+    def __init__(self):
+        super().__init__("https://robot.example")
+        self.calls = []
+
+    def send(self, method, path, body=None, headers=None, timeout=None):
+        self.calls.append((method, path, headers))
+        if path.startswith("/reset"):
+            data = {"reset": {"server_ip": "192.0.2.1", "password": "hunter2"}}
+        else:
+            data = SERVERS
+        return Response(200, "OK", [("Content-Type", "application/json")], json.dumps(data).encode())
+
+    def close(self):
+        pass
+
+
+def test_redact_replaces_sensitive_values():
+    assert redact({"a": [{"password": "x", "name": "n"}], "token": None}) == {
+        "a": [{"password": REDACTED, "name": "n"}],
+        "token": None,
+    }
+
+
+def test_robot_record_and_replay(tmp_path):
+    path = tmp_path / "robot.cassette.gz"
+    recording = Cassette(path, "record")
+    transport = FakeTransport()
+    robot = Robot("user", "secret", transport=recording.robot_transport(transport))
+    assert robot.conn.get("/server") == SERVERS
+    robot.conn.post("/reset/192.0.2.1", {"type": "hw"})
+    recording.save()
+
+    with gzip.open(path, "rt") as f:
+        raw = f.read()
+    assert "secret" not in raw
+    assert "hunter2" not in raw
+
+    replaying = Cassette(path, "replay")
+    robot = Robot("user", "other", transport=replaying.robot_transport(FakeTransport()))
+    assert robot.conn.get("/server") == SERVERS
+    # Answers are repeated once the recorded ones are used up.
+    assert robot.conn.get("/server") == SERVERS
+    assert robot.conn.post("/reset/192.0.2.1", {"type": "hw"})["reset"]["password"] == REDACTED
+    with pytest.raises(CassetteMiss):
+        robot.conn.get("/vswitch")
+
+
+def test_record_and_replay_are_exclusive(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette.from_options(tmp_path / "a", tmp_path / "b")
+    assert Cassette.from_options(None, None) is None
+
+
+def test_hcloud_client_has_a_requests_session():
+    # attach_cloud() mounts the cassette on this private attribute of hcloud's client.
+    assert isinstance(Client(token="token")._client._session, requests.Session)
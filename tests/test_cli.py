@@ -82,3 +82,4 @@ def test_generate_command_help():
     assert "--gen-cloud" in result.stdout
     assert "--gen-ssh" in result.stdout
     assert "--all-hosts" in result.stdout
+    assert "--deadline" in result.stdout
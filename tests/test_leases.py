@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+
+from hetznerinv import generate_inventory
+from hetznerinv.generate_inventory import _get_ip_addresses, _subnet_allocators
+from hetznerinv.leases import LeaseStore
+
+CONFIG = SimpleNamespace(
+    vlan_id="vlan4001",
+    cluster_subnets={"vlan4001": SimpleNamespace(start="10.1.0.1", subnet="10.1.0.0/16", privlink=False)},
+    no_privlink_hostnames=[],
+)
+
+
+@pytest.fixture
+def leases(tmp_path):
+    with LeaseStore(tmp_path / "leases.sqlite3") as leases:
+        yield leases
+
+
+def _generate(leases, numbers):
+    allocators = _subnet_allocators(CONFIG, {}, False, leases)
+    return {
+        number: _get_ip_addresses(
+            SimpleNamespace(number=number),
+            f"host{number}",
+            "fsn1dc14",
+            "vlan4001",
+            CONFIG,
+            {},
+            allocators,
+            False,
+            leases=leases,
+        )
+        for number in numbers
+    }
+
+
+def test_leases_are_kept_until_reclaimed(leases):
+    leases.acquire("vlan4001", 1, "10.1.0.1")
+    leases.acquire("vlan4001", 2, "10.1.0.2")
+    assert leases.get("vlan4001", 1).ip == "10.1.0.1"
+    assert leases.get("vlan4002", 1) is None
+
+    released = leases.reclaim(keep=[2])
+    assert [(lease.server_id, lease.released) for lease in released] == [(1, True)]
+    assert leases.get("vlan4001", 1) is None
+    assert [lease.server_id for lease in leases.leases("vlan4001")] == [2]
+    assert len(leases.leases(released=True)) == 2
+
+
+def test_only_new_servers_are_allocated_addresses(leases):
+    first = _generate(leases, range(2000, 0, -1))
+    changes = leases._db.total_changes
+
+    added = _generate(leases, [*range(1, 2001), 5000, 0, 3000])
+    assert leases._db.total_changes - changes == 3
+    assert {number: added[number] for number in first} == first
+    assert [added[number][1] for number in (5000, 0, 3000)] == ["10.1.7.209", "10.1.7.210", "10.1.7.211"]
+
+
+def test_reclaimed_addresses_are_handed_out_again(leases):
+    _generate(leases, [1, 2, 3])
+    leases.reclaim(keep=[1, 3])
+    assert _generate(leases, [1, 3, 4])[4] == ("10.1.0.2", "10.1.0.2")
+
+
+def test_servers_left_out_of_the_inventory_keep_their_leases(leases, tmp_path, monkeypatch):
+    for number in (1, 2, 3):
+        leases.acquire("vlan4001", number, f"10.1.0.{number}")
+    # Servers 1 and 2 are still at Robot but filtered out, e.g. as they belong to another environment.
+    monkeypatch.setattr(generate_inventory, "list_all_hosts", lambda *args, **kwargs: {})
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "inventory" / "production").mkdir(parents=True)
+    snapshot = SimpleNamespace(servers=[SimpleNamespace(number=1), SimpleNamespace(number=2)])
+
+    generate_inventory.gen_robot(None, CONFIG, snapshot=snapshot, leases=leases, reclaim_leases=True)
+    assert [lease.server_id for lease in leases.leases()] == [1, 2]
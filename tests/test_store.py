@@ -0,0 +1,75 @@
+import pytest
+
+from hetznerinv.hetzner.fake import Fleet
+from hetznerinv.store import FleetStore
+
+CLOUD_SERVER = {
+    "id": 42,
+    "name": "cloud-1",
+    "public_net": {"ipv4": {"ip": "192.0.2.10"}},
+    "datacenter": {"name": "fsn1-dc14", "location": {"name": "fsn1"}},
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    with FleetStore(tmp_path / "fleet.sqlite3", max_age=60) as store:
+        yield store
+
+
+@pytest.mark.fake_robot(servers=30, vswitches=2)
+def test_refresh_only_fetches_stale_resources(store, fake_robot):
+    robot = fake_robot.robot()
+    assert store.stale("production", ["servers", "vswitches"]) == ["servers", "vswitches"]
+    assert store.refresh_robot("production", robot) == ["servers", "vswitches", "failovers", "rdns", "ips", "subnets"]
+    assert store.refresh_robot("production", robot) == []
+    assert fake_robot.requests["GET /server"] == 1
+
+    snapshot = store.snapshot("production", robot)
+    assert len(snapshot.servers) == 30
+    assert snapshot.server(100000).ip == "198.18.0.1"
+    assert len(snapshot.vswitches) == 2
+    assert snapshot.taken_at == store.fetched_at("production", "servers")
+    assert store.load("production", "rdns")
+    # Another environment has nothing stored yet.
+    assert store.stale("staging", ["servers"]) == ["servers"]
+
+
+@pytest.mark.fake_robot(servers=30, vswitches=2)
+def test_indexed_lookups(store, fake_robot):
+    store.refresh_robot("production", fake_robot.robot(), ("servers", "vswitches"))
+    fleet = Fleet(30, 2)
+    server = fleet.servers[100003]
+    assert store.server_by_number("production", 100003)["server_ip"] == server["server_ip"]
+    assert store.server_by_ip("production", server["server_ip"])["server_number"] == 100003
+    assert len(store.servers_in_dc("production", "FSN1-DC14")) == 8
+    assert store.vswitch_of("production", server["server_ip"])["id"] == 10001
+    assert store.server_by_ip("staging", server["server_ip"]) is None
+    with pytest.raises(ValueError):
+        store.load("production", "servers", status="ready")
+
+
+def test_saved_data_survives_reopening(tmp_path):
+    path = tmp_path / "fleet.sqlite3"
+    with FleetStore(path) as store:
+        store.save("production", "cloud_servers", [CLOUD_SERVER], fetched_at=1.0)
+    with FleetStore(path, max_age=60) as store:
+        assert store.fetched_at("production", "cloud_servers") == 1.0
+        assert not store.is_fresh("production", "cloud_servers")
+        assert store.load("production", "cloud_servers", ip="192.0.2.10") == [CLOUD_SERVER]
+        assert store.load("production", "cloud_servers", dc="fsn1-dc14") == [CLOUD_SERVER]
+
+
+@pytest.mark.fake_robot(servers=30, vswitches=2)
+def test_snapshot_without_robot(tmp_path, fake_robot):
+    path = tmp_path / "snapshot.sqlite3"
+    snapshot = fake_robot.robot().snapshot(include=("servers", "vswitches"))
+    with FleetStore(path) as store:
+        store.save_snapshot("production", snapshot, ("servers", "vswitches"))
+    with FleetStore(path) as store:
+        assert store.fetched_at("production", "failovers") is None
+        offline = store.snapshot("production")
+    assert offline.taken_at == snapshot.taken_at
+    assert [server.ip for server in offline.servers] == [server.ip for server in snapshot.servers]
+    assert offline.servers[0].conn is None
+    assert offline.vswitches.keys() == snapshot.vswitches.keys()